@@ -9,23 +9,28 @@ outreach messages through the chat API.
 import json
 import logging
 import asyncio
+import time
 from typing import Dict, List, Optional, AsyncGenerator
 import aiohttp
 from datetime import datetime
 
+from sse_trace import SSETrace
+
 logger = logging.getLogger(__name__)
 
 
 class UnghostAPIClient:
     """Client for interacting with the Unghost backend API."""
     
-    def __init__(self, base_url: str = "http://localhost:8000"):
+    def __init__(self, base_url: str = "http://localhost:8000", max_connections: int = 100):
         self.base_url = base_url.rstrip('/')
+        self.max_connections = max_connections
         self.session: Optional[aiohttp.ClientSession] = None
         
     async def __aenter__(self):
         """Async context manager entry."""
-        self.session = aiohttp.ClientSession()
+        connector = aiohttp.TCPConnector(limit=self.max_connections)
+        self.session = aiohttp.ClientSession(connector=connector)
         return self
         
     async def __aexit__(self, exc_type, exc_val, exc_tb):
@@ -55,13 +60,36 @@ class UnghostAPIClient:
             timeout: Request timeout in seconds
             
         Returns:
-            Dictionary containing the generated message and metadata
+            Dictionary containing the generated message and metadata,
+            the SSE event trace and its summary
         """
+        payload = self.build_payload(scenario)
+        trace = SSETrace(scenario['id'])
+        
+        # Make the API call and collect the streamed response
+        start_time = datetime.now()
+        full_response = await self._stream_chat_response(payload, timeout, trace)
+        end_time = datetime.now()
+        
+        # Process the response
+        return {
+            "scenario_id": scenario['id'],
+            "use_case": scenario['use_case'],
+            "generated_message": self._extract_message(full_response),
+            "full_response": full_response,
+            "generation_time": (end_time - start_time).total_seconds(),
+            "timestamp": datetime.now().isoformat(),
+            "trace": trace.to_dict(),
+            "trace_summary": trace.summary()
+        }
+        
+    def build_payload(self, scenario: Dict) -> Dict:
+        """Build the chat stream request payload for a scenario."""
         # Construct the prompt from scenario data
         prompt = self._build_prompt(scenario)
         
         # Prepare the request payload
-        payload = {
+        return {
             "messages": [
                 {
                     "role": "user",
@@ -77,21 +105,6 @@ class UnghostAPIClient:
             "report_style": "friendly"
         }
         
-        # Make the API call and collect the streamed response
-        start_time = datetime.now()
-        full_response = await self._stream_chat_response(payload, timeout)
-        end_time = datetime.now()
-        
-        # Process the response
-        return {
-            "scenario_id": scenario['id'],
-            "use_case": scenario['use_case'],
-            "generated_message": self._extract_message(full_response),
-            "full_response": full_response,
-            "generation_time": (end_time - start_time).total_seconds(),
-            "timestamp": datetime.now().isoformat()
-        }
-        
     def _build_prompt(self, scenario: Dict) -> str:
         """Build a prompt from the scenario data."""
         recipient = scenario['recipient']
@@ -127,13 +140,21 @@ Generate ONLY the message content, without any preamble or explanation."""
     async def _stream_chat_response(
         self,
         payload: Dict,
-        timeout: int
+        timeout: int,
+        trace: Optional[SSETrace] = None
     ) -> str:
-        """Stream the chat response from the API."""
+        """
+        Stream the chat response from the API.
+        
+        If a trace is given, every event is recorded in it with its arrival
+        time, type, agent and size.
+        """
         url = f"{self.base_url}/api/chat/stream"
         headers = {"Accept": "text/event-stream"}
         
         collected_content = []
+        event_type = "message"
+        event_bytes = 0
         
         try:
             timeout_config = aiohttp.ClientTimeout(total=timeout)
@@ -145,12 +166,17 @@ Generate ONLY the message content, without any preamble or explanation."""
             ) as response:
                 async for line in response.content:
                     if line:
+                        event_bytes += len(line)
                         line_str = line.decode('utf-8').strip()
-                        if line_str.startswith("data: "):
+                        if line_str.startswith("event: "):
+                            event_type = line_str[7:]
+                        elif line_str.startswith("data: "):
                             data_str = line_str[6:]
                             if data_str and data_str != "[DONE]":
                                 try:
                                     data = json.loads(data_str)
+                                    if trace is not None:
+                                        trace.record(event_type, data, event_bytes)
                                     # Extract content from different event types
                                     if 'content' in data:
                                         collected_content.append(data['content'])
@@ -158,6 +184,8 @@ Generate ONLY the message content, without any preamble or explanation."""
                                         collected_content.append(data['chunk'])
                                 except json.JSONDecodeError:
                                     logger.debug(f"Could not parse: {data_str}")
+                            event_type = "message"
+                            event_bytes = 0
                                     
         except asyncio.TimeoutError:
             logger.error(f"Request timeout after {timeout} seconds")
@@ -165,9 +193,70 @@ Generate ONLY the message content, without any preamble or explanation."""
         except Exception as e:
             logger.error(f"Error streaming response: {e}")
             raise
+        finally:
+            if trace is not None:
+                trace.finish()
             
         return ''.join(collected_content)
         
+    async def timed_chat_request(self, payload: Dict, timeout: int = 120) -> Dict:
+        """
+        Send one chat stream request and measure its latency milestones.
+        
+        Errors are recorded in the result instead of being raised, so that
+        load tests can compute error rates.
+        
+        Returns:
+            Dictionary with time to first SSE event, time to first
+            message_chunk and total latency in seconds, plus event counts
+        """
+        url = f"{self.base_url}/api/chat/stream"
+        headers = {"Accept": "text/event-stream"}
+        result = {
+            "start": time.time(),
+            "ttfe": None,
+            "ttft": None,
+            "total": None,
+            "events": 0,
+            "bytes": 0,
+            "status": None,
+            "error": None,
+        }
+        
+        start = time.perf_counter()
+        try:
+            timeout_config = aiohttp.ClientTimeout(total=timeout)
+            async with self.session.post(
+                url,
+                json=payload,
+                headers=headers,
+                timeout=timeout_config
+            ) as response:
+                result["status"] = response.status
+                if response.status != 200:
+                    result["error"] = f"HTTP {response.status}"
+                async for line in response.content:
+                    result["bytes"] += len(line)
+                    line_str = line.decode('utf-8').strip()
+                    if not line_str.startswith("event: "):
+                        continue
+                    elapsed = time.perf_counter() - start
+                    result["events"] += 1
+                    if result["ttfe"] is None:
+                        result["ttfe"] = elapsed
+                    event_type = line_str[7:]
+                    if event_type == "message_chunk" and result["ttft"] is None:
+                        result["ttft"] = elapsed
+        except asyncio.TimeoutError:
+            result["error"] = f"timeout after {timeout}s"
+        except Exception as e:
+            result["error"] = str(e) or type(e).__name__
+        
+        result["total"] = time.perf_counter() - start
+        if result["error"] is None and result["events"] == 0:
+            result["error"] = "empty stream"
+        return result
+        
     def _extract_message(self, full_response: str) -> str:
         """
         Extract the actual outreach message from the full response.
@@ -10,8 +10,11 @@ Orchestrates the complete benchmark process:
 """
 
 import asyncio
+import itertools
 import json
 import logging
+import random
+import time
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Optional
@@ -19,6 +22,8 @@ import argparse
 
 from api_client import UnghostAPIClient
 from llm_judge import LLMJudge
+from results_store import DEFAULT_STORE, ResultsRun, ResultsStore
+from sse_trace import aggregate, save_traces
 try:
     from report_generator_improved import EnhancedBenchmarkReportGenerator as BenchmarkReportGenerator
 except ImportError:
@@ -38,11 +43,15 @@ class OutreachBenchmarkRunner:
     def __init__(
         self,
         backend_url: str = "http://localhost:8000",
-        scenarios_file: str = "test_scenarios.json"
+        scenarios_file: str = "test_scenarios.json",
+        store_dir: Optional[str] = None
     ):
         self.backend_url = backend_url
         self.scenarios_file = scenarios_file
         self.scenarios = []
+        # Append-only store that receives each result as it completes
+        self.store = ResultsStore(store_dir) if store_dir else None
+        self.store_run: Optional[ResultsRun] = None
         self.results = {
             'metadata': {
                 'start_time': None,
@@ -91,7 +100,10 @@ class OutreachBenchmarkRunner:
     async def run_benchmark(
         self,
         limit: Optional[int] = None,
-        categories: Optional[List[str]] = None
+        categories: Optional[List[str]] = None,
+        judge_concurrency: int = 4,
+        judge_batch_size: int = 1,
+        judge_cache: bool = True
     ) -> Dict:
         """
         Run the complete benchmark process.
@@ -99,6 +111,9 @@ class OutreachBenchmarkRunner:
         Args:
             limit: Maximum number of scenarios to test
             categories: Specific categories to test
+            judge_concurrency: Maximum concurrent LLM judge calls
+            judge_batch_size: Messages scored per LLM judge call
+            judge_cache: Reuse cached evaluations of unchanged messages
             
         Returns:
             Complete benchmark results
@@ -116,10 +131,21 @@ class OutreachBenchmarkRunner:
             scenarios_to_test = scenarios_to_test[:limit]
             
         logger.info(f"Starting benchmark with {len(scenarios_to_test)} scenarios")
+        if self.store:
+            self.store_run = self.store.start_run(
+                'outreach',
+                backend_url=self.backend_url,
+                total_scenarios=len(scenarios_to_test)
+            )
         
         # Initialize components
         async with UnghostAPIClient(self.backend_url) as api_client:
-            judge = LLMJudge()
+            judge_options = {} if judge_cache else {'cache_path': None}
+            judge = LLMJudge(
+                max_concurrency=judge_concurrency,
+                batch_size=judge_batch_size,
+                **judge_options
+            )
             
             # Check backend health
             if not await api_client.health_check():
@@ -129,6 +155,7 @@ class OutreachBenchmarkRunner:
                     'error': 'Backend not accessible',
                     'timestamp': datetime.now().isoformat()
                 })
+                self._close_store_run()
                 return self.results
                 
             # Initialize LLM judge
@@ -139,6 +166,7 @@ class OutreachBenchmarkRunner:
                     'error': 'LLM judge initialization failed',
                     'timestamp': datetime.now().isoformat()
                 })
+                self._close_store_run()
                 return self.results
                 
             # Phase 1: Generate outreach messages
@@ -152,12 +180,19 @@ class OutreachBenchmarkRunner:
                 r for r in generation_results 
                 if 'error' not in r
             ])
+            trace_summaries = [
+                r['trace_summary'] for r in generation_results
+                if 'trace_summary' in r
+            ]
+            if trace_summaries:
+                self.results['critical_path'] = aggregate(trace_summaries)
             
             # Phase 2: Evaluate generated messages
             logger.info("Phase 2: Evaluating generated messages...")
             evaluation_results = await judge.batch_evaluate(
                 generation_results,
-                scenarios_to_test
+                scenarios_to_test,
+                on_result=lambda evaluation: self._record('evaluation', evaluation)
             )
             self.results['evaluations'] = evaluation_results
             self.results['metadata']['successful_evaluations'] = len([
@@ -177,9 +212,25 @@ class OutreachBenchmarkRunner:
         start = datetime.fromisoformat(self.results['metadata']['start_time'])
         end = datetime.fromisoformat(self.results['metadata']['end_time'])
         self.results['metadata']['total_duration_seconds'] = (end - start).total_seconds()
+        self._close_store_run()
         
         return self.results
         
+    def _record(self, kind: str, data: Dict):
+        """Append a completed result to the results store, if enabled."""
+        if self.store_run:
+            self.store_run.append(kind, data)
+            
+    def _close_store_run(self):
+        if self.store_run:
+            self.store_run.close(
+                successful_generations=self.results['metadata']['successful_generations'],
+                successful_evaluations=self.results['metadata']['successful_evaluations'],
+                overall_average=self.results['aggregate_scores'].get('overall_average')
+            )
+            logger.info(f"Recorded {self.store_run.count} results in run {self.store_run.run_id}")
+            self.store_run = None
+        
     async def _generate_messages(
         self,
         api_client: UnghostAPIClient,
@@ -194,6 +245,7 @@ class OutreachBenchmarkRunner:
             try:
                 result = await api_client.generate_outreach(scenario)
                 results.append(result)
+                self._record('generation', result)
                 
                 # Log preview
                 message_preview = result.get('generated_message', '')[:100]
@@ -207,12 +259,122 @@ class OutreachBenchmarkRunner:
                     'error': str(e),
                     'timestamp': datetime.now().isoformat()
                 })
+                self._record('generation', results[-1])
                 
             # Rate limiting
             await asyncio.sleep(2)
             
         return results
         
+    async def run_load_test(
+        self,
+        mode: str = "closed",
+        concurrency: int = 4,
+        rate: float = 1.0,
+        duration: float = 60.0,
+        request_timeout: int = 120,
+        limit: Optional[int] = None,
+        categories: Optional[List[str]] = None
+    ) -> Dict:
+        """
+        Run scenarios against the backend under load for a fixed duration.
+        
+        Args:
+            mode: "closed" keeps ``concurrency`` requests in flight at all times;
+                "open" starts requests at Poisson arrivals of ``rate`` per second
+                regardless of how many are still running
+            concurrency: Number of concurrent clients in closed-loop mode
+            rate: Arrival rate in requests per second in open-loop mode
+            duration: Seconds during which new requests are started
+            request_timeout: Timeout of a single request in seconds
+            limit: Maximum number of scenarios to cycle through
+            categories: Specific categories to cycle through
+            
+        Returns:
+            Benchmark results with a ``load_test`` section
+        """
+        self.results['metadata']['start_time'] = datetime.now().isoformat()
+        
+        scenarios_to_test = self.scenarios
+        if categories:
+            scenarios_to_test = [
+                s for s in scenarios_to_test 
+                if s.get('category') in categories
+            ]
+        if limit:
+            scenarios_to_test = scenarios_to_test[:limit]
+        if not scenarios_to_test:
+            logger.error("No scenarios to run the load test with")
+            return self.results
+            
+        logger.info(
+            f"Starting {mode}-loop load test for {duration:.0f}s "
+            + (f"with {concurrency} clients" if mode == "closed" else f"at {rate} req/s")
+        )
+        
+        max_connections = concurrency if mode == "closed" else 0  # 0 = unlimited
+        async with UnghostAPIClient(self.backend_url, max_connections) as api_client:
+            if not await api_client.health_check():
+                logger.error("Backend health check failed")
+                self.results['errors'].append({
+                    'stage': 'health_check',
+                    'error': 'Backend not accessible',
+                    'timestamp': datetime.now().isoformat()
+                })
+                self._close_store_run()
+                return self.results
+                
+            samples: List[Dict] = []
+            counter = itertools.count()
+            
+            async def send() -> None:
+                scenario = scenarios_to_test[next(counter) % len(scenarios_to_test)]
+                result = await api_client.timed_chat_request(
+                    api_client.build_payload(scenario), request_timeout
+                )
+                result['scenario_id'] = scenario['id']
+                samples.append(result)
+                if result['error']:
+                    logger.warning(f"Request for {scenario['id']} failed: {result['error']}")
+                    
+            start = time.perf_counter()
+            deadline = start + duration
+            if mode == "closed":
+                async def client_loop() -> None:
+                    while time.perf_counter() < deadline:
+                        await send()
+                        
+                await asyncio.gather(*(client_loop() for _ in range(concurrency)))
+            else:
+                in_flight = set()
+                while True:
+                    await asyncio.sleep(random.expovariate(rate))
+                    if time.perf_counter() >= deadline:
+                        break
+                    task = asyncio.create_task(send())
+                    in_flight.add(task)
+                    task.add_done_callback(in_flight.discard)
+                if in_flight:
+                    await asyncio.gather(*in_flight)
+            elapsed = time.perf_counter() - start
+            
+        self.results['load_test'] = summarize_load_test(samples, elapsed)
+        self.results['load_test']['config'] = {
+            'mode': mode,
+            'concurrency': concurrency if mode == "closed" else None,
+            'rate': rate if mode == "open" else None,
+            'duration': duration,
+            'request_timeout': request_timeout,
+        }
+        self.results['metadata']['total_scenarios'] = len(samples)
+        self.results['metadata']['successful_generations'] = len(
+            [r for r in samples if not r['error']]
+        )
+        self.results['metadata']['end_time'] = datetime.now().isoformat()
+        self.results['metadata']['total_duration_seconds'] = elapsed
+        
+        return self.results
+        
     def save_results(self, output_dir: str = "benchmark_results"):
         """Save benchmark results to files."""
         output_path = Path(output_dir)
@@ -221,6 +383,18 @@ class OutreachBenchmarkRunner:
         # Create timestamp for filenames
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         
+        saved_files = {}
+        
+        # Save SSE traces separately; results keep the path and summary
+        traces = [g for g in self.results['generations'] if 'trace' in g]
+        if traces:
+            traces_dir = output_path / f"traces_{timestamp}"
+            save_traces((g.pop('trace') for g in traces), traces_dir)
+            for generation in traces:
+                generation['trace_file'] = str(traces_dir / f"{generation['scenario_id']}.json")
+            saved_files['traces'] = str(traces_dir)
+            logger.info(f"Saved {len(traces)} SSE traces to {traces_dir}")
+        
         # Save raw results as JSON
         results_file = output_path / f"benchmark_results_{timestamp}.json"
         with open(results_file, 'w', encoding='utf-8') as f:
@@ -247,10 +421,46 @@ class OutreachBenchmarkRunner:
         return {
             'results_file': str(results_file),
             'markdown_report': str(md_file),
-            'html_report': str(html_file)
+            'html_report': str(html_file),
+            **saved_files
         }
 
 
+def _percentile(values: List[float], pct: float) -> Optional[float]:
+    """Linearly interpolated percentile of a list of values."""
+    if not values:
+        return None
+    values = sorted(values)
+    rank = (len(values) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (rank - low)
+
+
+def summarize_load_test(samples: List[Dict], elapsed: float) -> Dict:
+    """Aggregate per-request load test samples into latency and rate metrics."""
+    succeeded = [r for r in samples if not r['error']]
+    summary = {
+        'requests': len(samples),
+        'errors': len(samples) - len(succeeded),
+        'error_rate': (len(samples) - len(succeeded)) / len(samples) if samples else 0.0,
+        'elapsed_seconds': elapsed,
+        'throughput_rps': len(succeeded) / elapsed if elapsed > 0 else 0.0,
+        'latency': {},
+        'samples': samples,
+    }
+    for metric in ('ttfe', 'ttft', 'total'):
+        values = [r[metric] for r in succeeded if r[metric] is not None]
+        summary['latency'][metric] = {
+            'count': len(values),
+            'mean': sum(values) / len(values) if values else None,
+            'p50': _percentile(values, 50),
+            'p95': _percentile(values, 95),
+            'p99': _percentile(values, 99),
+        }
+    return summary
+
+
 async def main():
     """Main entry point for the benchmark runner."""
     parser = argparse.ArgumentParser(
@@ -281,6 +491,63 @@ async def main():
         default='benchmark_results',
         help='Output directory for results'
     )
+    parser.add_argument(
+        '--load',
+        choices=['closed', 'open'],
+        help='Run a load test instead of the quality benchmark: closed-loop '
+             'concurrency or open-loop arrival rate'
+    )
+    parser.add_argument(
+        '--concurrency',
+        type=int,
+        default=4,
+        help='Concurrent clients in closed-loop load mode'
+    )
+    parser.add_argument(
+        '--rate',
+        type=float,
+        default=1.0,
+        help='Requests per second in open-loop load mode'
+    )
+    parser.add_argument(
+        '--duration',
+        type=float,
+        default=60.0,
+        help='Load test duration in seconds'
+    )
+    parser.add_argument(
+        '--request-timeout',
+        type=int,
+        default=120,
+        help='Timeout of a single request in seconds'
+    )
+    parser.add_argument(
+        '--store-dir',
+        default=str(DEFAULT_STORE),
+        help='Append-only results store directory'
+    )
+    parser.add_argument(
+        '--no-store',
+        action='store_true',
+        help='Do not record results in the results store'
+    )
+    parser.add_argument(
+        '--judge-concurrency',
+        type=int,
+        default=4,
+        help='Maximum concurrent LLM judge calls'
+    )
+    parser.add_argument(
+        '--judge-batch-size',
+        type=int,
+        default=1,
+        help='Messages scored per LLM judge call'
+    )
+    parser.add_argument(
+        '--no-judge-cache',
+        action='store_true',
+        help='Re-judge messages even if a cached evaluation exists'
+    )
     
     args = parser.parse_args()
     
@@ -291,7 +558,8 @@ async def main():
     
     # Create and configure runner
     runner = OutreachBenchmarkRunner(
-        backend_url=args.backend_url
+        backend_url=args.backend_url,
+        store_dir=None if args.no_store or args.load else args.store_dir
     )
     
     # Load scenarios
@@ -302,11 +570,46 @@ async def main():
     # Run benchmark
     print(f"🔧 Backend URL: {args.backend_url}")
     print(f"📊 Total scenarios: {len(runner.scenarios)}")
+    
+    if args.load:
+        print(f"\nStarting {args.load}-loop load test...\n")
+        results = await runner.run_load_test(
+            mode=args.load,
+            concurrency=args.concurrency,
+            rate=args.rate,
+            duration=args.duration,
+            request_timeout=args.request_timeout,
+            limit=args.limit,
+            categories=args.categories
+        )
+        
+        load = results.get('load_test')
+        print("\n" + "="*60)
+        print("📈 Load Test Summary")
+        print("="*60)
+        if load:
+            print(f"Requests: {load['requests']}, errors: {load['errors']} ({load['error_rate']:.1%})")
+            print(f"Throughput: {load['throughput_rps']:.2f} req/s")
+            for metric, label in (('ttfe', 'First event'), ('ttft', 'First chunk'), ('total', 'Total')):
+                stats = load['latency'][metric]
+                if stats['count']:
+                    print(f"{label:12} p50 {stats['p50']:.2f}s  p95 {stats['p95']:.2f}s  p99 {stats['p99']:.2f}s")
+        
+        print("\n💾 Saving results...")
+        saved_files = runner.save_results(args.output_dir)
+        print("\n✅ Load test complete!")
+        for file_type, file_path in saved_files.items():
+            print(f"   - {file_type}: {file_path}")
+        return
+    
     print("\nStarting benchmark...\n")
     
     results = await runner.run_benchmark(
         limit=args.limit,
-        categories=args.categories
+        categories=args.categories,
+        judge_concurrency=args.judge_concurrency,
+        judge_batch_size=args.judge_batch_size,
+        judge_cache=not args.no_judge_cache
     )
     
     # Print summary
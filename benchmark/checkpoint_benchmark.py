@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Checkpoint Size Benchmark for Unghost Agent
+
+Runs a synthetic outreach workflow (coordinator, background investigation,
+planner, N research steps, reporter) over the real ``State`` schema with a
+MemorySaver checkpointer, once with the default serializer and once with
+the out-of-line blob serializer, and reports checkpoint bytes per run.
+No LLM or network access is needed.
+"""
+
+import argparse
+import random
+import string
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict
+
+# Add parent directory to path to import from src
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.graph import END, START, StateGraph
+
+from src.graph.checkpoint import (
+    BlobOffloadingSerializer,
+    DiskBlobStore,
+    SQLiteBlobStore,
+)
+from src.graph.types import State
+from src.prompts.planner_model import Plan, Step, StepType
+
+
+def _text(rng: random.Random, size: int) -> str:
+    """Generate pseudo-prose of roughly ``size`` characters."""
+    words = []
+    length = 0
+    while length < size:
+        word = "".join(rng.choices(string.ascii_lowercase, k=rng.randint(2, 9)))
+        words.append(word)
+        length += len(word) + 1
+    return " ".join(words)
+
+
+def build_workflow(steps: int, result_size: int, seed: int = 42):
+    """Build a graph that produces state updates shaped like a real run."""
+    rng = random.Random(seed)
+
+    def coordinator(state: State):
+        return {"research_topic": state["messages"][-1].content, "locale": "en-US"}
+
+    def background_investigator(state: State):
+        return {"background_investigation_results": _text(rng, result_size * 2)}
+
+    def planner(state: State):
+        plan = Plan(
+            locale="en-US",
+            has_enough_context=False,
+            thought=_text(rng, 400),
+            title="Personalized Outreach Plan",
+            steps=[
+                Step(
+                    need_search=True,
+                    title=f"Step {i + 1}",
+                    description=_text(rng, 300),
+                    step_type=StepType.PERSONA_RESEARCH,
+                )
+                for i in range(steps)
+            ],
+        )
+        return {
+            "messages": [AIMessage(content=plan.model_dump_json(), name="planner")],
+            "current_plan": plan,
+        }
+
+    def research_step(state: State):
+        plan = state["current_plan"]
+        step = next(s for s in plan.steps if not s.execution_res)
+        result = _text(rng, result_size)
+        step.execution_res = result
+        return {
+            "messages": [HumanMessage(content=result, name="researcher")],
+            "observations": state.get("observations", []) + [result],
+            "current_plan": plan,
+        }
+
+    def route(state: State):
+        plan = state["current_plan"]
+        pending = any(not s.execution_res for s in plan.steps)
+        return "researcher" if pending else "reporter"
+
+    def reporter(state: State):
+        return {"final_report": _text(rng, result_size * 2)}
+
+    builder = StateGraph(State)
+    builder.add_node("coordinator", coordinator)
+    builder.add_node("background_investigator", background_investigator)
+    builder.add_node("planner", planner)
+    builder.add_node("researcher", research_step)
+    builder.add_node("reporter", reporter)
+    builder.add_edge(START, "coordinator")
+    builder.add_edge("coordinator", "background_investigator")
+    builder.add_edge("background_investigator", "planner")
+    builder.add_conditional_edges("planner", route, ["researcher", "reporter"])
+    builder.add_conditional_edges("researcher", route, ["researcher", "reporter"])
+    builder.add_edge("reporter", END)
+    return builder
+
+
+def _count_bytes(obj) -> int:
+    """Sum the serialized bytes held by a checkpointer's in-memory storage."""
+    if isinstance(obj, (bytes, bytearray)):
+        return len(obj)
+    if isinstance(obj, dict):
+        return sum(_count_bytes(v) for v in obj.values())
+    if isinstance(obj, (list, tuple)):
+        return sum(_count_bytes(v) for v in obj)
+    return 0
+
+
+def _store_bytes(store) -> int:
+    if isinstance(store, SQLiteBlobStore):
+        query = "SELECT COALESCE(SUM(LENGTH(data)), 0) FROM blobs"
+        return store._conn.execute(query).fetchone()[0]
+    if isinstance(store, DiskBlobStore):
+        return sum(p.stat().st_size for p in store.root.rglob("*") if p.is_file())
+    return 0
+
+
+def run_once(steps: int, result_size: int, runs: int, serde=None) -> Dict:
+    """Run the workflow ``runs`` times on fresh threads and measure checkpoints."""
+    memory = MemorySaver(serde=serde) if serde else MemorySaver()
+    graph = build_workflow(steps, result_size).compile(checkpointer=memory)
+
+    start = time.perf_counter()
+    for run in range(runs):
+        graph.invoke(
+            {
+                "messages": [
+                    HumanMessage(content="Write to Sarah Chen, CTO at TechCorp")
+                ]
+            },
+            config={
+                "configurable": {"thread_id": f"run-{run}"},
+                "recursion_limit": 100,
+            },
+        )
+    elapsed = time.perf_counter() - start
+
+    checkpoint_bytes = sum(
+        _count_bytes(getattr(memory, attr, {}))
+        for attr in ("storage", "blobs", "writes")
+    )
+    blob_bytes = _store_bytes(serde.store) if serde else 0
+    return {
+        "checkpoint_bytes_per_run": checkpoint_bytes / runs,
+        "blob_store_bytes_per_run": blob_bytes / runs,
+        "total_bytes_per_run": (checkpoint_bytes + blob_bytes) / runs,
+        "seconds_per_run": elapsed / runs,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark checkpoint size per run")
+    parser.add_argument("--steps", type=int, default=3, help="Research steps per plan")
+    parser.add_argument(
+        "--result-size", type=int, default=6000, help="Characters per step result"
+    )
+    parser.add_argument("--runs", type=int, default=5, help="Runs per configuration")
+    parser.add_argument(
+        "--store", choices=["sqlite", "disk"], default="sqlite", help="Blob store type"
+    )
+    parser.add_argument(
+        "--min-size", type=int, default=1024, help="Minimum blob size in bytes"
+    )
+    args = parser.parse_args()
+
+    print("\n" + "=" * 60)
+    print("📦 Checkpoint Size Benchmark")
+    print("=" * 60)
+    print(
+        f"Steps: {args.steps}, result size: {args.result_size} chars, runs: {args.runs}\n"
+    )
+
+    baseline = run_once(args.steps, args.result_size, args.runs)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        store = (
+            SQLiteBlobStore(Path(tmp_dir) / "blobs.sqlite3")
+            if args.store == "sqlite"
+            else DiskBlobStore(tmp_dir)
+        )
+        serde = BlobOffloadingSerializer(store, min_size=args.min_size)
+        offloaded = run_once(args.steps, args.result_size, args.runs, serde)
+
+    print(f"{'':28}{'before':>14}{'after':>14}")
+    for key in (
+        "checkpoint_bytes_per_run",
+        "blob_store_bytes_per_run",
+        "total_bytes_per_run",
+        "seconds_per_run",
+    ):
+        fmt = "{:>14.4f}" if key == "seconds_per_run" else "{:>14,.0f}"
+        print(f"{key:28}" + fmt.format(baseline[key]) + fmt.format(offloaded[key]))
+
+    reduction = 1 - offloaded["total_bytes_per_run"] / baseline["total_bytes_per_run"]
+    print(f"\n✅ Total bytes per run reduced by {reduction:.1%}")
+
+
+if __name__ == "__main__":
+    main()
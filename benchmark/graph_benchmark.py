@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+End-to-End Graph Benchmark for Unghost Agent
+
+Runs the real outreach workflow (coordinator -> planner -> research team ->
+reporter) on the simulated LLM, so no API keys or network access are needed
+and model latency is fixed by the latency model. Each run is streamed the
+same way the chat API streams it. For every concurrency level the benchmark
+reports run latency percentiles, throughput and the orchestration overhead:
+the part of a run not spent waiting for the (simulated) LLM or in tools.
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, List
+
+# Add parent directory to path to import from src
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round((len(values) - 1) * pct / 100)))]
+
+
+async def run_thread(graph, handler_cls, timeline_cls) -> Dict:
+    """Run one workflow thread and return its wall time and timeline."""
+    thread_id = str(uuid.uuid4())
+    timeline = timeline_cls(thread_id)
+    input_ = {
+        "messages": [
+            {
+                "role": "user",
+                "content": "Write a LinkedIn message to Sarah Chen, CTO at TechCorp",
+            }
+        ],
+        "plan_iterations": 0,
+        "final_report": "",
+        "current_plan": None,
+        "observations": [],
+        "auto_accepted_plan": True,
+        "enable_background_investigation": False,
+        "research_topic": "",
+    }
+    config = {
+        "thread_id": thread_id,
+        "max_plan_iterations": 1,
+        "max_step_num": 3,
+        "max_search_results": 3,
+        "mcp_settings": {},
+        "report_style": "friendly",
+        "enable_deep_thinking": False,
+        "callbacks": [handler_cls(timeline)],
+        "recursion_limit": 100,
+    }
+
+    events = 0
+    start = time.perf_counter()
+    async for _ in graph.astream(
+        input_,
+        config=config,
+        stream_mode=["messages", "updates", "custom"],
+        subgraphs=True,
+    ):
+        events += 1
+    wall = time.perf_counter() - start
+
+    summary = timeline.summary()
+    llm_seconds = sum(g["total_seconds"] for g in summary["llm"].values())
+    tool_seconds = sum(g["total_seconds"] for g in summary["tools"].values())
+    return {
+        "wall": wall,
+        "events": events,
+        "llm_calls": sum(g["count"] for g in summary["llm"].values()),
+        "llm_seconds": llm_seconds,
+        "overhead": max(0.0, wall - llm_seconds - tool_seconds),
+    }
+
+
+async def run_level(graph, handler_cls, timeline_cls, concurrency: int) -> Dict:
+    """Run ``concurrency`` threads at once and aggregate their results."""
+    start = time.perf_counter()
+    runs = await asyncio.gather(
+        *(run_thread(graph, handler_cls, timeline_cls) for _ in range(concurrency))
+    )
+    elapsed = time.perf_counter() - start
+
+    walls = [r["wall"] for r in runs]
+    return {
+        "concurrency": concurrency,
+        "throughput": concurrency / elapsed,
+        "p50": _percentile(walls, 50),
+        "p95": _percentile(walls, 95),
+        "llm_calls": statistics.mean(r["llm_calls"] for r in runs),
+        "llm_seconds": statistics.mean(r["llm_seconds"] for r in runs),
+        "overhead": statistics.mean(r["overhead"] for r in runs),
+        "events": statistics.mean(r["events"] for r in runs),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark graph orchestration on the simulated LLM"
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        nargs="+",
+        default=[1, 10, 100],
+        help="Concurrent threads per level",
+    )
+    parser.add_argument(
+        "--ttft", type=float, default=0.2, help="Simulated time to first token (s)"
+    )
+    parser.add_argument(
+        "--tokens-per-second",
+        type=float,
+        default=200.0,
+        help="Simulated streaming speed, 0 for no per-token delay",
+    )
+    parser.add_argument(
+        "--fixtures", help="JSON or YAML fixture file (default: built-in script)"
+    )
+    parser.add_argument(
+        "--early-step-dispatch",
+        action="store_true",
+        help="Start the first plan step while the planner is still streaming",
+    )
+    args = parser.parse_args()
+
+    # The LLM factory reads these when the first model is created.
+    os.environ["USE_SIMULATED_LLM"] = "true"
+    os.environ["SIMULATED_MODEL__ttft"] = str(args.ttft)
+    os.environ["SIMULATED_MODEL__tokens_per_second"] = str(args.tokens_per_second)
+    if args.fixtures:
+        os.environ["SIMULATED_MODEL__fixtures"] = args.fixtures
+    if args.early_step_dispatch:
+        os.environ["ENABLE_EARLY_STEP_DISPATCH"] = "true"
+
+    from src.graph.builder import build_graph_with_memory
+    from src.utils.metrics import MetricsCallbackHandler, RunTimeline
+
+    graph = build_graph_with_memory()
+
+    print("\n" + "=" * 60)
+    print("🕸️  End-to-End Graph Benchmark (simulated LLM)")
+    print("=" * 60)
+    print(
+        f"TTFT: {args.ttft}s, tokens/s: {args.tokens_per_second}, "
+        f"early step dispatch: {'on' if args.early_step_dispatch else 'off'}\n"
+    )
+
+    # Warm up imports, prompt templates and caches outside the measurement.
+    asyncio.run(run_level(graph, MetricsCallbackHandler, RunTimeline, 1))
+
+    print(
+        f"{'threads':>8}{'runs/s':>10}{'p50 s':>9}{'p95 s':>9}"
+        f"{'LLM calls':>11}{'LLM s':>8}{'overhead s':>12}{'events':>8}"
+    )
+    for concurrency in args.concurrency:
+        level = asyncio.run(
+            run_level(graph, MetricsCallbackHandler, RunTimeline, concurrency)
+        )
+        print(
+            f"{level['concurrency']:>8}{level['throughput']:>10.2f}"
+            f"{level['p50']:>9.2f}{level['p95']:>9.2f}"
+            f"{level['llm_calls']:>11.1f}{level['llm_seconds']:>8.2f}"
+            f"{level['overhead']:>12.3f}{level['events']:>8.0f}"
+        )
+
+    print("\n✅ Overhead = run wall time minus time in LLM calls and tools")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,10 +6,13 @@ Uses the configured LLM to evaluate generated outreach messages
 based on predefined criteria.
 """
 
+import hashlib
 import json
 import logging
+import random
 import re
-from typing import Dict, List, Optional
+import time
+from typing import Callable, Dict, List, Optional
 import asyncio
 from pathlib import Path
 import sys
@@ -22,14 +25,90 @@ from src.utils.json_utils import repair_json_output
 
 logger = logging.getLogger(__name__)
 
+# Bump when the evaluation prompt changes so cached evaluations are not reused.
+JUDGE_PROMPT_VERSION = "1"
+
+EVALUATION_FORMAT = """{
+    "scores": {
+        "personalization": <score>,
+        "goal_alignment": <score>,
+        "tone_appropriateness": <score>,
+        "clarity_readability": <score>,
+        "cta_effectiveness": <score>,
+        "authenticity": <score>,
+        "relevance": <score>
+    },
+    "justifications": {
+        "personalization": "<justification>",
+        "goal_alignment": "<justification>",
+        "tone_appropriateness": "<justification>",
+        "clarity_readability": "<justification>",
+        "cta_effectiveness": "<justification>",
+        "authenticity": "<justification>",
+        "relevance": "<justification>"
+    },
+    "expected_elements_present": {
+        "element_1": true/false,
+        "element_2": true/false,
+        ...
+    },
+    "overall_score": <weighted average of all scores>,
+    "overall_assessment": "<1-2 sentence summary>",
+    "strengths": ["<strength 1>", "<strength 2>", ...],
+    "improvements": ["<improvement 1>", "<improvement 2>", ...],
+    "recommendation": "<specific recommendation for improvement>"
+}"""
+
+DEFAULT_CACHE_PATH = Path(__file__).parent / ".cache" / "judge_cache.jsonl"
+
+
+def _is_rate_limit_error(error: Exception) -> bool:
+    """Whether an LLM error is a rate limit or overload that is worth retrying."""
+    status = getattr(error, 'status_code', None) or getattr(
+        getattr(error, 'response', None), 'status_code', None
+    )
+    if status in (429, 503, 529):
+        return True
+    text = str(error).lower()
+    return any(marker in text for marker in ('rate limit', 'ratelimit', '429', 'overloaded'))
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    """Return the Retry-After delay in seconds sent with an error, if any."""
+    headers = getattr(getattr(error, 'response', None), 'headers', None) or {}
+    try:
+        return float(headers.get('retry-after'))
+    except (TypeError, ValueError):
+        return None
+
 
 class LLMJudge:
     """LLM-based evaluator for outreach messages."""
     
-    def __init__(self):
+    def __init__(
+        self,
+        max_concurrency: int = 4,
+        batch_size: int = 1,
+        cache_path: Optional[str] = str(DEFAULT_CACHE_PATH),
+        max_retries: int = 5,
+    ):
+        """
+        Args:
+            max_concurrency: Maximum number of judge calls in flight
+            batch_size: Messages scored per judge call in batch_evaluate
+            cache_path: JSON-lines evaluation cache, None to disable caching
+            max_retries: Retries of a rate-limited judge call
+        """
         self.llm = None
         self.evaluation_criteria = None
+        self.max_concurrency = max(1, max_concurrency)
+        self.batch_size = max(1, batch_size)
+        self.max_retries = max_retries
+        self.cache_path = Path(cache_path) if cache_path else None
+        self._cache: Dict[str, Dict] = {}
+        self._cooldown_until = 0.0
         self._load_evaluation_criteria()
+        self._load_cache()
         
     def _load_evaluation_criteria(self):
         """Load evaluation criteria from test scenarios."""
@@ -44,6 +123,43 @@ class LLMJudge:
             self.evaluation_criteria = {}
             self.scoring_guidelines = {}
             
+    @property
+    def criteria_version(self) -> str:
+        """Hash of the prompt version, criteria and scoring guidelines."""
+        payload = json.dumps(
+            [JUDGE_PROMPT_VERSION, self.evaluation_criteria, self.scoring_guidelines],
+            sort_keys=True
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:12]
+        
+    def _cache_key(self, message: str, scenario_id: str) -> str:
+        message_hash = hashlib.sha256(message.encode('utf-8')).hexdigest()
+        return f"{message_hash}:{scenario_id}:{self.criteria_version}"
+        
+    def _load_cache(self):
+        """Load cached evaluations; entries of other criteria versions are skipped."""
+        if not self.cache_path or not self.cache_path.exists():
+            return
+        version = self.criteria_version
+        with open(self.cache_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if entry.get('key', '').endswith(f":{version}"):
+                    self._cache[entry['key']] = entry['evaluation']
+        logger.info(f"Loaded {len(self._cache)} cached evaluations from {self.cache_path}")
+        
+    def _store(self, key: str, evaluation: Dict):
+        """Cache a successful evaluation in memory and on disk."""
+        if not self.cache_path or 'error' in evaluation or 'parsing_error' in evaluation:
+            return
+        self._cache[key] = dict(evaluation)
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.cache_path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps({'key': key, 'evaluation': evaluation}, ensure_ascii=False) + "\n")
+            
     async def initialize(self):
         """Initialize the LLM client."""
         try:
@@ -78,12 +194,17 @@ class LLMJudge:
         # Use provided criteria or default
         eval_criteria = criteria or self.evaluation_criteria
         
+        # Only evaluations against the default criteria are cached
+        cache_key = self._cache_key(message, scenario['id']) if criteria is None else None
+        if cache_key in self._cache:
+            return {**self._cache[cache_key], 'cached': True}
+            
         # Build the evaluation prompt
         prompt = self._build_evaluation_prompt(message, scenario, eval_criteria)
         
         try:
             # Get LLM evaluation
-            response = await self.llm.ainvoke(prompt)
+            response = await self._ainvoke_with_backoff(prompt)
             
             # Extract and parse the evaluation
             evaluation = self._parse_evaluation_response(response.content)
@@ -92,6 +213,8 @@ class LLMJudge:
             evaluation['scenario_id'] = scenario['id']
             evaluation['use_case'] = scenario['use_case']
             
+            if cache_key:
+                self._store(cache_key, evaluation)
             return evaluation
             
         except Exception as e:
@@ -102,19 +225,54 @@ class LLMJudge:
                 'use_case': scenario['use_case']
             }
             
-    def _build_evaluation_prompt(
-        self,
-        message: str,
-        scenario: Dict,
-        criteria: Dict
-    ) -> str:
-        """Build the evaluation prompt for the LLM."""
+    async def _ainvoke_with_backoff(self, prompt: str):
+        """
+        Invoke the judge, backing off exponentially on rate limits.
         
+        A rate limit pauses all concurrent calls of this judge, not only the
+        one that hit it, and a Retry-After header takes precedence.
+        """
+        for attempt in range(self.max_retries + 1):
+            wait = self._cooldown_until - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            try:
+                return await self.llm.ainvoke(prompt)
+            except Exception as e:
+                if attempt == self.max_retries or not _is_rate_limit_error(e):
+                    raise
+                delay = _retry_after(e) or min(60.0, 2 ** attempt) + random.uniform(0, 1)
+                self._cooldown_until = max(self._cooldown_until, time.monotonic() + delay)
+                logger.warning(
+                    f"Judge rate limited, retrying in {delay:.1f}s "
+                    f"(attempt {attempt + 1}/{self.max_retries})"
+                )
+                
+    def _format_scenario_context(self, scenario: Dict) -> str:
+        """Format the scenario section of an evaluation prompt."""
         # Format expected elements
         expected_elements = "\n".join([
             f"- {element}" for element in scenario.get('expected_elements', [])
         ])
         
+        return f"""Use Case: {scenario['use_case']}
+Category: {scenario.get('category', 'general')}
+
+Recipient Information:
+- Name: {scenario['recipient']['name']}
+- Role: {scenario['recipient']['role']} at {scenario['recipient']['company']}
+- Recent Activity: {scenario['recipient']['recent_activity']}
+- Interests: {', '.join(scenario['recipient']['interests'])}
+
+Sender Information:
+- Objective: {scenario['sender']['objective']}
+- Value Proposition: {scenario['sender']['value_proposition']}
+
+Expected Elements in the Message:
+{expected_elements}"""
+        
+    def _format_criteria(self, criteria: Dict) -> str:
+        """Format the evaluation criteria and scoring guidelines sections."""
         # Format evaluation criteria
         criteria_text = ""
         for criterion, details in criteria.items():
@@ -126,37 +284,33 @@ class LLMJudge:
             for score, description in self.scoring_guidelines.items()
         ])
         
-        prompt = f"""You are an expert evaluator of outreach messages. Evaluate the following message based on the given context and criteria.
-
-## SCENARIO CONTEXT
+        return f"""## EVALUATION CRITERIA
 
-Use Case: {scenario['use_case']}
-Category: {scenario.get('category', 'general')}
+Please evaluate the message on each of the following criteria using a 1-5 scale:
+{criteria_text}
 
-Recipient Information:
-- Name: {scenario['recipient']['name']}
-- Role: {scenario['recipient']['role']} at {scenario['recipient']['company']}
-- Recent Activity: {scenario['recipient']['recent_activity']}
-- Interests: {', '.join(scenario['recipient']['interests'])}
+## SCORING GUIDELINES
+{scoring_text}"""
+        
+    def _build_evaluation_prompt(
+        self,
+        message: str,
+        scenario: Dict,
+        criteria: Dict
+    ) -> str:
+        """Build the evaluation prompt for the LLM."""
+        
+        prompt = f"""You are an expert evaluator of outreach messages. Evaluate the following message based on the given context and criteria.
 
-Sender Information:
-- Objective: {scenario['sender']['objective']}
-- Value Proposition: {scenario['sender']['value_proposition']}
+## SCENARIO CONTEXT
 
-Expected Elements in the Message:
-{expected_elements}
+{self._format_scenario_context(scenario)}
 
 ## MESSAGE TO EVALUATE
 
 {message}
 
-## EVALUATION CRITERIA
-
-Please evaluate the message on each of the following criteria using a 1-5 scale:
-{criteria_text}
-
-## SCORING GUIDELINES
-{scoring_text}
+{self._format_criteria(criteria)}
 
 ## EVALUATION TASK
 
@@ -170,39 +324,75 @@ Please evaluate the message on each of the following criteria using a 1-5 scale:
 3. Provide an overall assessment and recommendations for improvement
 
 Return your evaluation in the following JSON format:
-{{
-    "scores": {{
-        "personalization": <score>,
-        "goal_alignment": <score>,
-        "tone_appropriateness": <score>,
-        "clarity_readability": <score>,
-        "cta_effectiveness": <score>,
-        "authenticity": <score>,
-        "relevance": <score>
-    }},
-    "justifications": {{
-        "personalization": "<justification>",
-        "goal_alignment": "<justification>",
-        "tone_appropriateness": "<justification>",
-        "clarity_readability": "<justification>",
-        "cta_effectiveness": "<justification>",
-        "authenticity": "<justification>",
-        "relevance": "<justification>"
-    }},
-    "expected_elements_present": {{
-        "element_1": true/false,
-        "element_2": true/false,
-        ...
-    }},
-    "overall_score": <weighted average of all scores>,
-    "overall_assessment": "<1-2 sentence summary>",
-    "strengths": ["<strength 1>", "<strength 2>", ...],
-    "improvements": ["<improvement 1>", "<improvement 2>", ...],
-    "recommendation": "<specific recommendation for improvement>"
-}}"""
+{EVALUATION_FORMAT}"""
         
         return prompt
         
+    def _build_batch_evaluation_prompt(
+        self,
+        items: List[Dict],
+        criteria: Dict
+    ) -> str:
+        """
+        Build one prompt that scores several messages.
+        
+        Args:
+            items: Dicts with 'message_id', 'message' and 'scenario'
+            criteria: Evaluation criteria applied to every message
+        """
+        sections = "\n\n".join(
+            f"""### MESSAGE {item['message_id']}
+
+#### Scenario Context
+
+{self._format_scenario_context(item['scenario'])}
+
+#### Message
+
+{item['message']}"""
+            for item in items
+        )
+        
+        return f"""You are an expert evaluator of outreach messages. Evaluate each of the following {len(items)} messages independently, based on its own scenario context and the shared criteria. Do not compare the messages with each other.
+
+## MESSAGES TO EVALUATE
+
+{sections}
+
+{self._format_criteria(criteria)}
+
+## EVALUATION TASK
+
+For each message, score every criterion (1-5) with a brief justification, check which expected elements are present, and give an overall assessment and recommendations for improvement.
+
+Return a single JSON object with one entry per message, in the order given:
+{{
+    "evaluations": [
+        {{
+            "message_id": "<message id as given above>",
+            ...all fields of the format below...
+        }}
+    ]
+}}
+
+Format of each evaluation:
+{EVALUATION_FORMAT}"""
+        
+    def _add_overall_score(self, evaluation: Dict) -> Dict:
+        """Calculate the overall score if the judge did not return one."""
+        if 'scores' in evaluation and 'overall_score' not in evaluation:
+            scores = evaluation['scores']
+            weights = {k: v['weight'] for k, v in self.evaluation_criteria.items()}
+            
+            weighted_sum = sum(
+                scores.get(criterion, 3) * weights.get(criterion, 0.1)
+                for criterion in scores
+            )
+            total_weight = sum(weights.values())
+            evaluation['overall_score'] = round(weighted_sum / total_weight, 2)
+            
+        return evaluation
+        
     def _parse_evaluation_response(self, response_text: str) -> Dict:
         """Parse the LLM evaluation response."""
         try:
@@ -219,19 +409,7 @@ Return your evaluation in the following JSON format:
                     'parsing_error': 'Could not extract JSON from response'
                 }
                 
-            # Calculate overall score if not present
-            if 'scores' in evaluation and 'overall_score' not in evaluation:
-                scores = evaluation['scores']
-                weights = {k: v['weight'] for k, v in self.evaluation_criteria.items()}
-                
-                weighted_sum = sum(
-                    scores.get(criterion, 3) * weights.get(criterion, 0.1)
-                    for criterion in scores
-                )
-                total_weight = sum(weights.values())
-                evaluation['overall_score'] = round(weighted_sum / total_weight, 2)
-                
-            return evaluation
+            return self._add_overall_score(evaluation)
             
         except Exception as e:
             logger.error(f"Error parsing evaluation response: {e}")
@@ -240,26 +418,62 @@ Return your evaluation in the following JSON format:
                 'raw_response': response_text[:500] + '...' if len(response_text) > 500 else response_text
             }
             
+    def _parse_batch_response(self, response_text: str, message_ids: List[str]) -> Dict[str, Dict]:
+        """
+        Parse a multi-message judge response into evaluations by message ID.
+        
+        Entries without a usable ID are matched by position. Messages missing
+        from the response are left out of the result.
+        """
+        try:
+            parsed = json.loads(repair_json_output(response_text))
+        except Exception as e:
+            logger.error(f"Error parsing batch evaluation response: {e}")
+            return {}
+            
+        if isinstance(parsed, dict):
+            entries = parsed.get('evaluations', [])
+        elif isinstance(parsed, list):
+            entries = parsed
+        else:
+            entries = []
+            
+        evaluations = {}
+        for position, entry in enumerate(entries):
+            if not isinstance(entry, dict) or 'scores' not in entry:
+                continue
+            message_id = str(entry.pop('message_id', ''))
+            if message_id not in message_ids and position < len(message_ids):
+                message_id = message_ids[position]
+            if message_id in message_ids and message_id not in evaluations:
+                evaluations[message_id] = self._add_overall_score(entry)
+        return evaluations
+        
     async def batch_evaluate(
         self,
         messages: List[Dict],
-        scenarios: List[Dict]
+        scenarios: List[Dict],
+        on_result: Optional[Callable[[Dict], None]] = None
     ) -> List[Dict]:
         """
         Evaluate multiple messages in batch.
         
+        Up to ``max_concurrency`` judge calls run at once, each scoring
+        ``batch_size`` messages. Cached evaluations are reused, and messages
+        a multi-message call fails to score are re-judged individually.
+        
         Args:
             messages: List of generated messages with metadata
             scenarios: Corresponding test scenarios
+            on_result: Called with each evaluation as soon as it completes
             
         Returns:
-            List of evaluation results
+            List of evaluation results, in the order of ``messages``
         """
-        evaluations = []
-        
         # Create scenario lookup
         scenario_map = {s['id']: s for s in scenarios}
         
+        items = []
         for message_data in messages:
             scenario_id = message_data.get('scenario_id')
             scenario = scenario_map.get(scenario_id)
@@ -268,21 +482,89 @@ Return your evaluation in the following JSON format:
                 logger.warning(f"No scenario found for ID: {scenario_id}")
                 continue
                 
-            # Evaluate the message
-            evaluation = await self.evaluate_message(
-                message_data.get('generated_message', ''),
-                scenario
-            )
+            items.append({
+                'message_id': str(len(items) + 1),
+                'message': message_data.get('generated_message', ''),
+                'scenario': scenario,
+                'data': message_data,
+            })
             
+        results: Dict[str, Dict] = {}
+        
+        def complete(item: Dict, evaluation: Dict):
             # Add generation metadata
-            evaluation['generation_time'] = message_data.get('generation_time', 0)
-            evaluation['timestamp'] = message_data.get('timestamp', '')
+            evaluation['generation_time'] = item['data'].get('generation_time', 0)
+            evaluation['timestamp'] = item['data'].get('timestamp', '')
+            results[item['message_id']] = evaluation
+            if on_result:
+                on_result(evaluation)
+                
+        pending = []
+        for item in items:
+            cached = self._cache.get(self._cache_key(item['message'], item['scenario']['id']))
+            if cached is not None:
+                complete(item, {**cached, 'cached': True})
+            else:
+                pending.append(item)
+        if len(pending) < len(items):
+            logger.info(f"Reusing {len(items) - len(pending)} cached evaluations")
             
-            evaluations.append(evaluation)
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        
+        async def evaluate_single(item: Dict):
+            async with semaphore:
+                evaluation = await self.evaluate_message(
+                    item['message'],
+                    item['scenario']
+                )
+            complete(item, evaluation)
+                
+        async def evaluate_group(group: List[Dict]):
+            async with semaphore:
+                evaluated = await self._evaluate_group(group)
+            for item in group:
+                if item['message_id'] in evaluated:
+                    complete(item, evaluated[item['message_id']])
+            # Fall back to one call per message for anything the judge skipped
+            missing = [item for item in group if item['message_id'] not in evaluated]
+            if missing:
+                logger.warning(f"Batch evaluation missed {len(missing)} messages, retrying individually")
+                await asyncio.gather(*(evaluate_single(item) for item in missing))
+                
+        if self.batch_size > 1:
+            groups = [
+                pending[i:i + self.batch_size]
+                for i in range(0, len(pending), self.batch_size)
+            ]
+            await asyncio.gather(*(
+                evaluate_group(group) if len(group) > 1 else evaluate_single(group[0])
+                for group in groups
+            ))
+        else:
+            await asyncio.gather(*(evaluate_single(item) for item in pending))
             
-            # Rate limiting
-            await asyncio.sleep(1)
+        return [results[item['message_id']] for item in items]
+        
+    async def _evaluate_group(self, group: List[Dict]) -> Dict[str, Dict]:
+        """Score several messages in one judge call; returns evaluations by message ID."""
+        prompt = self._build_batch_evaluation_prompt(group, self.evaluation_criteria)
+        try:
+            response = await self._ainvoke_with_backoff(prompt)
+        except Exception as e:
+            logger.error(f"Error during batch evaluation: {e}")
+            return {}
             
+        evaluations = self._parse_batch_response(
+            response.content,
+            [item['message_id'] for item in group]
+        )
+        for item in group:
+            evaluation = evaluations.get(item['message_id'])
+            if evaluation is None:
+                continue
+            evaluation['scenario_id'] = item['scenario']['id']
+            evaluation['use_case'] = item['scenario']['use_case']
+            self._store(self._cache_key(item['message'], item['scenario']['id']), evaluation)
         return evaluations
         
     def calculate_aggregate_scores(self, evaluations: List[Dict]) -> Dict:
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Logging Overhead Benchmark for Unghost Agent
+
+Measures the time logging adds to the request path for the three hot spots
+of a research step: a ``log_io`` tool call with large parameters and result,
+the Tavily raw-response log line and the agent input log line. The previous
+synchronous, eagerly formatted logging is compared with the queued pipeline
+in ``src.utils.log_pipeline``. Records are written to a temporary file.
+No LLM or network access is needed.
+"""
+
+import argparse
+import json
+import logging
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict
+
+# Add parent directory to path to import from src
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.tools.decorators import log_io
+from src.utils.log_pipeline import capped, setup_logging, shutdown_logging
+
+logger = logging.getLogger("src.benchmark.logging")
+
+
+def _payloads(size: int) -> Dict:
+    """Build a Tavily-like response, a crawl result and an agent input."""
+    results = [
+        {
+            "title": f"Result {i}",
+            "url": f"https://example.com/article/{i}",
+            "content": "lorem ipsum dolor sit amet " * 20,
+            "raw_content": "x" * (size // 5),
+        }
+        for i in range(5)
+    ]
+    return {
+        "tavily_response": {"query": "Sarah Chen TechCorp", "results": results},
+        "crawl_result": "# Page\n\n" + "Paragraph of crawled markdown. " * (size // 30),
+        "agent_input": {
+            "messages": [
+                {"role": "user", "content": "Existing findings. " * (size // 20)}
+            ]
+        },
+    }
+
+
+def legacy_log_io(func: Callable) -> Callable:
+    """The ``log_io`` decorator as it was before the logging pipeline."""
+
+    def wrapper(*args, **kwargs):
+        params = ", ".join(
+            [*(str(arg) for arg in args), *(f"{k}={v}" for k, v in kwargs.items())]
+        )
+        logger.info(f"Tool {func.__name__} called with parameters: {params}")
+        result = func(*args, **kwargs)
+        logger.info(f"Tool {func.__name__} returned: {result}")
+        return result
+
+    return wrapper
+
+
+def _step_legacy(payloads: Dict, tool: Callable):
+    tool(url="https://example.com/article/1")
+    data = payloads["tavily_response"]
+    logger.info(
+        f"[TAVILY] Raw response: {json.dumps(data, indent=2, ensure_ascii=False)}"
+    )
+    logger.info(f"Agent input: {payloads['agent_input']}")
+
+
+def _step_pipeline(payloads: Dict, tool: Callable):
+    tool(url="https://example.com/article/1")
+    logger.debug("[TAVILY] Raw response: %s", capped(payloads["tavily_response"]))
+    logger.debug("Agent input: %s", capped(payloads["agent_input"]))
+
+
+def measure(step: Callable, payloads: Dict, tool: Callable, iterations: int) -> Dict:
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        step(payloads, tool)
+        timings.append((time.perf_counter() - start) * 1e6)
+    timings.sort()
+    return {
+        "mean_us": statistics.mean(timings),
+        "p50_us": timings[len(timings) // 2],
+        "p99_us": timings[min(len(timings) - 1, int(len(timings) * 0.99))],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark request-path logging cost")
+    parser.add_argument(
+        "--iterations", type=int, default=500, help="Simulated steps per configuration"
+    )
+    parser.add_argument(
+        "--payload-size", type=int, default=50000, help="Approximate payload chars"
+    )
+    args = parser.parse_args()
+
+    payloads = _payloads(args.payload_size)
+
+    def crawl(url: str) -> str:
+        return payloads["crawl_result"]
+
+    print("\n" + "=" * 60)
+    print("📝 Logging Overhead Benchmark")
+    print("=" * 60)
+    print(f"Iterations: {args.iterations}, payload size: ~{args.payload_size} chars\n")
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        log_path = Path(tmp_dir) / "bench.log"
+
+        with open(log_path, "w") as stream:
+            logging.basicConfig(
+                level=logging.INFO,
+                format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+                stream=stream,
+                force=True,
+            )
+            results["legacy"] = measure(
+                _step_legacy, payloads, legacy_log_io(crawl), args.iterations
+            )
+            legacy_bytes = log_path.stat().st_size
+
+        for name, json_format in (("pipeline", False), ("pipeline_json", True)):
+            with open(log_path, "w") as stream:
+                setup_logging(
+                    level=logging.INFO, stream=stream, json_format=json_format
+                )
+                results[name] = measure(
+                    _step_pipeline, payloads, log_io(crawl), args.iterations
+                )
+                shutdown_logging()
+                stream.flush()
+                if name == "pipeline":
+                    pipeline_bytes = log_path.stat().st_size
+
+    print(f"{'':16}{'mean µs':>12}{'p50 µs':>12}{'p99 µs':>12}")
+    for name, stats in results.items():
+        print(
+            f"{name:16}{stats['mean_us']:>12.1f}"
+            f"{stats['p50_us']:>12.1f}{stats['p99_us']:>12.1f}"
+        )
+
+    speedup = results["legacy"]["mean_us"] / results["pipeline"]["mean_us"]
+    print(f"\n📦 Log volume: {legacy_bytes:,} -> {pipeline_bytes:,} bytes")
+    print(f"✅ Request-path logging overhead reduced {speedup:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+"""
+Hot-Path Micro-Benchmarks for Unghost Agent
+
+Times the functions that run on every request at realistic payload sizes:
+JSON repair of planner output, prompt rendering per agent, SSE event
+encoding, Tavily result dedup and markdown building, crawled article
+conversion, plan validation and the template summary.
+
+    python benchmark/micro_benchmark.py run --output current.json
+    python benchmark/micro_benchmark.py run --save-baseline
+    python benchmark/micro_benchmark.py compare current.json --threshold 0.15
+
+``compare`` exits with status 1 if any case is slower than the baseline by
+more than the threshold.
+"""
+
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+# Add parent directory to path to import from src
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+DEFAULT_BASELINE = Path(__file__).parent / "baselines" / "micro_baseline.json"
+
+_WORDS = (
+    "platform engineering developer productivity migration latency cloud "
+    "roadmap hiring keynote open source observability team scale growth"
+).split()
+
+
+def _prose(words: int, offset: int = 0) -> str:
+    return " ".join(_WORDS[(i * 7 + offset) % len(_WORDS)] for i in range(words))
+
+
+# Payloads
+
+
+def _plan_dict(steps: int = 5) -> Dict:
+    return {
+        "locale": "en-US",
+        "has_enough_context": False,
+        "thought": _prose(80),
+        "title": "Personalized Outreach Plan for Sarah Chen",
+        "selected_template_id": "T03",
+        "steps": [
+            {
+                "need_search": True,
+                "title": f"Step {i + 1}: {_prose(5, i)}",
+                "description": _prose(60, i),
+                "step_type": "persona_research" if i % 2 else "strategy_formulation",
+                "channels": ["email", "LinkedIn"],
+            }
+            for i in range(steps)
+        ],
+    }
+
+
+def _tavily_results(count: int = 10, raw_size: int = 5000) -> List[Dict]:
+    results = [
+        {
+            "title": f"Sarah Chen on {_prose(4, i)}",
+            "url": f"https://www.linkedin.com/posts/sarah-chen-{i}",
+            "content": _prose(120, i),
+            "raw_content": _prose(raw_size // 8, i),
+            "score": 0.9 - i * 0.05,
+            "author": "Sarah Chen",
+            "published_time": "2025-05-01T09:30:00",
+            "image_url": f"https://media.example.com/{i}.jpg" if i % 3 == 0 else None,
+        }
+        for i in range(count)
+    ]
+    # Tavily regularly returns the same page twice.
+    return results + results[:2]
+
+
+def _article_html(paragraphs: int = 60) -> str:
+    parts = ["<html><body><article><h1>Scaling developer platforms</h1>"]
+    for i in range(paragraphs):
+        parts.append(f"<h2>Section {i}</h2><p>{_prose(60, i)}</p>")
+        parts.append(f"<p><a href='/p/{i}'>Related post {i}</a></p>")
+        if i % 10 == 0:
+            parts.append(f"<img src='/images/{i}.png' alt='figure {i}'>")
+        if i % 15 == 0:
+            items = "".join(f"<li>{_prose(8, j)}</li>" for j in range(5))
+            parts.append(f"<ul>{items}</ul>")
+    parts.append("</article></body></html>")
+    return "".join(parts)
+
+
+def build_cases() -> List[Tuple[str, Callable[[], object]]]:
+    """Create the benchmark cases; imports happen here, outside the timings."""
+    from langchain_core.messages import AIMessage, HumanMessage
+
+    from src.config.configuration import Configuration
+    from src.crawler.article import Article
+    from src.prompts.planner_model import Plan
+    from src.prompts.template import apply_prompt_template
+    from src.server.app import _make_event
+    from src.tools.tavily_search.enhanced_tavily_wrapper import (
+        dedup_results,
+        format_results_markdown,
+    )
+    from src.utils.json_utils import repair_json_output
+    from src.utils.template_loader import TemplateLoader, template_loader
+
+    cases: List[Tuple[str, Callable[[], object]]] = []
+
+    plan = _plan_dict()
+    plan_json = json.dumps(plan, indent=2)
+    fenced_plan = f"```json\n{plan_json}\n```"
+    broken_plan = plan_json.rstrip("}\n ]") + ","  # truncated, trailing comma
+    cases += [
+        ("repair_json_output/fenced_plan", lambda: repair_json_output(fenced_plan)),
+        ("repair_json_output/broken_plan", lambda: repair_json_output(broken_plan)),
+        ("repair_json_output/plain_text", lambda: repair_json_output(_prose(400))),
+    ]
+
+    messages = [
+        HumanMessage(content="Write a LinkedIn message to Sarah Chen, CTO at TechCorp"),
+        AIMessage(content=_prose(200), name="planner"),
+        HumanMessage(content=_prose(600), name="researcher"),
+    ]
+    configurable = Configuration(
+        user_background="Founder of a developer tooling startup",
+        selected_template_id="T03",
+    )
+    summary = template_loader.get_templates_summary()
+    agents = ("coordinator", "planner", "researcher", "strategizer", "coder")
+    for agent in agents + ("reporter",):
+        state = {
+            "messages": messages,
+            "locale": "en-US",
+            "templates_summary": summary,
+            "user_background": configurable.user_background,
+        }
+        cases.append(
+            (
+                f"apply_prompt_template/{agent}",
+                lambda agent=agent, state=state: apply_prompt_template(
+                    agent, state, configurable
+                ),
+            )
+        )
+
+    chunk_event = {
+        "thread_id": "3f2b8c1e-1111-2222-3333-444455556666",
+        "agent": "reporter",
+        "id": "run-5f1c2d3e",
+        "role": "assistant",
+        "content": "personalized ",
+    }
+    tool_event = {
+        **chunk_event,
+        "agent": "researcher",
+        "tool_call_id": "call_abc123",
+        "content": json.dumps(_tavily_results(5, 2000)),
+    }
+    cases += [
+        (
+            "_make_event/message_chunk",
+            lambda: _make_event("message_chunk", dict(chunk_event)),
+        ),
+        (
+            "_make_event/tool_call_result",
+            lambda: _make_event("tool_call_result", dict(tool_event)),
+        ),
+    ]
+
+    results = _tavily_results()
+    deduped = dedup_results(results)
+    cases += [
+        ("dedup_results/12_results", lambda: dedup_results(results)),
+        (
+            "format_results_markdown/10_results",
+            lambda: format_results_markdown(deduped),
+        ),
+    ]
+
+    article = Article("Scaling developer platforms", _article_html())
+    article.url = "https://engineering.example.com/posts/scaling"
+    cases += [
+        ("Article.to_markdown/60_paragraphs", article.to_markdown),
+        ("Article.to_message/60_paragraphs", article.to_message),
+    ]
+
+    cases.append(("Plan.model_validate/5_steps", lambda: Plan.model_validate(plan)))
+
+    cases += [
+        ("TemplateLoader.get_templates_summary", template_loader.get_templates_summary),
+        # planner_node builds a new loader on every call
+        (
+            "TemplateLoader().get_templates_summary",
+            lambda: TemplateLoader().get_templates_summary(),
+        ),
+    ]
+    return cases
+
+
+def measure(fn: Callable[[], object], repeats: int, min_time: float) -> Dict:
+    """Time ``fn`` like timeit: calibrate loops, then take ``repeats`` samples."""
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            break
+        loops *= 2 if elapsed == 0 else max(2, min(10, int(min_time / elapsed) + 1))
+
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        samples.append((time.perf_counter() - start) / loops * 1e6)
+    return {
+        "median_us": statistics.median(samples),
+        "min_us": min(samples),
+        "stdev_us": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        "loops": loops,
+    }
+
+
+def run(args) -> int:
+    import logging
+
+    # Template loading logs on every call; keep the output readable.
+    logging.disable(logging.INFO)
+
+    print("\n" + "=" * 60)
+    print("⏱️  Hot-Path Micro-Benchmarks")
+    print("=" * 60 + "\n")
+
+    results = {}
+    for name, fn in build_cases():
+        if args.filter and args.filter not in name:
+            continue
+        stats = measure(fn, args.repeats, args.min_time)
+        results[name] = stats
+        print(f"{name:45}{stats['median_us']:>12.1f} µs  (±{stats['stdev_us']:.1f})")
+
+    report = {
+        "metadata": {
+            "timestamp": datetime.now().isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "results": results,
+    }
+    output = DEFAULT_BASELINE if args.save_baseline else args.output
+    if output:
+        output = Path(output)
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps(report, indent=2))
+        print(f"\n💾 Saved results to {output}")
+    return 0
+
+
+def compare(args) -> int:
+    baseline = json.loads(Path(args.baseline).read_text())["results"]
+    current = json.loads(Path(args.current).read_text())["results"]
+
+    print("\n" + "=" * 60)
+    print("📊 Micro-Benchmark Comparison")
+    print("=" * 60)
+    print(f"{'case':45}{'baseline':>12}{'current':>12}{'change':>10}")
+
+    regressions = []
+    for name, stats in current.items():
+        if name not in baseline:
+            print(f"{name:45}{'-':>12}{stats['median_us']:>12.1f}{'new':>10}")
+            continue
+        before = baseline[name]["median_us"]
+        change = stats["median_us"] / before - 1 if before else 0.0
+        flag = ""
+        if change > args.threshold:
+            regressions.append(name)
+            flag = "  ❌"
+        elif change < -args.threshold:
+            flag = "  🚀"
+        print(
+            f"{name:45}{before:>12.1f}{stats['median_us']:>12.1f}{change:>+10.1%}{flag}"
+        )
+
+    if regressions:
+        print(f"\n❌ {len(regressions)} regression(s) above {args.threshold:.0%}:")
+        for name in regressions:
+            print(f"   - {name}")
+        return 1
+    print(f"\n✅ No regressions above {args.threshold:.0%}")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Hot-path micro-benchmarks")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="Run the benchmarks")
+    run_parser.add_argument("--output", help="Write results to this JSON file")
+    run_parser.add_argument(
+        "--save-baseline",
+        action="store_true",
+        help=f"Write results to the baseline file ({DEFAULT_BASELINE.name})",
+    )
+    run_parser.add_argument("--filter", help="Only run cases containing this text")
+    run_parser.add_argument("--repeats", type=int, default=7, help="Samples per case")
+    run_parser.add_argument(
+        "--min-time", type=float, default=0.2, help="Minimum seconds per sample"
+    )
+
+    compare_parser = subparsers.add_parser("compare", help="Compare against a baseline")
+    compare_parser.add_argument("current", help="Results JSON from 'run --output'")
+    compare_parser.add_argument(
+        "--baseline", default=str(DEFAULT_BASELINE), help="Baseline results JSON"
+    )
+    compare_parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.10,
+        help="Relative slowdown flagged as a regression (default: 0.10)",
+    )
+
+    args = parser.parse_args()
+    sys.exit(run(args) if args.command == "run" else compare(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Tavily Payload Size Benchmark for Unghost Agent
+
+Compares what the search tools put into the agent's context in full and lean
+payload mode (``TAVILY_PAYLOAD_MODE``): bytes and tokens of the tool result,
+and bytes of the Tavily response, which no longer includes images in lean
+mode. Page texts are synthetic unless a recorded Tavily response is given.
+
+    python benchmark/payload_benchmark.py --results 10 --raw-size 5000
+    python benchmark/payload_benchmark.py --response tavily_response.json
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Dict
+
+# Add parent directory to path to import from src
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.tools.tavily_search.enhanced_tavily_wrapper import build_agent_results
+from src.tools.tavily_search.tavily_search_api_wrapper import (
+    EnhancedTavilySearchAPIWrapper,
+)
+from src.utils.context_assembler import count_tokens
+
+_WORDS = (
+    "platform engineering developer productivity migration latency cloud "
+    "roadmap hiring keynote open source observability team scale growth"
+).split()
+
+
+def _prose(words: int, offset: int = 0) -> str:
+    return " ".join(_WORDS[(i * 7 + offset) % len(_WORDS)] for i in range(words))
+
+
+def synthetic_response(count: int, raw_size: int) -> Dict:
+    """A Tavily response with snippets, raw page texts and images."""
+    return {
+        "query": "Sarah Chen platform engineering",
+        "results": [
+            {
+                "title": f"Sarah Chen on {_prose(4, i)}",
+                "url": f"https://www.linkedin.com/posts/sarah-chen-{i}",
+                "content": _prose(120, i),
+                "raw_content": _prose(raw_size // 8, i),
+                "score": 0.9 - i * 0.05,
+                "image_url": (
+                    f"https://media.example.com/{i}.jpg" if i % 3 == 0 else None
+                ),
+            }
+            for i in range(count)
+        ],
+        "images": [
+            {
+                "url": f"https://media.example.com/gallery/{i}.jpg",
+                "description": _prose(25, i),
+            }
+            for i in range(count)
+        ],
+    }
+
+
+def _measure(payload) -> Dict:
+    text = json.dumps(payload, ensure_ascii=False)
+    return {"bytes": len(text.encode("utf-8")), "tokens": count_tokens(text)}
+
+
+def measure(response: Dict) -> Dict:
+    """Sizes of each tool's result and of the response, in both modes."""
+    wrapper = EnhancedTavilySearchAPIWrapper.model_construct()
+    lean_response = {k: v for k, v in response.items() if k != "images"}
+    return {
+        "response": {
+            "full": _measure(response),
+            "lean": _measure(lean_response),
+        },
+        "web_search": {
+            "full": _measure(wrapper.clean_results_with_images(response, lean=False)),
+            "lean": _measure(
+                wrapper.clean_results_with_images(lean_response, lean=True)
+            ),
+        },
+        "outreach_search": {
+            "full": _measure(build_agent_results(response["results"], lean=False)),
+            "lean": _measure(build_agent_results(response["results"], lean=True)),
+        },
+    }
+
+
+def _reduction(full: int, lean: int) -> str:
+    return f"{(1 - lean / full) * 100:5.1f}%" if full else "    -"
+
+
+def print_report(sizes: Dict):
+    print(
+        f"{'payload':<18} {'full bytes':>11} {'lean bytes':>11} {'saved':>7} "
+        f"{'full tok':>9} {'lean tok':>9} {'saved':>7}"
+    )
+    for name, modes in sizes.items():
+        full, lean = modes["full"], modes["lean"]
+        print(
+            f"{name:<18} {full['bytes']:>11,} {lean['bytes']:>11,} "
+            f"{_reduction(full['bytes'], lean['bytes']):>7} "
+            f"{full['tokens']:>9,} {lean['tokens']:>9,} "
+            f"{_reduction(full['tokens'], lean['tokens']):>7}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tavily payload size benchmark")
+    parser.add_argument(
+        "--response", help="A recorded Tavily search response (JSON) to measure"
+    )
+    parser.add_argument(
+        "--results", type=int, default=10, help="Synthetic results per search"
+    )
+    parser.add_argument(
+        "--raw-size", type=int, default=5000, help="Synthetic raw page size (chars)"
+    )
+    parser.add_argument("--output", help="Write the sizes to this JSON file")
+    args = parser.parse_args()
+
+    if args.response:
+        response = json.loads(Path(args.response).read_text(encoding="utf-8"))
+        print(f"📄 Measuring {args.response}")
+    else:
+        response = synthetic_response(args.results, args.raw_size)
+        print(
+            f"🧪 Measuring {args.results} synthetic results "
+            f"of {args.raw_size:,} raw chars"
+        )
+
+    sizes = measure(response)
+    print_report(sizes)
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(sizes, indent=2), encoding="utf-8")
+        print(f"💾 Sizes saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
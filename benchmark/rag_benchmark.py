@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Local RAG Benchmark for Unghost Agent
+
+Ingests a synthetic corpus into the local RAG index (src/rag/local.py) and
+measures ingestion throughput, index size, load time and query latency for
+dense and hybrid (dense + BM25) search, over all chunks and over a few
+selected documents. Each query is a few words of one chunk; the hit rate is
+how often that chunk is among the top k.
+
+    python benchmark/rag_benchmark.py --chunks 100000 --queries 200
+"""
+
+import argparse
+import json
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+
+# Add parent directory to path to import from src
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.rag.embedder import HashingEmbedder
+from src.rag.local import LocalIndex
+
+
+def synthetic_corpus(
+    chunks: int, documents: int, words_per_chunk: int, seed: int = 0
+) -> tuple[List[dict], List[List[str]]]:
+    """Documents of chunks with Zipf-distributed words from a 50k vocabulary."""
+    rng = np.random.default_rng(seed)
+    syllables = ["ka", "lo", "mi", "ren", "tas", "vu", "zen", "pra", "del", "os"]
+    vocabulary = np.array(
+        [
+            "".join(syllables[(i // 10**p) % 10] for p in range(5))[: 4 + i % 7]
+            + str(i)
+            for i in range(50_000)
+        ]
+    )
+    ranks = np.minimum(rng.zipf(1.2, size=chunks * words_per_chunk), 50_000) - 1
+    words = vocabulary[ranks].reshape(chunks, words_per_chunk)
+    texts = [" ".join(row) for row in words]
+
+    per_document = max(1, chunks // documents)
+    document_list, chunk_lists = [], []
+    for start in range(0, chunks, per_document):
+        document_list.append(
+            {
+                "id": f"doc-{len(document_list)}.md",
+                "title": f"Document {len(document_list)}",
+                "mtime": 0,
+                "size": 0,
+            }
+        )
+        chunk_lists.append(texts[start : start + per_document])
+    return document_list, chunk_lists
+
+
+def _latency_stats(samples: List[float]) -> Dict:
+    ordered = sorted(samples)
+    return {
+        "p50_ms": statistics.median(ordered) * 1000,
+        "p95_ms": ordered[int(len(ordered) * 0.95) - 1] * 1000,
+        "p99_ms": ordered[max(int(len(ordered) * 0.99) - 1, 0)] * 1000,
+    }
+
+
+def run(args) -> Dict:
+    index_dir = Path(args.index_dir or tempfile.mkdtemp(prefix="local_rag_"))
+    documents, chunk_lists = synthetic_corpus(
+        args.chunks, args.documents, args.words_per_chunk
+    )
+    embedder = HashingEmbedder(args.dim)
+    print(f"🧪 {args.chunks:,} chunks in {len(documents):,} documents → {index_dir}")
+
+    started = time.perf_counter()
+    LocalIndex(index_dir, embedder).write(documents, chunk_lists)
+    ingest_seconds = time.perf_counter() - started
+    size = sum(f.stat().st_size for f in index_dir.iterdir() if f.is_file())
+
+    started = time.perf_counter()
+    index = LocalIndex(index_dir, HashingEmbedder(args.dim))
+    load_seconds = time.perf_counter() - started
+
+    rng = np.random.default_rng(1)
+    targets = rng.integers(0, len(index), size=args.queries)
+    queries = []
+    for row in targets:
+        words = index.chunk(int(row)).split()
+        start = rng.integers(0, max(1, len(words) - 6))
+        queries.append(" ".join(words[start : start + 5]))
+    subset = {d["id"] for d in index.documents[:10]}
+
+    results = {
+        "chunks": len(index),
+        "documents": len(index.documents),
+        "dim": args.dim,
+        "ingest_seconds": ingest_seconds,
+        "chunks_per_second": len(index) / ingest_seconds,
+        "index_bytes": size,
+        "load_seconds": load_seconds,
+        "queries": {},
+    }
+    cases = [
+        ("dense", None, 0.0),
+        ("hybrid", None, args.hybrid_weight),
+        ("hybrid_10_documents", subset, args.hybrid_weight),
+    ]
+    for name, document_ids, weight in cases:
+        index.search(queries[0], document_ids, args.top_k, weight)  # warm up
+        samples, hits = [], 0
+        for query, row in zip(queries, targets):
+            started = time.perf_counter()
+            found = index.search(query, document_ids, args.top_k, weight)
+            samples.append(time.perf_counter() - started)
+            hits += any(r == row for r, _ in found)
+        results["queries"][name] = {
+            **_latency_stats(samples),
+            "hit_rate": hits / len(queries) if document_ids is None else None,
+        }
+
+    if not args.index_dir:
+        shutil.rmtree(index_dir, ignore_errors=True)
+    return results
+
+
+def print_report(results: Dict):
+    print(
+        f"📥 Ingestion: {results['ingest_seconds']:.1f}s "
+        f"({results['chunks_per_second']:,.0f} chunks/s), "
+        f"index {results['index_bytes'] / 1024 / 1024:.1f} MB, "
+        f"load {results['load_seconds'] * 1000:.0f} ms"
+    )
+    print(f"{'query':<22} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'hit rate':>9}")
+    for name, stats in results["queries"].items():
+        hit_rate = f"{stats['hit_rate']:.1%}" if stats["hit_rate"] is not None else "-"
+        print(
+            f"{name:<22} {stats['p50_ms']:>8.2f} {stats['p95_ms']:>8.2f} "
+            f"{stats['p99_ms']:>8.2f} {hit_rate:>9}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local RAG benchmark")
+    parser.add_argument("--chunks", type=int, default=100_000, help="Corpus size")
+    parser.add_argument("--documents", type=int, default=1000, help="Documents")
+    parser.add_argument(
+        "--words-per-chunk", type=int, default=150, help="Words per chunk"
+    )
+    parser.add_argument("--dim", type=int, default=256, help="Embedding dimensions")
+    parser.add_argument("--queries", type=int, default=200, help="Queries per case")
+    parser.add_argument("--top-k", type=int, default=10, help="Chunks per query")
+    parser.add_argument(
+        "--hybrid-weight", type=float, default=0.3, help="BM25 weight in hybrid mode"
+    )
+    parser.add_argument(
+        "--index-dir", help="Keep the index in this directory (default: temporary)"
+    )
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    args = parser.parse_args()
+
+    results = run(args)
+    print_report(results)
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2), encoding="utf-8")
+        print(f"💾 Results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -14,6 +14,12 @@ from pathlib import Path
 class BenchmarkReportGenerator:
     """Generate reports from benchmark results."""
     
+    LOAD_METRICS = [
+        ('ttfe', 'First SSE Event'),
+        ('ttft', 'First Message Chunk'),
+        ('total', 'Total'),
+    ]
+    
     def generate_markdown_report(self, results: Dict) -> str:
         """Generate a comprehensive markdown report."""
         report = []
@@ -59,6 +65,10 @@ class BenchmarkReportGenerator:
         
         report.append("")
         
+        # Load Test
+        if results.get('load_test'):
+            report.extend(self._load_test_markdown(results['load_test']))
+        
         # Aggregate Scores by Criteria
         if 'aggregate_scores' in results and 'criteria_averages' in results['aggregate_scores']:
             report.append("## Evaluation Criteria Scores")
@@ -270,6 +280,10 @@ class BenchmarkReportGenerator:
         
         html.append("</div>")
         
+        # Load Test
+        if results.get('load_test'):
+            html.extend(self._load_test_html(results['load_test']))
+        
         # Criteria Scores Table
         if 'aggregate_scores' in results and 'criteria_averages' in results['aggregate_scores']:
             html.append("<h2>Evaluation Criteria Scores</h2>")
@@ -310,6 +324,51 @@ class BenchmarkReportGenerator:
         
         return "\n".join(html)
         
+    def _load_test_markdown(self, load: Dict) -> List[str]:
+        """Render the load test section as markdown lines."""
+        config = load.get('config', {})
+        if config.get('mode') == 'open':
+            shape = f"open loop, {config.get('rate')} req/s"
+        else:
+            shape = f"closed loop, {config.get('concurrency')} clients"
+        
+        lines = ["## Load Test", ""]
+        lines.append(f"- **Load Shape:** {shape} for {config.get('duration', 0):.0f} seconds")
+        lines.append(f"- **Requests:** {load['requests']}")
+        lines.append(f"- **Error Rate:** {load['error_rate'] * 100:.1f}% ({load['errors']} errors)")
+        lines.append(f"- **Throughput:** {load['throughput_rps']:.2f} requests/second")
+        lines.append("")
+        lines.append("| Latency | p50 | p95 | p99 | Mean |")
+        lines.append("|---------|-----|-----|-----|------|")
+        for metric, label in self.LOAD_METRICS:
+            stats = load['latency'].get(metric, {})
+            if stats.get('count'):
+                lines.append(
+                    f"| {label} | {stats['p50']:.2f}s | {stats['p95']:.2f}s "
+                    f"| {stats['p99']:.2f}s | {stats['mean']:.2f}s |"
+                )
+        lines.append("")
+        return lines
+        
+    def _load_test_html(self, load: Dict) -> List[str]:
+        """Render the load test section as HTML lines."""
+        html = ["<h2>Load Test</h2>", '<div class="metric-card">']
+        html.append(f"<p><strong>Requests:</strong> {load['requests']}</p>")
+        html.append(f"<p><strong>Error Rate:</strong> {load['error_rate'] * 100:.1f}%</p>")
+        html.append(f"<p><strong>Throughput:</strong> {load['throughput_rps']:.2f} requests/second</p>")
+        html.append("</div>")
+        html.append("<table>")
+        html.append("<tr><th>Latency</th><th>p50</th><th>p95</th><th>p99</th><th>Mean</th></tr>")
+        for metric, label in self.LOAD_METRICS:
+            stats = load['latency'].get(metric, {})
+            if stats.get('count'):
+                html.append(
+                    f"<tr><td>{label}</td><td>{stats['p50']:.2f}s</td><td>{stats['p95']:.2f}s</td>"
+                    f"<td>{stats['p99']:.2f}s</td><td>{stats['mean']:.2f}s</td></tr>"
+                )
+        html.append("</table>")
+        return html
+        
     def _percentage(self, part: int, whole: int) -> float:
         """Calculate percentage."""
         if whole == 0:
@@ -16,6 +16,12 @@ import html as html_module
 class EnhancedBenchmarkReportGenerator:
     """Generate enhanced reports from benchmark results."""
     
+    LOAD_METRICS = [
+        ('ttfe', 'First SSE Event'),
+        ('ttft', 'First Message Chunk'),
+        ('total', 'Total'),
+    ]
+    
     def generate_markdown_report(self, results: Dict) -> str:
         """Generate a comprehensive markdown report with request/response details."""
         report = []
@@ -70,6 +76,10 @@ class EnhancedBenchmarkReportGenerator:
         
         report.append("")
         
+        # Load Test
+        if results.get('load_test'):
+            report.extend(self._load_test_markdown(results['load_test']))
+        
         # API Request Configuration
         report.append("## 🔧 API Request Configuration")
         report.append("")
@@ -584,6 +594,10 @@ class EnhancedBenchmarkReportGenerator:
         
         html.append('</div>') # Close metric-grid
         
+        # Load Test
+        if results.get('load_test'):
+            html.extend(self._load_test_html(results['load_test']))
+        
         # Evaluation Criteria Scores
         if 'aggregate_scores' in results and 'criteria_averages' in results['aggregate_scores']:
             html.append("<h2>📊 Evaluation Criteria Analysis</h2>")
@@ -687,6 +701,63 @@ class EnhancedBenchmarkReportGenerator:
         
         return "\n".join(html)
     
+    def _load_test_markdown(self, load: Dict) -> List[str]:
+        """Render the load test section as markdown lines."""
+        config = load.get('config', {})
+        if config.get('mode') == 'open':
+            shape = f"open loop, {config.get('rate')} req/s"
+        else:
+            shape = f"closed loop, {config.get('concurrency')} clients"
+        
+        error_rate = load['error_rate'] * 100
+        error_emoji = "✅" if error_rate < 1 else "⚠️" if error_rate < 5 else "❌"
+        
+        lines = ["## 🏋️ Load Test", ""]
+        lines.append(f"**Load Shape:** {shape} for {config.get('duration', 0):.0f} seconds")
+        lines.append("")
+        lines.append("| Metric | Value | Status |")
+        lines.append("|--------|-------|--------|")
+        lines.append(f"| Requests | {load['requests']} | |")
+        lines.append(f"| Error Rate | {error_rate:.1f}% | {error_emoji} |")
+        lines.append(f"| Throughput | {load['throughput_rps']:.2f} req/s | |")
+        lines.append("")
+        lines.append("| Latency | p50 | p95 | p99 | Mean |")
+        lines.append("|---------|-----|-----|-----|------|")
+        for metric, label in self.LOAD_METRICS:
+            stats = load['latency'].get(metric, {})
+            if stats.get('count'):
+                lines.append(
+                    f"| {label} | {stats['p50']:.2f}s | {stats['p95']:.2f}s "
+                    f"| {stats['p99']:.2f}s | {stats['mean']:.2f}s |"
+                )
+        lines.append("")
+        return lines
+    
+    def _load_test_html(self, load: Dict) -> List[str]:
+        """Render the load test section as HTML lines."""
+        html = ["<h2>🏋️ Load Test</h2>", '<div class="metric-grid">']
+        for label, value in (
+            ("Requests", f"{load['requests']}"),
+            ("Error Rate", f"{load['error_rate'] * 100:.1f}%"),
+            ("Throughput", f"{load['throughput_rps']:.2f}/s"),
+        ):
+            html.append('<div class="metric-box">')
+            html.append(f'<div class="metric-label">{label}</div>')
+            html.append(f'<div class="metric-value">{value}</div>')
+            html.append('</div>')
+        html.append('</div>')
+        html.append("<table>")
+        html.append("<tr><th>Latency</th><th>p50</th><th>p95</th><th>p99</th><th>Mean</th></tr>")
+        for metric, label in self.LOAD_METRICS:
+            stats = load['latency'].get(metric, {})
+            if stats.get('count'):
+                html.append(
+                    f"<tr><td>{label}</td><td>{stats['p50']:.2f}s</td><td>{stats['p95']:.2f}s</td>"
+                    f"<td>{stats['p99']:.2f}s</td><td>{stats['mean']:.2f}s</td></tr>"
+                )
+        html.append("</table>")
+        return html
+    
     def _percentage(self, part: int, whole: int) -> float:
         """Calculate percentage."""
         if whole == 0:
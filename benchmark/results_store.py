@@ -0,0 +1,477 @@
+#!/usr/bin/env python3
+"""
+Append-Only Benchmark Results Store
+
+Benchmark runs write one flat record per generation, evaluation or template
+test as soon as it completes, so results survive interrupted runs and no run
+has to be held in memory. Every run gets a directory with a ``meta.json``
+and a ``records.jsonl`` file; ``runs.jsonl`` indexes the runs with their git
+commit so results can be tracked across commits.
+
+    store/
+      runs.jsonl
+      <run_id>/meta.json
+      <run_id>/records.jsonl
+
+The ``report`` command streams a markdown or HTML report of a run record by
+record and compares its latency and score distributions with a baseline run.
+``export`` converts a run to Parquet with pandas (requires pyarrow).
+
+    python benchmark/results_store.py list
+    python benchmark/results_store.py report latest --baseline 20250101_120000_ab12cd3
+    python benchmark/results_store.py export latest
+"""
+
+import argparse
+import html
+import json
+import logging
+import statistics
+import subprocess
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, TextIO
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STORE = Path(__file__).parent / "benchmark_results" / "store"
+
+# Fields of a generation/evaluation kept in the store; large fields such as
+# the full response and the SSE trace are saved elsewhere.
+_RECORD_FIELDS = (
+    "scenario_id",
+    "use_case",
+    "template_id",
+    "expected_tone",
+    "generation_time",
+    "overall_score",
+    "average_score",
+    "error",
+    "parsing_error",
+    "cached",
+    "generated_message",
+    "timestamp",
+)
+
+# Numeric fields compared between runs, besides the per-criterion scores.
+_METRICS = ("generation_time", "ttft", "overall_score", "average_score")
+_LATENCY_METRICS = ("generation_time", "ttft")
+
+# Relative change of a latency percentile, or absolute drop of a mean score,
+# reported as a regression.
+LATENCY_THRESHOLD = 0.10
+SCORE_THRESHOLD = 0.2
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=Path(__file__).parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def flatten_record(kind: str, data: Dict) -> Dict:
+    """Turn a generation, evaluation or template test into a flat record."""
+    record = {"kind": kind}
+    for field in _RECORD_FIELDS:
+        if data.get(field) is not None:
+            record[field] = data[field]
+    for criterion, score in (data.get("scores") or {}).items():
+        record[f"score_{criterion}"] = score
+    for criterion, score in (data.get("criteria_scores") or {}).items():
+        record[f"score_{criterion}"] = score
+    summary = data.get("trace_summary")
+    if summary:
+        record["events"] = summary["events"]
+        record["bytes"] = summary["bytes"]
+        if summary.get("ttft") is not None:
+            record["ttft"] = summary["ttft"]
+    return record
+
+
+class ResultsRun:
+    """Writer of a single run; records are flushed as they are appended."""
+
+    def __init__(self, directory: Path, meta: Dict):
+        self.directory = directory
+        self.meta = meta
+        self.run_id = meta["run_id"]
+        self._file = open(directory / "records.jsonl", "a", encoding="utf-8")
+        self.count = 0
+
+    def append(self, kind: str, data: Dict):
+        record = flatten_record(kind, data)
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._file.flush()
+        self.count += 1
+
+    def close(self, **summary):
+        """Close the run and record its end time and summary in ``meta.json``."""
+        self._file.close()
+        self.meta.update(
+            end_time=datetime.now().isoformat(), records=self.count, **summary
+        )
+        with open(self.directory / "meta.json", "w", encoding="utf-8") as f:
+            json.dump(self.meta, f, indent=2, ensure_ascii=False)
+
+
+class ResultsStore:
+    """Directory of append-only benchmark runs."""
+
+    def __init__(self, root: str | Path = DEFAULT_STORE):
+        self.root = Path(root)
+
+    def start_run(self, benchmark: str, **meta) -> ResultsRun:
+        """Create a new run; extra keyword arguments are stored as metadata."""
+        commit = _git_commit()
+        run_id = datetime.now().strftime("%Y%m%d_%H%M%S")
+        if commit:
+            run_id = f"{run_id}_{commit}"
+        directory = self.root / run_id
+        directory.mkdir(parents=True, exist_ok=True)
+        meta = {
+            "run_id": run_id,
+            "benchmark": benchmark,
+            "git_commit": commit,
+            "start_time": datetime.now().isoformat(),
+            **meta,
+        }
+        with open(directory / "meta.json", "w", encoding="utf-8") as f:
+            json.dump(meta, f, indent=2, ensure_ascii=False)
+        with open(self.root / "runs.jsonl", "a", encoding="utf-8") as f:
+            f.write(
+                json.dumps(
+                    {
+                        k: meta[k]
+                        for k in ("run_id", "benchmark", "git_commit", "start_time")
+                    }
+                )
+                + "\n"
+            )
+        logger.info(f"Recording benchmark run {run_id} in {directory}")
+        return ResultsRun(directory, meta)
+
+    def runs(self) -> List[Dict]:
+        """Metadata of all runs, oldest first."""
+        index = self.root / "runs.jsonl"
+        if not index.exists():
+            return []
+        with open(index, "r", encoding="utf-8") as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    def resolve(self, run_id: str) -> str:
+        """Resolve ``latest``, ``previous`` or a run ID prefix to a run ID."""
+        run_ids = [run["run_id"] for run in self.runs()]
+        if run_id in ("latest", "previous"):
+            offset = 1 if run_id == "latest" else 2
+            if len(run_ids) < offset:
+                raise ValueError(f"No {run_id} run in {self.root}")
+            return run_ids[-offset]
+        matches = [r for r in run_ids if r.startswith(run_id)]
+        if len(matches) != 1:
+            raise ValueError(
+                f"Run {run_id!r} matches {len(matches)} runs in {self.root}"
+            )
+        return matches[0]
+
+    def meta(self, run_id: str) -> Dict:
+        with open(self.root / run_id / "meta.json", "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def records(self, run_id: str, kind: Optional[str] = None) -> Iterator[Dict]:
+        """Iterate over the records of a run without loading it into memory."""
+        with open(self.root / run_id / "records.jsonl", "r", encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                if kind is None or record["kind"] == kind:
+                    yield record
+
+    def export_parquet(self, run_id: str) -> Path:
+        """Write the records of a run to ``records.parquet``."""
+        import pandas as pd
+
+        path = self.root / run_id / "records.parquet"
+        pd.DataFrame.from_records(self.records(run_id)).to_parquet(path, index=False)
+        return path
+
+
+class Distributions:
+    """Latency and score samples of a run, collected while streaming."""
+
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = {}
+        self.records = 0
+        self.errors = 0
+
+    def add(self, record: Dict):
+        self.records += 1
+        if record.get("error") or record.get("parsing_error"):
+            self.errors += 1
+            return
+        for key, value in record.items():
+            if key not in _METRICS and not key.startswith("score_"):
+                continue
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                self.samples.setdefault(key, []).append(float(value))
+
+    def stats(self, key: str) -> Optional[Dict]:
+        values = sorted(self.samples.get(key, []))
+        if not values:
+            return None
+
+        def percentile(pct: float) -> float:
+            return values[
+                min(len(values) - 1, int(round((len(values) - 1) * pct / 100)))
+            ]
+
+        return {
+            "count": len(values),
+            "mean": statistics.mean(values),
+            "p50": percentile(50),
+            "p95": percentile(95),
+        }
+
+
+def compare_distributions(
+    current: Distributions, baseline: Distributions
+) -> List[Dict]:
+    """Compare two runs: latency on p50 and p95, scores on the mean."""
+    rows = []
+    for key in sorted(set(current.samples) | set(baseline.samples)):
+        now, before = current.stats(key), baseline.stats(key)
+        if now is None or before is None:
+            continue
+        latency = key in _LATENCY_METRICS
+        for stat in ("p50", "p95") if latency else ("mean",):
+            delta = now[stat] - before[stat]
+            if latency:
+                regression = (
+                    before[stat] > 0 and delta / before[stat] > LATENCY_THRESHOLD
+                )
+            else:
+                regression = delta < -SCORE_THRESHOLD
+            rows.append(
+                {
+                    "metric": f"{key} {stat}",
+                    "baseline": before[stat],
+                    "current": now[stat],
+                    "delta": delta,
+                    "regression": regression,
+                }
+            )
+    return rows
+
+
+def _preview(text: Optional[str], length: int = 80) -> str:
+    text = " ".join((text or "").split())
+    return text[:length] + "..." if len(text) > length else text
+
+
+_HTML_HEAD = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>{title}</title><style>
+body {{ font-family: sans-serif; margin: 2em; }}
+table {{ border-collapse: collapse; }}
+td, th {{ border: 1px solid #ddd; padding: 4px 8px; }}
+.regression {{ color: #c0392b; font-weight: bold; }}
+</style></head><body>
+"""
+
+
+class _ReportWriter:
+    """Writes headings, paragraphs and tables as markdown or HTML."""
+
+    def __init__(self, out: TextIO, fmt: str):
+        self.out = out
+        self.html = fmt == "html"
+
+    def _escape(self, value) -> str:
+        text = str(value)
+        return html.escape(text) if self.html else text.replace("|", "\\|")
+
+    def start(self, title: str):
+        if self.html:
+            self.out.write(_HTML_HEAD.format(title=html.escape(title)))
+        self.heading(title, 1)
+
+    def heading(self, text: str, level: int = 2):
+        if self.html:
+            self.out.write(f"<h{level}>{html.escape(text)}</h{level}>\n")
+        else:
+            self.out.write(f"{'#' * level} {text}\n\n")
+
+    def paragraph(self, text: str):
+        if self.html:
+            self.out.write(f"<p>{html.escape(text)}</p>\n")
+        else:
+            self.out.write(f"{text}\n\n")
+
+    def table(self, headers: List[str]):
+        if self.html:
+            cells = "".join(f"<th>{html.escape(h)}</th>" for h in headers)
+            self.out.write(f"<table><tr>{cells}</tr>\n")
+        else:
+            self.out.write("| " + " | ".join(headers) + " |\n")
+            self.out.write("|" + "|".join("---" for _ in headers) + "|\n")
+
+    def row(self, cells: List, highlight: bool = False):
+        if self.html:
+            css = ' class="regression"' if highlight else ""
+            values = "".join(f"<td>{self._escape(c)}</td>" for c in cells)
+            self.out.write(f"<tr{css}>{values}</tr>\n")
+        else:
+            values = [self._escape(c) for c in cells]
+            if highlight:
+                values[-1] += " ❌"
+            self.out.write("| " + " | ".join(values) + " |\n")
+
+    def end_table(self):
+        self.out.write("</table>\n" if self.html else "\n")
+
+    def finish(self):
+        if self.html:
+            self.out.write("</body></html>\n")
+
+
+def write_report(
+    store: ResultsStore,
+    run_id: str,
+    out: TextIO,
+    baseline_id: Optional[str] = None,
+    fmt: str = "markdown",
+) -> List[Dict]:
+    """
+    Stream a report of a run to ``out``, one record at a time.
+
+    Returns the comparison rows against the baseline (empty without one).
+    """
+    meta = store.meta(run_id)
+    writer = _ReportWriter(out, fmt)
+    writer.start(f"Benchmark Run {run_id}")
+    writer.paragraph(
+        f"Benchmark: {meta.get('benchmark')}, commit: {meta.get('git_commit')}, "
+        f"started: {meta.get('start_time')}"
+    )
+
+    writer.heading("Records")
+    writer.table(["Kind", "Scenario", "Time (s)", "Score", "Message / Error"])
+    current = Distributions()
+    for record in store.records(run_id):
+        current.add(record)
+        score = record.get("overall_score", record.get("average_score"))
+        time_taken = record.get("generation_time")
+        writer.row(
+            [
+                record["kind"],
+                record.get("scenario_id", ""),
+                f"{time_taken:.2f}" if time_taken is not None else "",
+                f"{score:.2f}" if isinstance(score, (int, float)) else "",
+                record.get("error")
+                or record.get("parsing_error")
+                or _preview(record.get("generated_message")),
+            ]
+        )
+    writer.end_table()
+
+    writer.heading("Summary")
+    writer.paragraph(f"Records: {current.records}, errors: {current.errors}")
+    writer.table(["Metric", "Count", "Mean", "p50", "p95"])
+    for key in sorted(current.samples):
+        stats = current.stats(key)
+        writer.row(
+            [key, stats["count"]] + [f"{stats[s]:.3f}" for s in ("mean", "p50", "p95")]
+        )
+    writer.end_table()
+
+    rows: List[Dict] = []
+    if baseline_id:
+        baseline = Distributions()
+        for record in store.records(baseline_id):
+            baseline.add(record)
+        rows = compare_distributions(current, baseline)
+        writer.heading(f"Comparison with {baseline_id}")
+        writer.table(["Metric", "Baseline", "Current", "Delta"])
+        for row in rows:
+            writer.row(
+                [
+                    row["metric"],
+                    f"{row['baseline']:.3f}",
+                    f"{row['current']:.3f}",
+                    f"{row['delta']:+.3f}",
+                ],
+                highlight=row["regression"],
+            )
+        writer.end_table()
+
+    writer.finish()
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark results store")
+    parser.add_argument("--store", default=str(DEFAULT_STORE), help="Store directory")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    subparsers.add_parser("list", help="List recorded runs")
+
+    report_parser = subparsers.add_parser("report", help="Stream a report of a run")
+    report_parser.add_argument(
+        "run", nargs="?", default="latest", help="Run ID, prefix or 'latest'"
+    )
+    report_parser.add_argument(
+        "--baseline", help="Run ID, prefix or 'previous' to compare with"
+    )
+    report_parser.add_argument(
+        "--format", choices=["markdown", "html"], default="markdown"
+    )
+    report_parser.add_argument("--output", help="Output file (default: stdout)")
+
+    export_parser = subparsers.add_parser("export", help="Export a run to Parquet")
+    export_parser.add_argument(
+        "run", nargs="?", default="latest", help="Run ID, prefix or 'latest'"
+    )
+
+    args = parser.parse_args()
+    store = ResultsStore(args.store)
+
+    if args.command == "list":
+        for run in store.runs():
+            commit = run.get("git_commit") or "-"
+            print(
+                f"{run['run_id']:32}{run['benchmark']:12}{commit:10}"
+                f"{run['start_time']}"
+            )
+        return
+
+    run_id = store.resolve(args.run)
+    if args.command == "export":
+        print(f"💾 Exported {run_id} to {store.export_parquet(run_id)}")
+        return
+
+    baseline_id = store.resolve(args.baseline) if args.baseline else None
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as out:
+            rows = write_report(store, run_id, out, baseline_id, args.format)
+        print(f"📄 Report saved to {args.output}")
+    else:
+        rows = write_report(store, run_id, sys.stdout, baseline_id, args.format)
+
+    regressions = [row for row in rows if row["regression"]]
+    if regressions:
+        print(
+            f"\n❌ {len(regressions)} regression(s) against {baseline_id}",
+            file=sys.stderr,
+        )
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Python Sandbox Throughput Benchmark for Unghost Agent
+
+Runs N concurrent coder steps, each executing a sequence of snippets in its
+own session, once with the in-process ``exec`` the shared ``PythonREPL``
+uses and once with the sandbox process pool, and reports executions per
+second and latency percentiles. With ``--runaway`` one extra step runs an
+endless loop, to show how it affects the other steps. No LLM or network
+access is needed.
+"""
+
+import argparse
+import functools
+import io
+import statistics
+import sys
+import threading
+import time
+from pathlib import Path
+
+# Add parent directory to path to import from src
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.sandbox import SandboxPool
+
+SNIPPETS = [
+    "total = sum(i * i for i in range(200_000))\nprint(total)",
+    "import json\nrows = [{'n': i, 'sq': i * i} for i in range(20_000)]\n"
+    "print(len(json.dumps(rows)))",
+    "primes = [n for n in range(2, 30_000) if all(n % d for d in range(2, int(n ** 0.5) + 1))]\n"
+    "print(len(primes))",
+    "print(total % 97, len(rows), primes[-1])",
+]
+RUNAWAY = "while True:\n    pass"
+
+
+def _percentile(values, q):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def run_in_process(steps: int, rounds: int, runaway: bool, runaway_seconds: float):
+    """Every step execs in the API process, like the shared PythonREPL."""
+    latencies = []
+    lock = threading.Lock()
+    stop = threading.Event()
+
+    def step(session: int):
+        # redirect_stdout is process-wide, so output goes through print
+        output = io.StringIO()
+        namespace = {"print": functools.partial(print, file=output)}
+        for _ in range(rounds):
+            for snippet in SNIPPETS:
+                start = time.perf_counter()
+                exec(snippet, namespace)
+                with lock:
+                    latencies.append(time.perf_counter() - start)
+
+    def spin():
+        # Stands in for a runaway step; in-process code cannot be killed,
+        # so this one gives up on its own after runaway_seconds
+        deadline = time.perf_counter() + runaway_seconds
+        while time.perf_counter() < deadline and not stop.is_set():
+            pass
+
+    threads = [threading.Thread(target=step, args=(i,)) for i in range(steps)]
+    if runaway:
+        threads.append(threading.Thread(target=spin))
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads[:steps]:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    stop.set()
+    for thread in threads[steps:]:
+        thread.join()
+    return elapsed, latencies
+
+
+def run_sandbox(
+    pool: SandboxPool, steps: int, rounds: int, runaway: bool
+) -> tuple[float, list[float]]:
+    """Every step runs in its own session of the process pool."""
+    latencies = []
+    lock = threading.Lock()
+
+    def step(session: int):
+        for _ in range(rounds):
+            for snippet in SNIPPETS:
+                result = pool.run(snippet, session=f"step-{session}")
+                if result.error:
+                    print(f"   ⚠️  step {session}: {result.error.strip()}")
+                with lock:
+                    latencies.append(result.duration)
+
+    threads = [threading.Thread(target=step, args=(i,)) for i in range(steps)]
+    if runaway:
+        threads.append(
+            threading.Thread(target=lambda: pool.run(RUNAWAY, session="runaway"))
+        )
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads[:steps]:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    for thread in threads[steps:]:
+        thread.join()
+    return elapsed, latencies
+
+
+def report(name: str, elapsed: float, latencies: list[float]):
+    print(
+        f"   {name:<11} {len(latencies) / elapsed:8.1f} exec/s   "
+        f"p50 {statistics.median(latencies) * 1000:7.1f} ms   "
+        f"p95 {_percentile(latencies, 0.95) * 1000:7.1f} ms   "
+        f"wall {elapsed:6.2f} s"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the python sandbox pool")
+    parser.add_argument("--steps", type=int, default=8, help="concurrent coder steps")
+    parser.add_argument("--rounds", type=int, default=3, help="snippet rounds per step")
+    parser.add_argument("--workers", type=int, default=4, help="sandbox workers")
+    parser.add_argument(
+        "--runaway", action="store_true", help="add a step running an endless loop"
+    )
+    parser.add_argument(
+        "--timeout", type=float, default=5.0, help="sandbox wall-clock timeout"
+    )
+    args = parser.parse_args()
+
+    print("🐍 Python sandbox benchmark")
+    print(
+        f"   {args.steps} steps x {args.rounds} rounds x {len(SNIPPETS)} snippets"
+        f"{', plus one runaway step' if args.runaway else ''}"
+    )
+
+    elapsed, latencies = run_in_process(
+        args.steps, args.rounds, args.runaway, args.timeout
+    )
+    report("in-process", elapsed, latencies)
+
+    start = time.perf_counter()
+    pool = SandboxPool(size=args.workers, timeout=args.timeout, preload=())
+    # Wait until every worker answers, so that start-up is not measured
+    for i in range(args.workers * 4):
+        pool.run("pass", session=f"warmup-{i}")
+    print(f"   ⏱️  {args.workers} workers ready in {time.perf_counter() - start:.2f} s")
+    try:
+        elapsed, latencies = run_sandbox(pool, args.steps, args.rounds, args.runaway)
+        report("sandbox", elapsed, latencies)
+        print(f"   📊 {pool.stats}")
+    finally:
+        pool.close()
+
+
+if __name__ == "__main__":
+    main()
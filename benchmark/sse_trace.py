@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""
+SSE Trace Recording and Critical-Path Analysis
+
+``SSETrace`` records every event of a chat stream with its arrival time,
+type, agent and size. From a trace it derives per-agent timings (time to
+first token, inter-token gaps, token counts), tool-call durations and a
+critical-path breakdown that splits the wall time of a run into the agents
+and tools it was waiting for.
+
+Run as a script to aggregate saved traces across runs:
+
+    python benchmark/sse_trace.py benchmark_results/traces_20250101_120000
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+
+def _percentile(values: List[float], pct: float) -> Optional[float]:
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round((len(values) - 1) * pct / 100)))]
+
+
+def _stats(values: List[float]) -> Dict:
+    return {
+        "count": len(values),
+        "mean": statistics.mean(values) if values else None,
+        "p50": _percentile(values, 50),
+        "p95": _percentile(values, 95),
+        "max": max(values) if values else None,
+    }
+
+
+class SSETrace:
+    """Timestamped record of the events of one chat stream."""
+
+    def __init__(self, scenario_id: Optional[str] = None):
+        self.scenario_id = scenario_id
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+        self.events: List[Dict] = []
+        self.total: Optional[float] = None
+
+    def record(self, event_type: str, data: Dict, size: int):
+        """Record one event; ``size`` is its size on the wire in bytes."""
+        event = {
+            "t": round(time.perf_counter() - self._start, 6),
+            "type": event_type,
+            "agent": data.get("agent"),
+            "bytes": size,
+        }
+        if data.get("id"):
+            event["id"] = data["id"]
+        if event_type == "message_chunk":
+            event["chars"] = len(data.get("content") or "")
+        elif event_type == "tool_calls":
+            event["tools"] = [
+                {"id": call.get("id"), "name": call.get("name")}
+                for call in data.get("tool_calls") or []
+            ]
+        elif event_type == "tool_call_result":
+            event["tool_call_id"] = data.get("tool_call_id")
+        self.events.append(event)
+
+    def finish(self):
+        """Mark the end of the stream."""
+        self.total = round(time.perf_counter() - self._start, 6)
+
+    def to_dict(self) -> Dict:
+        return {
+            "scenario_id": self.scenario_id,
+            "started_at": self.started_at,
+            "total": self.total,
+            "events": self.events,
+        }
+
+    def summary(self) -> Dict:
+        return summarize_trace(self.to_dict())
+
+
+def summarize_trace(trace: Dict) -> Dict:
+    """
+    Derive per-agent, per-tool and critical-path timings from a trace.
+
+    Each interval between two consecutive events is attributed to what
+    produced the later event: a tool for ``tool_call_result`` events, else
+    the agent. The time before the first event is ``startup`` and the time
+    after the last one ``tail``, so the critical path adds up to the total.
+    """
+    events = trace["events"]
+    total = trace.get("total") or (events[-1]["t"] if events else 0.0)
+
+    tool_names = {}
+    for event in events:
+        for call in event.get("tools", []):
+            tool_names[call["id"]] = call["name"]
+
+    critical_path: Dict[str, float] = defaultdict(float)
+    agents: Dict[str, Dict] = {}
+    tools: Dict[str, List[float]] = defaultdict(list)
+    tool_started: Dict[str, float] = {}
+    last_chunk: Dict[str, float] = {}
+    previous_t = 0.0
+    previous_agent = None
+
+    for event in events:
+        agent = event.get("agent") or "unknown"
+        if event["type"] == "tool_call_result":
+            name = tool_names.get(event.get("tool_call_id"), "unknown")
+            segment = f"tool:{name}"
+            if event.get("tool_call_id") in tool_started:
+                tools[name].append(event["t"] - tool_started[event["tool_call_id"]])
+        elif previous_agent is None and not agents:
+            segment = "startup"
+        else:
+            segment = f"agent:{agent}"
+        critical_path[segment] += event["t"] - previous_t
+
+        stats = agents.setdefault(
+            agent,
+            {
+                "first_event": event["t"],
+                "last_event": event["t"],
+                "events": 0,
+                "bytes": 0,
+                "tokens": 0,
+                "chars": 0,
+                "ttft": None,
+                "gaps": [],
+                "_turn_start": previous_t,
+            },
+        )
+        if agent != previous_agent:
+            # The agent takes over: its next token is measured from here.
+            stats["_turn_start"] = previous_t
+        stats["last_event"] = event["t"]
+        stats["events"] += 1
+        stats["bytes"] += event["bytes"]
+
+        if event["type"] == "message_chunk":
+            stats["tokens"] += 1
+            stats["chars"] += event.get("chars", 0)
+            if stats["ttft"] is None:
+                stats["ttft"] = event["t"] - stats["_turn_start"]
+            message_id = event.get("id") or agent
+            if message_id in last_chunk:
+                stats["gaps"].append(event["t"] - last_chunk[message_id])
+            last_chunk[message_id] = event["t"]
+        elif event["type"] == "tool_calls":
+            for call in event.get("tools", []):
+                tool_started[call["id"]] = event["t"]
+        elif event["type"] == "tool_call_result":
+            # The agent's next model call starts once the tool has returned.
+            stats["_turn_start"] = event["t"]
+
+        previous_t = event["t"]
+        previous_agent = agent
+
+    critical_path["tail"] += max(0.0, total - previous_t)
+
+    for stats in agents.values():
+        del stats["_turn_start"]
+        stats["duration"] = stats["last_event"] - stats["first_event"]
+        stats["gaps"] = _stats(stats["gaps"])
+
+    return {
+        "scenario_id": trace.get("scenario_id"),
+        "total": total,
+        "events": len(events),
+        "bytes": sum(event["bytes"] for event in events),
+        "ttft": next((e["t"] for e in events if e["type"] == "message_chunk"), None),
+        "agents": agents,
+        "tools": {
+            name: {**_stats(durations), "durations": durations}
+            for name, durations in tools.items()
+        },
+        "critical_path": dict(critical_path),
+    }
+
+
+def save_traces(traces: Iterable[Dict], directory: Path) -> int:
+    """Write one JSON file per trace; returns the number written."""
+    directory.mkdir(parents=True, exist_ok=True)
+    count = 0
+    for index, trace in enumerate(traces):
+        name = trace.get("scenario_id") or f"run_{index}"
+        with open(directory / f"{name}.json", "w", encoding="utf-8") as f:
+            json.dump(trace, f)
+        count += 1
+    return count
+
+
+def load_traces(paths: Iterable[str]) -> List[Dict]:
+    """Load traces from trace files and directories of trace files."""
+    traces = []
+    for path in map(Path, paths):
+        files = sorted(path.glob("*.json")) if path.is_dir() else [path]
+        for file in files:
+            with open(file, "r", encoding="utf-8") as f:
+                traces.append(json.load(f))
+    return traces
+
+
+def aggregate(summaries: List[Dict]) -> Dict:
+    """Aggregate trace summaries of several runs into a critical-path breakdown."""
+    totals = [s["total"] for s in summaries]
+    segments: Dict[str, List[float]] = defaultdict(list)
+    ttft: Dict[str, List[float]] = defaultdict(list)
+    gaps: Dict[str, List[float]] = defaultdict(list)
+    tokens: Dict[str, List[int]] = defaultdict(list)
+    tools: Dict[str, List[float]] = defaultdict(list)
+
+    for summary in summaries:
+        for segment, seconds in summary["critical_path"].items():
+            segments[segment].append(seconds)
+        for agent, stats in summary["agents"].items():
+            if stats["ttft"] is not None:
+                ttft[agent].append(stats["ttft"])
+            if stats["gaps"]["p50"] is not None:
+                gaps[agent].append(stats["gaps"]["p50"])
+            tokens[agent].append(stats["tokens"])
+        for name, stats in summary["tools"].items():
+            tools[name].extend(stats["durations"])
+
+    total_time = sum(totals)
+    return {
+        "runs": len(summaries),
+        "total": _stats(totals),
+        "critical_path": {
+            segment: {
+                **_stats(values),
+                # Runs without the segment count as zero for the share
+                "share": sum(values) / total_time if total_time else 0.0,
+            }
+            for segment, values in sorted(
+                segments.items(), key=lambda item: -sum(item[1])
+            )
+        },
+        "agents": {
+            agent: {
+                "ttft": _stats(ttft[agent]),
+                "inter_token_gap_p50": _stats(gaps[agent]),
+                "tokens": statistics.mean(tokens[agent]),
+            }
+            for agent in tokens
+        },
+        "tools": {name: _stats(values) for name, values in tools.items()},
+    }
+
+
+def _fmt(value: Optional[float], unit: str = "s") -> str:
+    return "-" if value is None else f"{value:.3f}{unit}"
+
+
+def print_report(report: Dict):
+    print("\n" + "=" * 60)
+    print("🧭 Critical-Path Breakdown")
+    print("=" * 60)
+    print(
+        f"Runs: {report['runs']}, total mean {_fmt(report['total']['mean'])}, "
+        f"p95 {_fmt(report['total']['p95'])}\n"
+    )
+    print(f"{'segment':32}{'share':>8}{'mean':>10}{'p95':>10}")
+    for segment, stats in report["critical_path"].items():
+        print(
+            f"{segment:32}{stats['share']:>8.1%}"
+            f"{_fmt(stats['mean']):>10}{_fmt(stats['p95']):>10}"
+        )
+
+    print(f"\n{'agent':20}{'tokens':>8}{'TTFT p50':>11}{'TTFT p95':>11}{'gap p50':>11}")
+    for agent, stats in report["agents"].items():
+        print(
+            f"{agent:20}{stats['tokens']:>8.0f}{_fmt(stats['ttft']['p50']):>11}"
+            f"{_fmt(stats['ttft']['p95']):>11}"
+            f"{_fmt(stats['inter_token_gap_p50']['p50']):>11}"
+        )
+
+    if report["tools"]:
+        print(f"\n{'tool':32}{'calls':>8}{'mean':>10}{'p95':>10}")
+        for name, stats in report["tools"].items():
+            print(
+                f"{name:32}{stats['count']:>8}"
+                f"{_fmt(stats['mean']):>10}{_fmt(stats['p95']):>10}"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Aggregate SSE traces into a critical-path breakdown"
+    )
+    parser.add_argument("paths", nargs="+", help="Trace files or trace directories")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    traces = load_traces(args.paths)
+    if not traces:
+        print("❌ No traces found")
+        sys.exit(1)
+
+    report = aggregate([summarize_trace(trace) for trace in traces])
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+
+
+if __name__ == "__main__":
+    main()
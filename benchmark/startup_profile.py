@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Startup Profile for Unghost Agent
+
+Imports a module (``src.server.app`` by default) in fresh interpreters with
+``python -X importtime`` and reports the import time per module and per
+package. With ``--budget`` it fails when the median import time exceeds the
+budget, and with ``--forbid`` when one of the listed modules is imported at
+startup, so it can guard against startup regressions in CI:
+
+    python benchmark/startup_profile.py --budget 3 --forbid-default
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+
+# Subsystems that src.server.app imports on first use of their endpoint
+DEFAULT_FORBIDDEN = [
+    "src.graph.builder",
+    "src.podcast",
+    "src.ppt",
+    "src.prose",
+    "src.prompt_enhancer",
+    "src.server.mcp_utils",
+    "src.llms.llm",
+    "src.tools",
+    "src.crawler",
+    "langchain_community",
+    "langchain_google_genai",
+    "langchain_mcp_adapters",
+    "readabilipy",
+]
+
+
+def profile_once(module: str) -> tuple[float, list[tuple[str, int, int]]]:
+    """Import a module in a fresh interpreter; wall time and per-module times."""
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+    )
+    elapsed = time.perf_counter() - start
+    if result.returncode != 0:
+        error = result.stderr.strip().splitlines()
+        raise RuntimeError(f"Importing {module} failed: {error[-1] if error else ''}")
+
+    modules = []
+    for line in result.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        modules.append((name.strip(), int(self_us), int(cumulative_us)))
+    return elapsed, modules
+
+
+def package_of(name: str) -> str:
+    parts = name.split(".")
+    # Our own code is grouped by subsystem, everything else by distribution
+    return ".".join(parts[:2]) if parts[0] == "src" else parts[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile the import time of a module")
+    parser.add_argument("--module", default="src.server.app", help="module to import")
+    parser.add_argument("--runs", type=int, default=3, help="fresh interpreters")
+    parser.add_argument("--top", type=int, default=20, help="modules to list")
+    parser.add_argument(
+        "--budget", type=float, help="fail above this median import time (seconds)"
+    )
+    parser.add_argument(
+        "--forbid",
+        nargs="*",
+        default=[],
+        help="fail when one of these modules (or packages) is imported",
+    )
+    parser.add_argument(
+        "--forbid-default",
+        action="store_true",
+        help="forbid the subsystems src.server.app loads lazily",
+    )
+    parser.add_argument("--json", help="write the profile to this JSON file")
+    args = parser.parse_args()
+
+    print(f"🚀 Startup profile of {args.module} ({args.runs} runs)")
+    walls = []
+    self_times: dict[str, list[int]] = defaultdict(list)
+    cumulative_times: dict[str, list[int]] = defaultdict(list)
+    for _ in range(args.runs):
+        wall, modules = profile_once(args.module)
+        walls.append(wall)
+        for name, self_us, cumulative_us in modules:
+            self_times[name].append(self_us)
+            cumulative_times[name].append(cumulative_us)
+
+    median_self = {name: statistics.median(t) for name, t in self_times.items()}
+    median_cumulative = {
+        name: statistics.median(t) for name, t in cumulative_times.items()
+    }
+    packages: dict[str, float] = defaultdict(float)
+    for name, self_us in median_self.items():
+        packages[package_of(name)] += self_us
+
+    import_time = median_cumulative.get(args.module, 0) / 1e6
+    wall = statistics.median(walls)
+    print(f"   ⏱️  import {import_time:.3f} s, interpreter wall {wall:.3f} s")
+    print(f"   📦 {len(median_self)} modules imported")
+
+    print(f"\n   Top {args.top} packages by import time (self):")
+    for name, us in sorted(packages.items(), key=lambda x: -x[1])[: args.top]:
+        print(f"   {us / 1000:9.1f} ms  {name}")
+
+    print(f"\n   Top {args.top} modules by cumulative import time:")
+    for name, us in sorted(median_cumulative.items(), key=lambda x: -x[1])[: args.top]:
+        print(f"   {us / 1000:9.1f} ms  {name}")
+
+    forbidden = list(args.forbid) + (DEFAULT_FORBIDDEN if args.forbid_default else [])
+    imported = sorted(
+        {
+            prefix
+            for prefix in forbidden
+            for name in median_self
+            if name == prefix or name.startswith(prefix + ".")
+        }
+    )
+
+    if args.json:
+        Path(args.json).write_text(
+            json.dumps(
+                {
+                    "module": args.module,
+                    "import_seconds": import_time,
+                    "wall_seconds": wall,
+                    "packages_ms": {k: v / 1000 for k, v in packages.items()},
+                    "modules_ms": {k: v / 1000 for k, v in median_cumulative.items()},
+                    "forbidden_imported": imported,
+                },
+                indent=2,
+            )
+        )
+        print(f"\n   💾 Profile written to {args.json}")
+
+    failed = False
+    if imported:
+        print(f"\n❌ Imported at startup although loaded lazily: {', '.join(imported)}")
+        failed = True
+    if args.budget is not None:
+        if import_time > args.budget:
+            print(f"\n❌ Import time {import_time:.3f} s exceeds {args.budget:.3f} s")
+            failed = True
+        else:
+            print(f"\n✅ Import time {import_time:.3f} s within {args.budget:.3f} s")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -10,7 +10,7 @@ import json
 import logging
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Optional
 import sys
 import os
 import io
@@ -23,6 +23,7 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from src.utils.template_loader import template_loader
 from benchmark.llm_judge import LLMJudge
+from benchmark.results_store import DEFAULT_STORE, ResultsStore
 
 # Configure logging
 logging.basicConfig(
@@ -35,8 +36,9 @@ logger = logging.getLogger(__name__)
 class TemplateBenchmarkRunner:
     """Benchmark runner specifically for testing outreach templates."""
     
-    def __init__(self):
+    def __init__(self, store_dir: Optional[str] = None):
         self.template_scenarios = []
+        self.store = ResultsStore(store_dir) if store_dir else None
         self.results = {
             'metadata': {
                 'start_time': None,
@@ -106,12 +108,18 @@ class TemplateBenchmarkRunner:
         self.results['metadata']['start_time'] = datetime.now().isoformat()
         
         logger.info(f"Starting template benchmark with {len(self.template_scenarios)} scenarios")
+        store_run = self.store.start_run(
+            'template',
+            total_templates=len(self.template_scenarios)
+        ) if self.store else None
         
         # Test all templates
         for scenario in self.template_scenarios:
             logger.info(f"Testing template {scenario['id']}")
             result = await self.test_template(scenario)
             self.results['template_tests'].append(result)
+            if store_run:
+                store_run.append('template_test', result)
             
             if 'error' not in result:
                 self.results['metadata']['successful_tests'] += 1
@@ -123,6 +131,11 @@ class TemplateBenchmarkRunner:
         self._calculate_aggregate_scores()
         
         self.results['metadata']['end_time'] = datetime.now().isoformat()
+        if store_run:
+            store_run.close(
+                successful_tests=self.results['metadata']['successful_tests'],
+                overall_average=self.results['aggregate_scores'].get('overall_average')
+            )
         
         return self.results
         
@@ -240,7 +253,7 @@ async def main():
     print("🚀 Unghost Template Benchmark System")
     print("="*60 + "\n")
     
-    runner = TemplateBenchmarkRunner()
+    runner = TemplateBenchmarkRunner(store_dir=str(DEFAULT_STORE))
     
     if not runner.load_scenarios():
         print("❌ Failed to load test scenarios")
@@ -14,6 +14,8 @@ import uvicorn
 import warnings
 from dotenv import load_dotenv
 
+from src.utils.log_pipeline import setup_logging
+
 # Load environment variables from .env file
 load_dotenv()
 
@@ -21,11 +23,8 @@ load_dotenv()
 warnings.filterwarnings("ignore", message="Convert_system_message_to_human will be deprecated")
 warnings.filterwarnings("ignore", message=".*missing field.*", module="langchain_google_genai")
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-)
+# Configure logging (queued, written by a background thread)
+setup_logging(level=logging.INFO)
 
 logger = logging.getLogger(__name__)
 
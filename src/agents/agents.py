@@ -9,8 +9,18 @@ from src.config.agents import AGENT_LLM_MAP
 
 
 # Create agents using configured LLM types
-def create_agent(agent_name: str, agent_type: str, tools: list, prompt_template: str):
-    """Factory function to create agents with consistent configuration."""
+def create_agent(
+    agent_name: str,
+    agent_type: str,
+    tools: list,
+    prompt_template: str,
+    prompt_vars: dict | None = None,
+):
+    """Factory function to create agents with consistent configuration.
+
+    ``prompt_vars`` are extra template variables, for flags that are not
+    part of the agent state (the agent only keeps its own state keys).
+    """
     # Get the base LLM and ensure it doesn't have response_format issues
     base_llm = get_llm_by_type(AGENT_LLM_MAP[agent_type])
     
@@ -25,5 +35,7 @@ def create_agent(agent_name: str, agent_type: str, tools: list, prompt_template:
         name=agent_name,
         model=llm,
         tools=tools,
-        prompt=lambda state: apply_prompt_template(prompt_template, state),
+        prompt=lambda state: apply_prompt_template(
+            prompt_template, {**state, **(prompt_vars or {})}
+        ),
     )
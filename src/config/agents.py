@@ -3,8 +3,8 @@
 
 from typing import Literal
 
-# Define available LLM types
-LLMType = Literal["basic", "reasoning", "vision"]
+# Define available LLM types ("simulated" is a scripted model for offline runs)
+LLMType = Literal["basic", "reasoning", "vision", "simulated"]
 
 # Define agent-LLM mapping
 AGENT_LLM_MAP: dict[str, LLMType] = {
@@ -19,3 +19,12 @@ AGENT_LLM_MAP: dict[str, LLMType] = {
     "prose_writer": "basic",
     "prompt_enhancer": "basic",
 }
+
+# Token budget for the "Existing Research Findings" block passed to each step.
+# Findings beyond the budget are compressed to their key lines or omitted.
+DEFAULT_CONTEXT_TOKEN_BUDGET = 8000
+AGENT_CONTEXT_TOKEN_BUDGET: dict[str, int] = {
+    "researcher": 6000,
+    "coder": 4000,
+    "strategizer": 12000,
+}
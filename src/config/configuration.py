@@ -1,14 +1,58 @@
 # Copyright (c) 2025 Peter Liu
 # SPDX-License-Identifier: MIT
 
-import os
-from dataclasses import dataclass, field, fields
-from typing import Any, Optional
+import logging
+from dataclasses import Field, dataclass, field, fields
+from typing import Any, Optional, Union, get_args, get_origin
 
 from langchain_core.runnables import RunnableConfig
 
 from src.rag.retriever import Resource
 from src.config.report_style import ReportStyle
+from src.config.settings import Settings, get_settings
+
+logger = logging.getLogger(__name__)
+
+
+def _parse_env(f: Field, value: str) -> Any:
+    """Convert an environment variable to the type of a field; raises ValueError."""
+    field_type = f.type
+    if get_origin(field_type) is Union:
+        # Optional[X]
+        field_type = next(t for t in get_args(field_type) if t is not type(None))
+    if field_type is bool:
+        return value.strip().lower() in ("1", "true", "yes", "on")
+    if field_type in (int, float):
+        return field_type(value)
+    return value
+
+
+# (settings version, overrides) of the last parsed settings snapshot
+_env_overrides_cache: tuple[int, dict[str, Any]] = (0, {})
+
+
+def _env_overrides(settings: Settings) -> dict[str, Any]:
+    """
+    The configurable fields set in the environment of a settings snapshot,
+    parsed and validated once per snapshot. Malformed values are logged and
+    ignored.
+    """
+    global _env_overrides_cache
+    version, overrides = _env_overrides_cache
+    if version == settings.version:
+        return overrides
+
+    overrides = {}
+    for f in fields(Configuration):
+        value = settings.env.get(f.name.upper())
+        if not f.init or not value:
+            continue
+        try:
+            overrides[f.name] = _parse_env(f, value)
+        except ValueError:
+            logger.warning(f"Ignoring invalid {f.name.upper()}={value!r}")
+    _env_overrides_cache = (settings.version, overrides)
+    return overrides
 
 
 @dataclass(kw_only=True)
@@ -26,18 +70,39 @@ class Configuration:
     enable_deep_thinking: bool = False  # Whether to enable deep thinking
     user_background: Optional[str] = None  # User's professional background for personalized outreach
     selected_template_id: Optional[str] = None  # User-selected template ID from frontend
+    context_token_budget: Optional[int] = None  # Overrides the per-agent findings token budget
+    enable_early_step_dispatch: bool = False  # Start step 1 of an auto-accepted plan while the rest is generated
+    enable_speculative_investigation: bool = False  # Run the background investigation alongside the coordinator
+
+    @classmethod
+    def from_settings(
+        cls, settings: Settings, configurable: Optional[dict] = None
+    ) -> "Configuration":
+        """
+        Resolve the configuration of a run: the request's configurable
+        values, overridden by the environment variables of ``settings``.
+        """
+        values: dict[str, Any] = {
+            f.name: (configurable or {}).get(f.name) for f in fields(cls) if f.init
+        }
+        values.update(_env_overrides(settings))
+        return cls(**{k: v for k, v in values.items() if v})
 
     @classmethod
     def from_runnable_config(
         cls, config: Optional[RunnableConfig] = None
     ) -> "Configuration":
-        """Create a Configuration instance from a RunnableConfig."""
+        """
+        Create a Configuration instance from a RunnableConfig.
+
+        Runs started by the server carry the snapshot resolved when the run
+        started (``configurable["configuration"]``), so nodes do not resolve
+        it again. Otherwise it is resolved from the current settings.
+        """
         configurable = (
             config["configurable"] if config and "configurable" in config else {}
         )
-        values: dict[str, Any] = {
-            f.name: os.environ.get(f.name.upper(), configurable.get(f.name))
-            for f in fields(cls)
-            if f.init
-        }
-        return cls(**{k: v for k, v in values.items() if v})
+        snapshot = configurable.get("configuration")
+        if isinstance(snapshot, cls):
+            return snapshot
+        return cls.from_settings(get_settings(), configurable)
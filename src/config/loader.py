@@ -3,7 +3,7 @@
 
 import os
 import yaml
-from typing import Dict, Any
+from typing import Dict, Any, Tuple
 
 
 def replace_env_vars(value: str) -> str:
@@ -16,33 +16,39 @@ def replace_env_vars(value: str) -> str:
     return value
 
 
+def process_value(value: Any) -> Any:
+    """Replace environment variables in a value, recursing into containers."""
+    if isinstance(value, dict):
+        return process_dict(value)
+    if isinstance(value, list):
+        return [process_value(item) for item in value]
+    return replace_env_vars(value)
+
+
 def process_dict(config: Dict[str, Any]) -> Dict[str, Any]:
     """Recursively process dictionary to replace environment variables."""
     if not config:
         return {}
-    result = {}
-    for key, value in config.items():
-        if isinstance(value, dict):
-            result[key] = process_dict(value)
-        elif isinstance(value, str):
-            result[key] = replace_env_vars(value)
-        else:
-            result[key] = value
-    return result
+    return {key: process_value(value) for key, value in config.items()}
 
 
-_config_cache: Dict[str, Dict[str, Any]] = {}
+# Processed configs with the (mtime, size) of the file they were read from
+_config_cache: Dict[str, Tuple[Tuple[int, int], Dict[str, Any]]] = {}
 
 
 def load_yaml_config(file_path: str) -> Dict[str, Any]:
-    """Load and process YAML configuration file."""
+    """Load and process YAML configuration file, again when it has changed."""
     # 如果文件不存在，返回{}
-    if not os.path.exists(file_path):
+    try:
+        stat = os.stat(file_path)
+    except OSError:
         return {}
+    stamp = (stat.st_mtime_ns, stat.st_size)
 
-    # 检查缓存中是否已存在配置
-    if file_path in _config_cache:
-        return _config_cache[file_path]
+    # 检查缓存中是否已存在配置，且文件未被修改
+    cached = _config_cache.get(file_path)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
 
     # 如果缓存中不存在，则加载并处理配置
     with open(file_path, "r") as f:
@@ -50,5 +56,5 @@ def load_yaml_config(file_path: str) -> Dict[str, Any]:
     processed_config = process_dict(config)
 
     # 将处理后的配置存入缓存
-    _config_cache[file_path] = processed_config
+    _config_cache[file_path] = (stamp, processed_config)
     return processed_config
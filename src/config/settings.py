@@ -0,0 +1,142 @@
+# Copyright (c) 2025 Peter Liu
+# SPDX-License-Identifier: MIT
+
+"""
+One resolved snapshot of the settings that long-lived objects are built from.
+
+``Settings`` holds what the LLM clients, the search engine and the RAG
+provider are created from: ``conf.yaml`` and the environment variables
+configuring them, including the ``Configuration`` overrides (parsed once
+per snapshot, see ``Configuration.from_settings``). ``get_settings()``
+returns the current snapshot; it is rebuilt when ``conf.yaml`` changes
+(checked at most every ``CONF_RELOAD_INTERVAL`` seconds) or when
+``reload_settings()`` is called, e.g. after the environment changed.
+Modules that cache objects built from the settings register a callback
+with ``on_settings_change`` to drop them, so that keys can be rotated or
+models switched without a restart.
+
+Knobs that are cheap to read and build nothing, such as the crawler and
+cache options, are read from the environment where they are used, so
+changes apply immediately.
+"""
+
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+from .loader import load_yaml_config
+from .tools import SearchEngine
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONF_PATH = str((Path(__file__).parent.parent.parent / "conf.yaml").resolve())
+# Environment variables such as BASIC_MODEL__api_key configure LLM types
+_LLM_ENV_SUFFIX = "_MODEL__"
+
+
+@dataclass(frozen=True)
+class Settings:
+    """Settings resolved from conf.yaml and the environment."""
+
+    version: int
+    conf_path: str
+    conf_stamp: Optional[tuple[int, int]]
+    conf: dict[str, Any] = field(repr=False)
+    env: dict[str, str] = field(repr=False)
+    # LLM type ("basic", "reasoning", ...) -> {key: value} from the environment
+    llm_env: dict[str, dict[str, str]] = field(repr=False)
+    search_engine: str = SearchEngine.TAVILY.value
+    tavily_api_key: str = field(default="", repr=False)
+    rag_provider: Optional[str] = None
+
+
+def _conf_path() -> str:
+    return os.getenv("CONF_PATH", DEFAULT_CONF_PATH)
+
+
+def _stamp(path: str) -> Optional[tuple[int, int]]:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _build(version: int) -> Settings:
+    path = _conf_path()
+    stamp = _stamp(path)
+    conf = load_yaml_config(path)
+    env = dict(os.environ)
+
+    llm_env: dict[str, dict[str, str]] = {}
+    for key, value in env.items():
+        prefix, sep, name = key.partition(_LLM_ENV_SUFFIX)
+        if sep and prefix and name:
+            llm_env.setdefault(prefix.lower(), {})[name.lower()] = value
+
+    search_conf = (conf.get("TOOLS") or {}).get("search") or {}
+    return Settings(
+        version=version,
+        conf_path=path,
+        conf_stamp=stamp,
+        conf=conf,
+        env=env,
+        llm_env=llm_env,
+        search_engine=env.get("SEARCH_API", SearchEngine.TAVILY.value),
+        tavily_api_key=search_conf.get("tavily_api_key")
+        or env.get("TAVILY_API_KEY", ""),
+        rag_provider=env.get("RAG_PROVIDER"),
+    )
+
+
+_settings: Optional[Settings] = None
+_next_check = 0.0
+_lock = threading.Lock()
+_listeners: list[Callable[[Settings], None]] = []
+
+
+def on_settings_change(callback: Callable[[Settings], None]) -> Callable:
+    """Call ``callback(settings)`` whenever the settings are rebuilt."""
+    _listeners.append(callback)
+    return callback
+
+
+def _notify(settings: Settings):
+    logger.info(f"Settings reloaded from {settings.conf_path} (v{settings.version})")
+    for callback in list(_listeners):
+        try:
+            callback(settings)
+        except Exception as e:
+            logger.error(f"Settings change callback {callback!r} failed: {e}")
+
+
+def get_settings() -> Settings:
+    """The current settings, rebuilt if conf.yaml has changed."""
+    global _settings, _next_check
+    reloaded = None
+    with _lock:
+        now = time.monotonic()
+        if _settings is None:
+            _settings = _build(1)
+        elif now >= _next_check:
+            interval = float(os.getenv("CONF_RELOAD_INTERVAL", "2"))
+            _next_check = now + interval if interval > 0 else float("inf")
+            if _stamp(_settings.conf_path) != _settings.conf_stamp:
+                _settings = reloaded = _build(_settings.version + 1)
+        settings = _settings
+    if reloaded is not None:
+        _notify(reloaded)
+    return settings
+
+
+def reload_settings() -> Settings:
+    """Rebuild the settings from conf.yaml and the current environment."""
+    global _settings
+    with _lock:
+        _settings = settings = _build(_settings.version + 1 if _settings else 1)
+    _notify(settings)
+    return settings
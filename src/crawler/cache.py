@@ -0,0 +1,314 @@
+# Copyright (c) 2025 Peter Liu
+# SPDX-License-Identifier: MIT
+
+"""
+Persistent cache of crawled articles, shared by all threads and users.
+
+The article extracted from a page (title and readable HTML) is stored
+compressed (zstd when ``zstandard`` is installed, gzip otherwise) in a
+SQLite database, keyed by the canonical URL. Entries expire after
+``CRAWL_CACHE_TTL`` seconds, or the TTL of the page's domain in
+``CRAWL_CACHE_DOMAIN_TTLS``. An expired entry that carries the origin's
+``ETag`` or ``Last-Modified`` is revalidated with a conditional request
+when pages are fetched directly (``CRAWLER_FETCH_MODE=direct``); a 304
+answer renews it without downloading the page again. Beyond
+``CRAWL_CACHE_MAX_BYTES`` of compressed data the least recently used
+entries are evicted.
+"""
+
+import gzip
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+from src.utils.near_duplicates import canonicalize_url
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL = 86400
+
+
+def _compress(data: bytes) -> tuple[str, bytes]:
+    if zstandard is not None:
+        return "zstd", zstandard.ZstdCompressor(level=10).compress(data)
+    return "gzip", gzip.compress(data, compresslevel=6)
+
+
+def _decompress(codec: str, data: bytes) -> bytes:
+    if codec == "zstd":
+        if zstandard is None:
+            raise ValueError("zstandard is required to read this cache entry")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return gzip.decompress(data)
+
+
+def parse_domain_ttls(value: str) -> dict[str, float]:
+    """Parse ``"linkedin.com=3600,crunchbase.com=604800"`` into a mapping."""
+    ttls = {}
+    for item in value.split(","):
+        domain, _, ttl = item.partition("=")
+        if domain.strip() and ttl.strip():
+            ttls[domain.strip().lower().removeprefix("www.")] = float(ttl)
+    return ttls
+
+
+@dataclass
+class CachedArticle:
+    url: str
+    title: str
+    html_content: str
+    raw_bytes: int
+    expires_at: float
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+    @property
+    def fresh(self) -> bool:
+        return self.expires_at > time.time()
+
+    @property
+    def validators(self) -> dict[str, str]:
+        """Headers making a request conditional on the page having changed."""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class CrawlCache:
+    """
+    CrawlCache keeps crawled articles in a single SQLite database file.
+    """
+
+    def __init__(
+        self,
+        path: str | os.PathLike = ":memory:",
+        max_bytes: int = 256 * 1024 * 1024,
+        ttl: float = DEFAULT_TTL,
+        domain_ttls: Optional[dict[str, float]] = None,
+    ):
+        if str(path) != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.path = str(path)
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.domain_ttls = domain_ttls or {}
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.revalidated = 0
+        self.evictions = 0
+        self.bytes_saved = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS articles ("
+            "key TEXT PRIMARY KEY, url TEXT NOT NULL, title TEXT NOT NULL, "
+            "codec TEXT NOT NULL, data BLOB NOT NULL, raw_bytes INTEGER NOT NULL, "
+            "stored_bytes INTEGER NOT NULL, fetched_at REAL NOT NULL, "
+            "expires_at REAL NOT NULL, accessed_at REAL NOT NULL, "
+            "etag TEXT, last_modified TEXT)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS articles_accessed ON articles (accessed_at)"
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def key(url: str) -> str:
+        return hashlib.sha1(canonicalize_url(url).encode()).hexdigest()
+
+    def ttl_for(self, url: str) -> float:
+        """The TTL of the most specific domain configured for a URL."""
+        host = canonicalize_url(url).split("/", 1)[0]
+        labels = host.split(".")
+        for i in range(len(labels) - 1):
+            ttl = self.domain_ttls.get(".".join(labels[i:]))
+            if ttl is not None:
+                return ttl
+        return self.ttl
+
+    def get(self, url: str) -> Optional[CachedArticle]:
+        """
+        The cached article of a URL, fresh or expired. Only a fresh one
+        counts as a hit; an expired one is returned for revalidation.
+        """
+        key = self.key(url)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT title, codec, data, raw_bytes, expires_at, etag, "
+                "last_modified FROM articles WHERE key = ?",
+                (key,),
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            title, codec, data, raw_bytes, expires_at, etag, last_modified = row
+            if expires_at > time.time():
+                self.hits += 1
+                self.bytes_saved += raw_bytes
+            else:
+                self.misses += 1
+                self.stale += 1
+            self._conn.execute(
+                "UPDATE articles SET accessed_at = ? WHERE key = ?",
+                (time.time(), key),
+            )
+            self._conn.commit()
+        try:
+            html_content = _decompress(codec, data).decode()
+        except Exception as e:
+            logger.warning(f"Dropping unreadable crawl cache entry for {url}: {e}")
+            self.delete(url)
+            return None
+        return CachedArticle(
+            url=url,
+            title=title,
+            html_content=html_content,
+            raw_bytes=raw_bytes,
+            expires_at=expires_at,
+            etag=etag,
+            last_modified=last_modified,
+        )
+
+    def put(
+        self,
+        url: str,
+        title: str,
+        html_content: str,
+        raw_bytes: int,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+    ):
+        """Store the article extracted from ``raw_bytes`` of fetched page."""
+        ttl = self.ttl_for(url)
+        if ttl <= 0:
+            return
+        codec, data = _compress(html_content.encode())
+        if len(data) > self.max_bytes:
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO articles (key, url, title, codec, data, "
+                "raw_bytes, stored_bytes, fetched_at, expires_at, accessed_at, "
+                "etag, last_modified) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    self.key(url),
+                    url,
+                    title or "",
+                    codec,
+                    data,
+                    raw_bytes,
+                    len(data),
+                    now,
+                    now + ttl,
+                    now,
+                    etag,
+                    last_modified,
+                ),
+            )
+            self._evict()
+            self._conn.commit()
+
+    def renew(self, entry: CachedArticle):
+        """Extend an entry the origin confirmed unchanged (HTTP 304)."""
+        with self._lock:
+            self.revalidated += 1
+            self.bytes_saved += entry.raw_bytes
+            entry.expires_at = time.time() + self.ttl_for(entry.url)
+            self._conn.execute(
+                "UPDATE articles SET expires_at = ? WHERE key = ?",
+                (entry.expires_at, self.key(entry.url)),
+            )
+            self._conn.commit()
+
+    def delete(self, url: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM articles WHERE key = ?", (self.key(url),))
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM articles")
+            self._conn.commit()
+
+    def _evict(self):
+        total = self._conn.execute(
+            "SELECT COALESCE(SUM(stored_bytes), 0) FROM articles"
+        ).fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, stored_bytes in self._conn.execute(
+            "SELECT key, stored_bytes FROM articles ORDER BY accessed_at"
+        ).fetchall():
+            if total <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM articles WHERE key = ?", (key,))
+            total -= stored_bytes
+            self.evictions += 1
+
+    @property
+    def stats(self) -> dict:
+        with self._lock:
+            entries, stored, raw = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(stored_bytes), 0), "
+                "COALESCE(SUM(raw_bytes), 0) FROM articles"
+            ).fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "entries": entries,
+            "stored_bytes": stored,
+            "page_bytes": raw,
+            "max_bytes": self.max_bytes,
+            "codec": "zstd" if zstandard is not None else "gzip",
+            "hits": self.hits,
+            "misses": self.misses,
+            "stale": self.stale,
+            "revalidated": self.revalidated,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "bytes_saved": self.bytes_saved,
+        }
+
+
+_cache: Optional[CrawlCache] = None
+_cache_lock = threading.Lock()
+
+
+def cache_enabled() -> bool:
+    return os.getenv("CRAWL_CACHE", "true").lower() not in ("false", "0", "no")
+
+
+def get_crawl_cache() -> Optional[CrawlCache]:
+    """The process-wide crawl cache, or None when ``CRAWL_CACHE`` is off."""
+    global _cache
+    if not cache_enabled():
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = CrawlCache(
+                Path(os.getenv("CRAWL_CACHE_DIR", ".cache/crawl")) / "articles.db",
+                max_bytes=int(os.getenv("CRAWL_CACHE_MAX_BYTES", str(256 * 1024**2))),
+                ttl=float(os.getenv("CRAWL_CACHE_TTL", str(DEFAULT_TTL))),
+                domain_ttls=parse_domain_ttls(os.getenv("CRAWL_CACHE_DOMAIN_TTLS", "")),
+            )
+            logger.info(f"Crawl cache: {_cache.path}")
+        return _cache
+
+
+def crawl_cache_stats() -> Optional[dict]:
+    return get_crawl_cache().stats if cache_enabled() else None
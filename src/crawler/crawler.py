@@ -1,12 +1,19 @@
 # Copyright (c) 2025 Peter Liu
 # SPDX-License-Identifier: MIT
 
+import logging
+import os
 import sys
 
+from src.utils.http_cassette import http_request
+
 from .article import Article
+from .cache import get_crawl_cache
 from .jina_client import JinaClient
 from .readability_extractor import ReadabilityExtractor
 
+logger = logging.getLogger(__name__)
+
 
 class Crawler:
     def crawl(self, url: str) -> Article:
@@ -20,9 +27,64 @@ class Crawler:
         #
         # Instead of using Jina's own markdown converter, we'll use
         # our own solution to get better readability results.
-        jina_client = JinaClient()
-        html = jina_client.crawl(url, return_format="html")
+        #
+        # Extracted articles are kept in the persistent crawl cache, so
+        # pages crawled by earlier threads are not fetched again.
+        cache = get_crawl_cache()
+        cached = cache.get(url) if cache is not None else None
+        if cached is not None and cached.fresh:
+            return self._article(url, cached.title, cached.html_content)
+
+        direct = os.getenv("CRAWLER_FETCH_MODE", "jina").lower() == "direct"
+        etag = last_modified = None
+        # Only successful responses are cached; anything else is served once
+        cacheable = True
+        try:
+            if direct:
+                # Origin responses carry validators, so an expired entry is
+                # revalidated instead of downloaded again
+                headers = {"User-Agent": os.getenv("CRAWLER_USER_AGENT", "Mozilla/5.0")}
+                if cached is not None:
+                    headers.update(cached.validators)
+                response = http_request(
+                    "GET",
+                    url,
+                    headers=headers,
+                    timeout=float(os.getenv("CRAWLER_TIMEOUT", "30")),
+                )
+                if response.status_code == 304 and cached is not None:
+                    cache.renew(cached)
+                    return self._article(url, cached.title, cached.html_content)
+                response.raise_for_status()
+                cacheable = 200 <= response.status_code < 300
+                html = response.text
+                etag = response.headers.get("ETag")
+                last_modified = response.headers.get("Last-Modified")
+            else:
+                jina_client = JinaClient()
+                html = jina_client.crawl(url, return_format="html")
+        except Exception as e:
+            if cached is None:
+                raise
+            logger.warning(f"Serving an expired cached copy of {url}: {e!r}")
+            return self._article(url, cached.title, cached.html_content)
+
         extractor = ReadabilityExtractor()
         article = extractor.extract_article(html)
         article.url = url
+        if cache is not None and cacheable and article.html_content:
+            cache.put(
+                url,
+                article.title,
+                article.html_content,
+                raw_bytes=len(html.encode()),
+                etag=etag,
+                last_modified=last_modified,
+            )
+        return article
+
+    @staticmethod
+    def _article(url: str, title: str, html_content: str) -> Article:
+        article = Article(title=title, html_content=html_content)
+        article.url = url
         return article
@@ -4,7 +4,7 @@
 import logging
 import os
 
-import requests
+from src.utils.http_cassette import http_request
 
 logger = logging.getLogger(__name__)
 
@@ -22,5 +22,8 @@ class JinaClient:
                 "Jina API key is not set. Provide your own key to access a higher rate limit. See https://jina.ai/reader for more information."
             )
         data = {"url": url}
-        response = requests.post("https://r.jina.ai/", headers=headers, json=data)
+        response = http_request("POST", "https://r.jina.ai/", headers=headers, json=data)
+        # Rate limit and payment errors come back as a body that would
+        # otherwise be extracted as the page
+        response.raise_for_status()
         return response.text
@@ -5,6 +5,7 @@ from langgraph.graph import StateGraph, START, END
 from langgraph.checkpoint.memory import MemorySaver
 from src.prompts.planner_model import StepType
 
+from .checkpoint import build_checkpoint_serializer
 from .types import State
 from .nodes import (
     coordinator_node,
@@ -69,7 +70,9 @@ def build_graph_with_memory():
     """Build and return the agent workflow graph with memory."""
     # use persistent memory to save conversation history
     # TODO: be compatible with SQLite / PostgreSQL
-    memory = MemorySaver()
+    # large state values can be stored out of line, see checkpoint.py
+    serde = build_checkpoint_serializer()
+    memory = MemorySaver(serde=serde) if serde else MemorySaver()
 
     # build state graph
     builder = _build_base_graph()
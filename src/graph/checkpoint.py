@@ -0,0 +1,321 @@
+# Copyright (c) 2025 Peter Liu
+# SPDX-License-Identifier: MIT
+
+"""
+Out-of-line storage of large state values for graph checkpoints.
+
+Every superstep checkpoint serializes the full ``messages`` list, the
+``observations`` and ``background_investigation_results`` again, although
+most of those multi-KB strings have not changed since the previous step.
+The serializer defined here moves every string above a size threshold into
+a content-addressed blob store and leaves only a short reference in the
+checkpoint, so each distinct value is stored once per store.
+
+The in-memory checkpointer forgets its checkpoints on restart, so blobs not
+written for ``CHECKPOINT_BLOB_TTL`` seconds are pruned when the store is
+opened.
+"""
+
+import abc
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any
+
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+
+# References are plain strings so that they pass any type validation of the
+# objects they are embedded in (messages, plans, state fields).
+BLOB_REF_PREFIX = "\x00blob:sha256:"
+
+DEFAULT_MIN_BLOB_SIZE = 1024
+DEFAULT_BLOB_TTL = 24 * 3600
+
+
+class BlobStore(abc.ABC):
+    """
+    Define a content-addressed store for immutable blobs.
+    """
+
+    @abc.abstractmethod
+    def _write(self, key: str, data: bytes) -> None:
+        """
+        Persist compressed data under the given key if it is not present yet.
+        """
+        pass
+
+    @abc.abstractmethod
+    def _read(self, key: str) -> bytes | None:
+        """
+        Return the compressed data stored under the given key.
+        """
+        pass
+
+    @abc.abstractmethod
+    def _prune(self, cutoff: float) -> int:
+        """
+        Delete blobs last written before the cutoff timestamp; return how many.
+        """
+        pass
+
+    def put(self, data: bytes) -> str:
+        """Store data and return its content hash."""
+        key = hashlib.sha256(data).hexdigest()
+        # Level 1 compresses prose nearly as well as the default at a
+        # fraction of the cost, which matters on the checkpoint path
+        self._write(key, zlib.compress(data, 1))
+        return key
+
+    def get(self, key: str) -> bytes:
+        """Return the data stored under a content hash."""
+        compressed = self._read(key)
+        if compressed is None:
+            raise KeyError(f"Blob not found: {key}")
+        return zlib.decompress(compressed)
+
+    def prune(self, max_age: float) -> int:
+        """Delete blobs not written for ``max_age`` seconds; return how many."""
+        return self._prune(time.time() - max_age)
+
+
+class SQLiteBlobStore(BlobStore):
+    """
+    SQLiteBlobStore keeps blobs in a single SQLite database file.
+    """
+
+    def __init__(self, path: str | os.PathLike = ":memory:"):
+        if str(path) != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        # Blobs only back in-memory checkpoints, so a commit need not wait
+        # for the disk; WAL keeps concurrent reads off the writer's lock
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS blobs "
+            "(key TEXT PRIMARY KEY, data BLOB NOT NULL, "
+            "written_at REAL NOT NULL DEFAULT 0)"
+        )
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(blobs)")]
+        if "written_at" not in columns:
+            self._conn.execute(
+                "ALTER TABLE blobs ADD COLUMN written_at REAL NOT NULL DEFAULT 0"
+            )
+        self._conn.commit()
+
+    def _write(self, key: str, data: bytes) -> None:
+        # Writing an existing blob again refreshes its timestamp
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO blobs (key, data, written_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET written_at = excluded.written_at",
+                (key, data, time.time()),
+            )
+            self._conn.commit()
+
+    def _read(self, key: str) -> bytes | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM blobs WHERE key = ?", (key,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def _prune(self, cutoff: float) -> int:
+        with self._lock:
+            deleted = self._conn.execute(
+                "DELETE FROM blobs WHERE written_at < ?", (cutoff,)
+            ).rowcount
+            self._conn.commit()
+        return deleted
+
+
+class DiskBlobStore(BlobStore):
+    """
+    DiskBlobStore keeps one file per blob, fanned out by hash prefix.
+    """
+
+    def __init__(self, root: str | os.PathLike):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / key[2:]
+
+    def _write(self, key: str, data: bytes) -> None:
+        path = self._path(key)
+        if path.exists():
+            # The modification time serves as the write timestamp
+            os.utime(path)
+            return
+        path.parent.mkdir(exist_ok=True)
+        tmp_path = path.with_suffix(f".tmp{os.getpid()}.{threading.get_ident()}")
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, path)
+
+    def _read(self, key: str) -> bytes | None:
+        try:
+            return self._path(key).read_bytes()
+        except FileNotFoundError:
+            return None
+
+    def _prune(self, cutoff: float) -> int:
+        deleted = 0
+        for path in self.root.glob("??/*"):
+            try:
+                if path.stat().st_mtime < cutoff:
+                    path.unlink()
+                    deleted += 1
+            except FileNotFoundError:
+                pass
+        return deleted
+
+
+class BlobOffloadingSerializer(JsonPlusSerializer):
+    """
+    Checkpoint serializer that stores large strings out of line.
+
+    Strings of at least ``min_size`` bytes found anywhere in a checkpoint
+    value (state fields, message contents, plan steps) are written to the
+    blob store and replaced by a reference; the checkpointer itself only
+    holds the references. Strings written recently are remembered, so a
+    value carried over from step to step is hashed and compressed once.
+
+    References are resolved when LangGraph loads a checkpoint, i.e. when a
+    thread is resumed or its history is read: channels hand nodes plain
+    values, so they cannot be resolved later than that. Resolved strings
+    are kept in a small LRU cache, which makes the checkpoints of one
+    thread share a single copy of each value instead of one copy each.
+    """
+
+    def __init__(
+        self,
+        store: BlobStore,
+        min_size: int = DEFAULT_MIN_BLOB_SIZE,
+        cache_size: int = 256,
+        **kwargs: Any,
+    ):
+        super().__init__(**kwargs)
+        self.store = store
+        self.min_size = min_size
+        self._cache: OrderedDict[str, str] = OrderedDict()
+        self._cache_size = cache_size
+        self._cache_lock = threading.Lock()
+        # Recently offloaded strings and their references
+        self._offloaded: OrderedDict[str, str] = OrderedDict()
+
+    def dumps_typed(self, obj: Any) -> tuple[str, bytes]:
+        return super().dumps_typed(self._offload(obj))
+
+    def loads_typed(self, data: tuple[str, bytes]) -> Any:
+        return self._restore(super().loads_typed(data))
+
+    def _offload(self, obj: Any) -> Any:
+        if isinstance(obj, str):
+            # Cheap length check first: a UTF-8 character is at most 4 bytes.
+            if len(obj) * 4 < self.min_size:
+                return obj
+            with self._cache_lock:
+                ref = self._offloaded.get(obj)
+                if ref is not None:
+                    self._offloaded.move_to_end(obj)
+                    return ref
+            data = obj.encode()
+            if len(data) < self.min_size or obj.startswith(BLOB_REF_PREFIX):
+                return obj
+            ref = BLOB_REF_PREFIX + self.store.put(data)
+            with self._cache_lock:
+                self._offloaded[obj] = ref
+                if len(self._offloaded) > self._cache_size:
+                    self._offloaded.popitem(last=False)
+            return ref
+        return _transform(obj, self._offload)
+
+    def _restore(self, obj: Any) -> Any:
+        if isinstance(obj, str):
+            if obj.startswith(BLOB_REF_PREFIX):
+                return self._load_blob(obj[len(BLOB_REF_PREFIX) :])
+            return obj
+        return _transform(obj, self._restore)
+
+    def _load_blob(self, key: str) -> str:
+        with self._cache_lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+        value = self.store.get(key).decode()
+        with self._cache_lock:
+            self._cache[key] = value
+            if len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+        return value
+
+
+def _transform(obj: Any, fn) -> Any:
+    """Apply ``fn`` to the children of a container, keeping unchanged objects."""
+    if type(obj) is dict:
+        items = {k: fn(v) for k, v in obj.items()}
+        if all(items[k] is v for k, v in obj.items()):
+            return obj
+        return items
+    if type(obj) in (list, tuple):
+        values = [fn(v) for v in obj]
+        if all(new is old for new, old in zip(values, obj)):
+            return obj
+        return values if isinstance(obj, list) else tuple(values)
+    if isinstance(obj, BaseModel):
+        updates = {}
+        for name, value in obj.__dict__.items():
+            new_value = fn(value)
+            if new_value is not value:
+                updates[name] = new_value
+        return obj.model_copy(update=updates) if updates else obj
+    return obj
+
+
+def build_checkpoint_serializer() -> JsonPlusSerializer | None:
+    """
+    Build the checkpoint serializer selected by environment variables.
+
+    ``CHECKPOINT_BLOB_STORE`` selects the store (``sqlite`` or ``disk``),
+    ``CHECKPOINT_BLOB_PATH`` its location, ``CHECKPOINT_BLOB_MIN_SIZE``
+    the size in bytes from which strings are stored out of line and
+    ``CHECKPOINT_BLOB_TTL`` the age in seconds after which unused blobs are
+    pruned at startup (0 keeps them). Returns None when out-of-line storage
+    is not enabled.
+    """
+    store_type = os.getenv("CHECKPOINT_BLOB_STORE", "").lower()
+    if not store_type:
+        return None
+
+    path = os.getenv("CHECKPOINT_BLOB_PATH", ".cache/checkpoint_blobs")
+    if store_type == "sqlite":
+        store = SQLiteBlobStore(
+            path if path == ":memory:" else str(Path(path) / "blobs.sqlite3")
+        )
+    elif store_type == "disk":
+        store = DiskBlobStore(path)
+    else:
+        raise ValueError(f"Unsupported checkpoint blob store: {store_type}")
+
+    ttl = float(os.getenv("CHECKPOINT_BLOB_TTL", DEFAULT_BLOB_TTL))
+    if ttl > 0:
+        pruned = store.prune(ttl)
+        if pruned:
+            logger.info(f"Pruned {pruned} checkpoint blobs older than {ttl:g}s")
+
+    min_size = int(os.getenv("CHECKPOINT_BLOB_MIN_SIZE", DEFAULT_MIN_BLOB_SIZE))
+    logger.info(
+        f"Storing checkpoint values >= {min_size} bytes out of line "
+        f"({store_type} blob store at {path})"
+    )
+    return BlobOffloadingSerializer(store, min_size=min_size)
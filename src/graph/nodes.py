@@ -1,31 +1,51 @@
 # Copyright (c) 2025 Peter Liu
 # SPDX-License-Identifier: MIT
 
+import asyncio
 import json
 import logging
 import os
-from typing import Annotated, Literal
+import re
+import time
+from typing import Annotated, Literal, Optional
 
 from langchain_core.messages import AIMessage, HumanMessage
 from langchain_core.runnables import RunnableConfig
 from langchain_core.tools import tool
+from langgraph.config import get_stream_writer
 from langgraph.types import Command, interrupt
 from langchain_mcp_adapters.client import MultiServerMCPClient
+from pydantic import ValidationError
 
 from src.agents import create_agent
 from src.tools import (
     crawl_tool,
+    fetch_full_text_tool,
     get_web_search_tool,
     get_retriever_tool,
     python_repl_tool,
 )
+from src.tools.background_search import investigate
+from src.tools.research_memory import (
+    memory_enabled,
+    record_tool_messages,
+    research_memory_search_tool,
+)
 
-from src.config.agents import AGENT_LLM_MAP
+from src.config.agents import (
+    AGENT_CONTEXT_TOKEN_BUDGET,
+    AGENT_LLM_MAP,
+    DEFAULT_CONTEXT_TOKEN_BUDGET,
+)
 from src.config.configuration import Configuration
 from src.llms.llm import get_llm_by_type
 from src.prompts.planner_model import Plan, StepType
 from src.prompts.template import apply_prompt_template
+from src.utils.context_assembler import assemble_findings, count_message_tokens
+from src.utils.json_stream import IncrementalObjectParser
 from src.utils.json_utils import repair_json_output
+from src.utils.log_pipeline import capped
+from src.utils.metrics import SPECULATIVE_INVESTIGATIONS, SPECULATIVE_SAVED
 from src.utils.template_loader import TemplateLoader
 
 from .types import State
@@ -44,64 +64,81 @@ def handoff_to_planner(
     return
 
 
-def background_investigation_node(state: State, config: RunnableConfig):
+async def background_investigation_node(state: State, config: RunnableConfig):
     logger.info("background investigation node is running.")
     configurable = Configuration.from_runnable_config(config)
     query = state.get("research_topic")
-    
-    # Get the web search tool
-    search_tool = get_web_search_tool(configurable.max_search_results)
-    
     try:
-        # Invoke the search tool properly
-        searched_content = search_tool.invoke({"query": query})
-        
-        # Handle the response - it could be a list or a string depending on the tool
-        if isinstance(searched_content, list):
-            # Handle both page and image results from our enhanced search
-            background_investigation_results = []
-            for elem in searched_content:
-                if elem.get('type') == 'page':
-                    background_investigation_results.append(
-                        f"## {elem['title']}\n\n{elem['content']}"
-                    )
-                elif elem.get('type') == 'image':
-                    background_investigation_results.append(
-                        f"![{elem['image_description']}]({elem['image_url']})"
-                    )
-                # Fallback for legacy format without 'type' field
-                elif 'title' in elem and 'content' in elem:
-                    background_investigation_results.append(
-                        f"## {elem['title']}\n\n{elem['content']}"
-                    )
-            
-            return {
-                "background_investigation_results": "\n\n".join(
-                    background_investigation_results
-                )
-            }
-        elif isinstance(searched_content, str):
-            # Handle string responses (e.g., from other search engines)
-            return {
-                "background_investigation_results": searched_content
-            }
-        else:
-            logger.error(
-                f"Search tool returned unexpected response type: {type(searched_content)}, content: {searched_content}"
-            )
-            return {
-                "background_investigation_results": json.dumps(
-                    searched_content, ensure_ascii=False
-                )
-            }
+        results = await investigate(query, configurable.max_search_results)
     except Exception as e:
         logger.error(f"Error in background investigation: {e}")
-        return {
-            "background_investigation_results": f"Error occurred during background investigation: {str(e)}"
-        }
+        results = f"Error occurred during background investigation: {str(e)}"
+    return {"background_investigation_results": results}
+
+
+# Words of three or more letters; CJK text has no spaces, so single characters
+_TOPIC_TERM = re.compile(r"[\u4e00-\u9fff]|[^\W_\u4e00-\u9fff]{3,}")
+
+
+def _topics_equivalent(first: str, second: str) -> bool:
+    """Whether two research topics share enough words to share search results."""
+    first_terms = set(_TOPIC_TERM.findall(first.casefold()))
+    second_terms = set(_TOPIC_TERM.findall(second.casefold()))
+    if not first_terms or not second_terms:
+        return first.strip().casefold() == second.strip().casefold()
+    similarity = len(first_terms & second_terms) / len(first_terms | second_terms)
+    return similarity >= float(os.getenv("SPECULATIVE_TOPIC_SIMILARITY", "0.6"))
+
 
+class _SpeculativeInvestigation:
+    """
+    A background investigation of the raw request, started together with the
+    coordinator instead of after it.
+    """
 
-def planner_node(
+    def __init__(self, query: str, configurable: Configuration):
+        self.query = query
+        self.started = time.perf_counter()
+        self.finished: Optional[float] = None
+        self.task = asyncio.create_task(self._run(configurable))
+
+    async def _run(self, configurable: Configuration) -> str:
+        try:
+            return await investigate(self.query, configurable.max_search_results)
+        except Exception as e:
+            logger.error(f"Error in background investigation: {e}")
+            return f"Error occurred during background investigation: {str(e)}"
+        finally:
+            self.finished = time.perf_counter()
+
+    async def result_for(self, research_topic: str) -> Optional[str]:
+        """
+        The results if the coordinator's topic matches the searched query,
+        else None; the search is cancelled then.
+        """
+        if not _topics_equivalent(self.query, research_topic):
+            logger.info(
+                f"Discarding speculative investigation: '{self.query}' does not "
+                f"match research topic '{research_topic}'"
+            )
+            self.cancel("discarded")
+            return None
+        coordinator_done = time.perf_counter()
+        results = await self.task
+        # Without speculation the whole search would have followed the coordinator
+        saved = min(self.finished, coordinator_done) - self.started
+        SPECULATIVE_INVESTIGATIONS.inc(outcome="kept")
+        SPECULATIVE_SAVED.observe(saved)
+        logger.info(f"Speculative investigation kept, saved {saved:.2f}s")
+        return results
+
+    def cancel(self, outcome: str = "cancelled"):
+        if not self.task.done():
+            self.task.cancel()
+        SPECULATIVE_INVESTIGATIONS.inc(outcome=outcome)
+
+
+async def planner_node(
     state: State, config: RunnableConfig
 ) -> Command[Literal["human_feedback", "reporter"]]:
     """Planner node that generate the full plan."""
@@ -139,10 +176,9 @@ def planner_node(
     if configurable.enable_deep_thinking:
         llm = get_llm_by_type("reasoning")
     elif AGENT_LLM_MAP["planner"] == "basic":
-        llm = get_llm_by_type("basic").with_structured_output(
-            Plan,
-            method="json_mode",
-        )
+        # JSON mode, as with_structured_output(Plan, method="json_mode") binds it,
+        # but streamed so that steps are parsed while the plan is generated
+        llm = get_llm_by_type("basic").bind(response_format={"type": "json_object"})
     else:
         llm = get_llm_by_type(AGENT_LLM_MAP["planner"])
 
@@ -150,67 +186,59 @@ def planner_node(
     if plan_iterations >= configurable.max_plan_iterations:
         return Command(goto="reporter")
 
-    full_response = ""
-    structured_output_used = False
-    
-    if AGENT_LLM_MAP["planner"] == "basic" and not configurable.enable_deep_thinking:
-        try:
-            logger.debug("Invoking structured output LLM for planner")
-            response = llm.invoke(messages)
-            
-            # Handle different response types
-            if hasattr(response, 'model_dump_json'):
-                full_response = response.model_dump_json(indent=4, exclude_none=True)
-                structured_output_used = True
-            elif isinstance(response, dict):
-                full_response = json.dumps(response, indent=4)
-                structured_output_used = True
-            else:
-                # Fallback for unexpected response types
-                content = getattr(response, 'content', str(response))
-                full_response = content if isinstance(content, str) else str(content)
-                
-            # Check for empty response
-            if not full_response or not full_response.strip():
-                logger.error("LLM returned empty response")
-                return Command(goto="__end__")
-                
-        except Exception as e:
-            logger.error(f"Error invoking planner LLM: {e}")
-            return Command(goto="__end__")
-    else:
+    # Steps can only start before the plan is complete if nobody reviews it
+    dispatch = (
+        configurable.enable_early_step_dispatch and state.get("auto_accepted_plan")
+    )
+    early_step = None
+    writer = get_stream_writer()
+    parser = IncrementalObjectParser(item_fields=["steps"])
+
+    try:
         try:
-            response = llm.stream(messages)
-            for chunk in response:
-                if hasattr(chunk, 'content'):
-                    full_response += chunk.content
-                else:
-                    full_response += str(chunk)
-                    
+            async for chunk in llm.astream(messages):
+                content = chunk.content if hasattr(chunk, "content") else str(chunk)
+                if not isinstance(content, str):
+                    continue
+                for event in parser.feed(content):
+                    if event[0] != "item":
+                        continue
+                    _, _, index, step = event
+                    # Partial plan for the UI, one event per completed step
+                    writer(
+                        {
+                            "plan_step": {
+                                "index": index,
+                                "step": step,
+                                "title": parser.fields.get("title"),
+                            }
+                        }
+                    )
+                    if dispatch and index == 0:
+                        early_step = _EarlyStep.start(state, config, parser.fields, step)
+
             # Check for empty response
-            if not full_response or not full_response.strip():
+            if not parser.text.strip():
                 logger.error("LLM returned empty streamed response")
                 return Command(goto="__end__")
-                
+
         except Exception as e:
             logger.error(f"Error streaming planner response: {e}")
             return Command(goto="__end__")
-    
-    logger.debug(f"Current state messages: {state['messages']}")
-    logger.info(f"Planner response: {full_response}")
 
-    try:
-        # For structured output, the response is already valid JSON
-        if structured_output_used:
-            curr_plan = json.loads(full_response)
-        else:
-            # Try to repair JSON if needed
-            repaired_json = repair_json_output(full_response)
-            if not repaired_json or not repaired_json.strip():
-                logger.error(f"Failed to repair JSON from response: {full_response[:200]}")
+        full_response = parser.text
+        logger.debug(f"Current state messages: {state['messages']}")
+        logger.info(f"Planner response: {full_response}")
+
+        # Parsed as it streamed; repaired only if the stream was not valid JSON
+        curr_plan = parser.result()
+        if curr_plan is None:
+            logger.error(f"Failed to repair JSON from response: {full_response[:200]}")
+            if plan_iterations > 0:
+                return Command(goto="reporter")
+            else:
                 return Command(goto="__end__")
-            curr_plan = json.loads(repaired_json)
-            
+
         # Validate required fields
         required_fields = ["locale", "has_enough_context", "thought", "title", "steps"]
         missing_fields = [field for field in required_fields if field not in curr_plan]
@@ -220,50 +248,103 @@ def planner_node(
                 return Command(goto="reporter")
             else:
                 return Command(goto="__end__")
-                
-    except (json.JSONDecodeError, KeyError, TypeError) as e:
-        logger.error(f"Error parsing planner response: {e}")
-        if plan_iterations > 0:
-            return Command(goto="reporter")
-        else:
-            return Command(goto="__end__")
-    
-    if curr_plan.get("has_enough_context"):
-        logger.info("Planner response has enough context.")
-        new_plan = Plan.model_validate(curr_plan)
-        
-        # Extract template information from plan or use user-selected template
-        template_update = {}
-        template_id = curr_plan.get("selected_template_id") or configurable.selected_template_id
-        
-        if template_id:
-            template_update["selected_template_id"] = template_id
-            # Load the full template details
-            selected_template = template_loader.get_template_by_id(template_id)
-            if selected_template:
-                template_update["selected_template"] = selected_template
-                logger.info(f"Selected template: {template_id} - {selected_template.get('use_case', 'Unknown')}")
-        
-        # Send the cleaned JSON to frontend, not the raw response
+
+        if curr_plan.get("has_enough_context"):
+            logger.info("Planner response has enough context.")
+            new_plan = Plan.model_validate(curr_plan)
+            
+            # Extract template information from plan or use user-selected template
+            template_update = {}
+            template_id = curr_plan.get("selected_template_id") or configurable.selected_template_id
+            
+            if template_id:
+                template_update["selected_template_id"] = template_id
+                # Load the full template details
+                selected_template = template_loader.get_template_by_id(template_id)
+                if selected_template:
+                    template_update["selected_template"] = selected_template
+                    logger.info(f"Selected template: {template_id} - {selected_template.get('use_case', 'Unknown')}")
+            
+            # Send the cleaned JSON to frontend, not the raw response
+            clean_response = json.dumps(curr_plan, indent=2, ensure_ascii=False)
+            return Command(
+                update={
+                    "messages": [AIMessage(content=clean_response, name="planner")],
+                    "current_plan": new_plan,
+                    **template_update
+                },
+                goto="reporter",
+            )
+
+        # Send the cleaned JSON to frontend for human feedback
         clean_response = json.dumps(curr_plan, indent=2, ensure_ascii=False)
-        return Command(
-            update={
-                "messages": [AIMessage(content=clean_response, name="planner")],
-                "current_plan": new_plan,
-                **template_update
-            },
-            goto="reporter",
-        )
-    
-    # Send the cleaned JSON to frontend for human feedback
-    clean_response = json.dumps(curr_plan, indent=2, ensure_ascii=False)
-    return Command(
-        update={
+        update = {
             "messages": [AIMessage(content=clean_response, name="planner")],
             "current_plan": curr_plan,
-        },
-        goto="human_feedback",
-    )
+        }
+        step_update = None
+        if early_step is not None and early_step.matches(curr_plan):
+            step_update = await early_step.result()
+        if step_update:
+            # The research team continues with the second step
+            curr_plan["steps"][0]["execution_res"] = early_step.execution_res
+            update["messages"] += step_update["messages"]
+            update["observations"] = step_update["observations"]
+        return Command(update=update, goto="human_feedback")
+    finally:
+        if early_step is not None:
+            early_step.cancel()
+
+
+class _EarlyStep:
+    """The first step of a plan, started while the planner is still streaming."""
+
+    def __init__(self, step: dict, plan: Plan, task: asyncio.Task):
+        self.step = step
+        self.plan = plan
+        self.task = task
+
+    @classmethod
+    def start(
+        cls, state: State, config: RunnableConfig, plan_fields: dict, step: dict
+    ) -> Optional["_EarlyStep"]:
+        """Start the step's agent, or return None if it cannot start yet."""
+        # The plan header precedes the steps; without it the step can't be judged
+        if plan_fields.get("has_enough_context") is not False:
+            return None
+        try:
+            plan = Plan.model_validate({**plan_fields, "steps": [step]})
+        except ValidationError as e:
+            logger.debug(f"Not starting the first step early: {e}")
+            return None
+        node = _STEP_NODES.get(plan.steps[0].step_type)
+        if node is None:
+            return None
+        logger.info(f"Starting step '{plan.steps[0].title}' while planning")
+        task = asyncio.create_task(node({**state, "current_plan": plan}, config))
+        return cls(step, plan, task)
+
+    def matches(self, curr_plan: dict) -> bool:
+        steps = curr_plan.get("steps") or []
+        return bool(steps) and steps[0] == self.step
+
+    @property
+    def execution_res(self) -> Optional[str]:
+        return self.plan.steps[0].execution_res
+
+    async def result(self) -> Optional[dict]:
+        """Wait for the step and return its state update, None if it failed."""
+        try:
+            command = await self.task
+        except Exception as e:
+            logger.error(f"Early step '{self.plan.steps[0].title}' failed: {e}")
+            return None
+        return command.update if self.execution_res else None
+
+    def cancel(self):
+        if not self.task.done():
+            logger.info(f"Cancelling early step '{self.plan.steps[0].title}'")
+            self.task.cancel()
 
 
 def human_feedback_node(
@@ -336,18 +417,34 @@ def human_feedback_node(
     )
 
 
-def coordinator_node(
+async def coordinator_node(
     state: State, config: RunnableConfig
 ) -> Command[Literal["planner", "background_investigator", "__end__"]]:
     """Coordinator node that communicate with customers."""
     logger.info("Coordinator talking.")
     configurable = Configuration.from_runnable_config(config)
     messages = apply_prompt_template("coordinator", state, configurable)
-    response = (
-        get_llm_by_type(AGENT_LLM_MAP["coordinator"])
-        .bind_tools([handoff_to_planner])
-        .invoke(messages)
-    )
+
+    # The search query is almost always the request itself, so the background
+    # investigation can run while the coordinator decides on the hand-off
+    speculation = None
+    if configurable.enable_speculative_investigation and state.get(
+        "enable_background_investigation"
+    ):
+        raw_request = state.get("research_topic") or ""
+        if raw_request.strip():
+            speculation = _SpeculativeInvestigation(raw_request, configurable)
+
+    try:
+        response = await (
+            get_llm_by_type(AGENT_LLM_MAP["coordinator"])
+            .bind_tools([handoff_to_planner])
+            .ainvoke(messages)
+        )
+    except BaseException:
+        if speculation is not None:
+            speculation.cancel()
+        raise
     logger.debug(f"Current state messages: {state['messages']}")
 
     goto = "__end__"
@@ -378,15 +475,22 @@ def coordinator_node(
         )
         logger.debug(f"Coordinator response: {response}")
 
-    return Command(
-        update={
-            "locale": locale,
-            "research_topic": research_topic,
-            "resources": configurable.resources,
-            "user_background": user_background,
-        },
-        goto=goto,
-    )
+    update = {
+        "locale": locale,
+        "research_topic": research_topic,
+        "resources": configurable.resources,
+        "user_background": user_background,
+    }
+    if speculation is not None:
+        if goto == "background_investigator":
+            results = await speculation.result_for(research_topic)
+            if results is not None:
+                update["background_investigation_results"] = results
+                goto = "planner"
+        else:
+            speculation.cancel()
+
+    return Command(update=update, goto=goto)
 
 
 def reporter_node(state: State, config: RunnableConfig):
@@ -435,6 +539,19 @@ def research_team_node(state: State):
     pass
 
 
+def _get_context_token_budget(agent_name: str, configurable: Configuration) -> int:
+    """Resolve the token budget for the findings block of an agent step."""
+    if configurable.context_token_budget:
+        try:
+            return int(configurable.context_token_budget)
+        except (TypeError, ValueError):
+            logger.warning(
+                f"Invalid context_token_budget value: "
+                f"'{configurable.context_token_budget}'. Using the agent default."
+            )
+    return AGENT_CONTEXT_TOKEN_BUDGET.get(agent_name, DEFAULT_CONTEXT_TOKEN_BUDGET)
+
+
 async def _execute_agent_step(
     state: State, agent, agent_name: str, configurable: Configuration
 ) -> Command[Literal["research_team"]]:
@@ -458,13 +575,18 @@ async def _execute_agent_step(
 
     logger.info(f"Executing step: {current_step.title}, agent: {agent_name}")
 
-    # Format completed steps information
-    completed_steps_info = ""
+    # Format completed steps information within the agent's token budget
+    context_budget = _get_context_token_budget(agent_name, configurable)
+    assembled_context = assemble_findings(
+        [(step.title, step.execution_res) for step in completed_steps],
+        budget=context_budget,
+    )
+    completed_steps_info = assembled_context.text
     if completed_steps:
-        completed_steps_info = "# Existing Research Findings\n\n"
-        for i, step in enumerate(completed_steps):
-            completed_steps_info += f"## Existing Finding {i + 1}: {step.title}\n\n"
-            completed_steps_info += f"<finding>\n{step.execution_res}\n</finding>\n\n"
+        logger.info(
+            f"Context for step '{current_step.title}' ({agent_name}): "
+            f"{assembled_context.summary()}"
+        )
 
     # Prepare the input for the agent with completed steps info
     agent_input = {
@@ -544,16 +666,39 @@ async def _execute_agent_step(
         )
         recursion_limit = default_recursion_limit
 
-    logger.info(f"Agent input: {agent_input}")
+    # The agent renders its system prompt itself; count the messages built
+    # here, which are the part of the prompt that grows with the research
+    input_tokens = count_message_tokens(agent_input["messages"])
+    logger.info(
+        f"Input size for step '{current_step.title}' ({agent_name}): "
+        f"{input_tokens} tokens (findings budget {context_budget})"
+    )
+    logger.debug("Agent input: %s", capped(agent_input))
     
     # Initialize response_content to handle both success and error cases
     response_content = ""
     
     try:
+        # The agent name tags the agent's runs, so streamed tokens can be
+        # attributed to it even when the step runs inside another node; the
+        # step lets tools such as crawl_tool rank content against it
         result = await agent.ainvoke(
-            input=agent_input, config={"recursion_limit": recursion_limit}
+            input=agent_input,
+            config={
+                "recursion_limit": recursion_limit,
+                "metadata": {
+                    "agent": agent_name,
+                    "research_step": f"{current_step.title}\n{current_step.description}",
+                },
+            },
         )
 
+        # Keep what the agent's tools retrieved for the following steps
+        try:
+            record_tool_messages(result["messages"])
+        except Exception as e:
+            logger.warning(f"Could not record tool results of {agent_name}: {e}")
+
         # Process the result
         response_content = result["messages"][-1].content
         logger.debug(f"{agent_name.capitalize()} full response: {response_content}")
@@ -565,7 +710,7 @@ async def _execute_agent_step(
     except Exception as e:
         # Log the full error details for debugging
         logger.error(f"Error executing {agent_name} agent: {str(e)}")
-        logger.error(f"Agent input that caused error: {agent_input}")
+        logger.error("Agent input that caused error: %s", capped(agent_input))
         
         # Provide a more informative error message
         error_msg = f"Agent execution failed due to: {str(e)}. This is likely a tool configuration issue."
@@ -612,6 +757,8 @@ async def _setup_and_execute_agent_step(
     configurable = Configuration.from_runnable_config(config)
     mcp_servers = {}
     enabled_tools = {}
+    # The prompts only mention research memory when the tool is available
+    prompt_vars = {"research_memory": research_memory_search_tool in default_tools}
 
     # Extract MCP server configuration for this agent type
     if configurable.mcp_settings:
@@ -638,11 +785,15 @@ async def _setup_and_execute_agent_step(
                         f"Powered by '{enabled_tools[tool.name]}'.\n{tool.description}"
                     )
                     loaded_tools.append(tool)
-            agent = create_agent(agent_type, agent_type, loaded_tools, agent_type)
+            agent = create_agent(
+                agent_type, agent_type, loaded_tools, agent_type, prompt_vars
+            )
             return await _execute_agent_step(state, agent, agent_type, configurable)
     else:
         # Use default tools if no MCP servers are configured
-        agent = create_agent(agent_type, agent_type, default_tools, agent_type)
+        agent = create_agent(
+            agent_type, agent_type, default_tools, agent_type, prompt_vars
+        )
         return await _execute_agent_step(state, agent, agent_type, configurable)
 
 
@@ -659,12 +810,16 @@ async def researcher_node(
     
     default_tools = [
         crawl_tool,
+        fetch_full_text_tool,
         get_web_search_tool(Configuration.from_runnable_config(config).max_search_results),
         get_enhanced_outreach_search_tool(),
         get_linkedin_search_tool(),
         get_twitter_search_tool(),
     ]
 
+    if memory_enabled():
+        default_tools.append(research_memory_search_tool)
+
     # Conditionally add the retriever tool only if there are resources to search
     if state.get("resources"):
         default_tools.append(get_retriever_tool(state["resources"]))
@@ -753,6 +908,8 @@ async def strategizer_node(
         communication_style_tool,
         expertise_insights_tool,
     ]
+    if memory_enabled():
+        tools.append(research_memory_search_tool)
 
     return await _setup_and_execute_agent_step(
         state,
@@ -772,5 +929,15 @@ async def coder_node(
     )
 
 
+# Agent node for each step type, matching continue_to_running_research_team
+_STEP_NODES = {
+    StepType.RESEARCH: researcher_node,
+    StepType.PROCESSING: coder_node,
+    StepType.PERSONA_RESEARCH: researcher_node,
+    StepType.STRATEGY_FORMULATION: strategizer_node,
+    StepType.MESSAGE_DRAFTING: strategizer_node,
+}
+
+
 # Note: This function has been moved to builder.py where it's actually used.
 # The routing logic is now handled directly in the graph builder.
\ No newline at end of file
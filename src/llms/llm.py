@@ -1,24 +1,37 @@
 # Copyright (c) 2025 Peter Liu
 # SPDX-License-Identifier: MIT
 
-from pathlib import Path
 from typing import Any, Dict
+from urllib.parse import urlparse
 import os
 
 from langchain_openai import ChatOpenAI, AzureChatOpenAI
 from langchain_deepseek import ChatDeepSeek
 from typing import get_args
 
-from src.config import load_yaml_config
 from src.config.agents import LLMType
+from src.config.settings import DEFAULT_CONF_PATH, get_settings, on_settings_change
+from src.llms.pool import LLMPool
+from src.llms.simulated import SimulatedChatModel, create_simulated_llm
 
-# Cache for LLM instances
+# Cache for LLM instances, dropped when conf.yaml or the settings change
 _llm_cache: dict[LLMType, ChatOpenAI] = {}
+on_settings_change(lambda settings: _llm_cache.clear())
+
+# LLMPool options that may be set next to the endpoints of an LLM type
+_POOL_KEYS = (
+    "hedge",
+    "hedge_percentile",
+    "hedge_delay",
+    "hedge_min_delay",
+    "failure_threshold",
+    "failure_cooldown",
+)
 
 
 def _get_config_file_path() -> str:
     """Get the path to the configuration file."""
-    return str((Path(__file__).parent.parent.parent / "conf.yaml").resolve())
+    return DEFAULT_CONF_PATH
 
 
 def _get_llm_type_config_keys() -> dict[str, str]:
@@ -27,27 +40,28 @@ def _get_llm_type_config_keys() -> dict[str, str]:
         "reasoning": "REASONING_MODEL",
         "basic": "BASIC_MODEL",
         "vision": "VISION_MODEL",
+        "simulated": "SIMULATED_MODEL",
     }
 
 
+def _use_simulated_llm() -> bool:
+    """Whether every LLM type is served by the simulated model."""
+    return os.getenv("USE_SIMULATED_LLM", "").lower() in ("1", "true", "yes")
+
+
 def _get_env_llm_conf(llm_type: str) -> Dict[str, Any]:
     """
     Get LLM configuration from environment variables.
     Environment variables should follow the format: {LLM_TYPE}__{KEY}
     e.g., BASIC_MODEL__api_key, BASIC_MODEL__base_url
+    They are collected once per settings snapshot, not on every call.
     """
-    prefix = f"{llm_type.upper()}_MODEL__"
-    conf = {}
-    for key, value in os.environ.items():
-        if key.startswith(prefix):
-            conf_key = key[len(prefix) :].lower()
-            conf[conf_key] = value
-    return conf
+    return dict(get_settings().llm_env.get(llm_type, {}))
 
 
 def _create_llm_use_conf(
     llm_type: LLMType, conf: Dict[str, Any]
-) -> ChatOpenAI | ChatDeepSeek:
+) -> ChatOpenAI | ChatDeepSeek | SimulatedChatModel | LLMPool:
     """Create LLM instance using configuration."""
     llm_type_config_keys = _get_llm_type_config_keys()
     config_key = llm_type_config_keys.get(llm_type)
@@ -65,9 +79,75 @@ def _create_llm_use_conf(
     # Merge configurations, with environment variables taking precedence
     merged_conf = {**llm_conf, **env_conf}
 
+    # The simulated model works without any configuration
+    if llm_type == "simulated" and "endpoints" not in merged_conf:
+        return create_simulated_llm(merged_conf)
+
     if not merged_conf:
         raise ValueError(f"No configuration found for LLM type: {llm_type}")
 
+    pool_conf = {k: merged_conf.pop(k) for k in _POOL_KEYS if k in merged_conf}
+    endpoint_confs = _get_endpoint_confs(merged_conf)
+    if len(endpoint_confs) == 1:
+        return _create_client(llm_type, endpoint_confs[0])
+
+    # Endpoints are named in conf.yaml or after their host, never their key
+    names = [
+        c.pop("name", None) or urlparse(c.get("base_url") or "").netloc or llm_type
+        for c in endpoint_confs
+    ]
+    names = [
+        name if names.count(name) == 1 else f"{name}#{i}"
+        for i, name in enumerate(names)
+    ]
+    return LLMPool(
+        endpoints=[_create_client(llm_type, c) for c in endpoint_confs],
+        names=names,
+        **pool_conf,
+    )
+
+
+def _get_endpoint_confs(merged_conf: Dict[str, Any]) -> list[Dict[str, Any]]:
+    """
+    Split an LLM configuration into one configuration per endpoint.
+
+    Endpoints are listed under ``endpoints`` in conf.yaml, each overriding
+    the shared keys, or given as comma-separated ``base_url`` and
+    ``api_key`` values (e.g. BASIC_MODEL__base_url=https://a/v1,https://b/v1);
+    a single key is shared by every base_url.
+    """
+    endpoints = merged_conf.pop("endpoints", None) or [{}]
+    if not isinstance(endpoints, list):
+        raise ValueError(f"Invalid LLM endpoints: {endpoints}")
+    confs = [{**merged_conf, **endpoint} for endpoint in endpoints]
+    if len(confs) > 1:
+        return confs
+
+    lists = {
+        key: [v.strip() for v in confs[0][key].split(",") if v.strip()]
+        for key in ("base_url", "api_key")
+        if isinstance(confs[0].get(key), str) and "," in confs[0][key]
+    }
+    count = max((len(values) for values in lists.values()), default=1)
+    for key, values in lists.items():
+        if len(values) not in (1, count):
+            raise ValueError(
+                f"Expected 1 or {count} comma-separated values for {key}, "
+                f"got {len(values)}"
+            )
+    return [
+        {**confs[0], **{key: v[i % len(v)] for key, v in lists.items()}}
+        for i in range(count)
+    ]
+
+
+def _create_client(
+    llm_type: LLMType, merged_conf: Dict[str, Any]
+) -> ChatOpenAI | ChatDeepSeek | SimulatedChatModel:
+    """Create the client of one endpoint."""
+    if llm_type == "simulated":
+        return create_simulated_llm(merged_conf)
+
     # Handle Azure-specific configuration
     if "azure" in merged_conf.get("base_url", ""):
         return AzureChatOpenAI(
@@ -80,6 +160,7 @@ def _create_llm_use_conf(
         )
     
     if llm_type == "reasoning":
+        merged_conf = dict(merged_conf)
         merged_conf["api_base"] = merged_conf.pop("base_url", None)
         return ChatDeepSeek(**merged_conf)
     else:
@@ -91,16 +172,31 @@ def get_llm_by_type(
 ) -> ChatOpenAI:
     """
     Get LLM instance by type. Returns cached instance if available.
+
+    With USE_SIMULATED_LLM=true every type is served by the simulated model.
     """
+    if _use_simulated_llm():
+        llm_type = "simulated"
+
+    # Checks conf.yaml for changes, which clears the cache
+    settings = get_settings()
     if llm_type in _llm_cache:
         return _llm_cache[llm_type]
 
-    conf = load_yaml_config(_get_config_file_path())
-    llm = _create_llm_use_conf(llm_type, conf)
+    llm = _create_llm_use_conf(llm_type, settings.conf)
     _llm_cache[llm_type] = llm
     return llm
 
 
+def get_llm_pool_stats() -> dict[str, list[dict]]:
+    """Per-endpoint latency and error statistics of the pooled LLM types."""
+    return {
+        llm_type: llm.stats
+        for llm_type, llm in list(_llm_cache.items())
+        if isinstance(llm, LLMPool)
+    }
+
+
 def get_configured_llm_models() -> dict[str, list[str]]:
     """
     Get all configured LLM models grouped by type.
@@ -109,7 +205,7 @@ def get_configured_llm_models() -> dict[str, list[str]]:
         Dictionary mapping LLM type to list of configured model names.
     """
     try:
-        conf = load_yaml_config(_get_config_file_path())
+        conf = get_settings().conf
         llm_type_config_keys = _get_llm_type_config_keys()
 
         configured_models: dict[str, list[str]] = {}
@@ -0,0 +1,430 @@
+# Copyright (c) 2025 Peter Liu
+# SPDX-License-Identifier: MIT
+
+"""
+A chat model that spreads requests over several endpoints of one LLM type.
+
+Each request goes to the endpoint with the best score: its latency to the
+first output (EWMA of the first token when streaming, of the full response
+otherwise), scaled by the requests in flight and the recent error rate.
+Endpoints without samples are tried first; an endpoint that fails
+``failure_threshold`` times in a row is left out for ``failure_cooldown``
+seconds. A request that fails before any output is retried on the next
+endpoint.
+
+With ``hedge`` enabled, an async request that has produced no output after
+the ``hedge_percentile`` of its endpoint's recent latencies is sent to a
+second endpoint as well; the first one to answer wins and the other is
+cancelled.
+"""
+
+import asyncio
+import logging
+import math
+import threading
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterator, Optional, Sequence
+
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForLLMRun,
+    CallbackManagerForLLMRun,
+)
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import BaseMessage
+from langchain_core.output_parsers import JsonOutputParser, PydanticOutputParser
+from langchain_core.outputs import ChatGenerationChunk, ChatResult
+from pydantic import BaseModel, ConfigDict, Field, PrivateAttr
+
+from src.utils.metrics import LLM_ENDPOINT_REQUESTS, LLM_HEDGES
+
+logger = logging.getLogger(__name__)
+
+# Weight of the newest sample in the latency and error rate averages
+_ALPHA = 0.2
+# Latency samples needed before the hedge delay follows the percentile
+_MIN_HEDGE_SAMPLES = 20
+
+
+class EndpointStats:
+    """Observed latency and errors of one endpoint."""
+
+    def __init__(self, name: str, window: int = 200):
+        self.name = name
+        self.requests = 0
+        self.errors = 0
+        self.cancelled = 0
+        self.in_flight = 0
+        self.hedges = 0
+        self.hedges_won = 0
+        self.latency: Optional[float] = None
+        self.error_rate = 0.0
+        self.consecutive_errors = 0
+        self.cooldown_until = 0.0
+        self.samples = {
+            "stream": deque(maxlen=window),
+            "generate": deque(maxlen=window),
+        }
+
+    def success(self, kind: str, latency: float):
+        self.samples[kind].append(latency)
+        self.latency = (
+            latency
+            if self.latency is None
+            else (1 - _ALPHA) * self.latency + _ALPHA * latency
+        )
+        self.error_rate *= 1 - _ALPHA
+        self.consecutive_errors = 0
+        LLM_ENDPOINT_REQUESTS.inc(endpoint=self.name, outcome="ok")
+
+    def failure(self, threshold: int, cooldown: float):
+        self.errors += 1
+        self.error_rate = (1 - _ALPHA) * self.error_rate + _ALPHA
+        self.consecutive_errors += 1
+        if self.consecutive_errors >= threshold:
+            self.cooldown_until = time.monotonic() + cooldown
+        LLM_ENDPOINT_REQUESTS.inc(endpoint=self.name, outcome="error")
+
+    def cancelled_after(self, elapsed: float):
+        # A cancelled request took at least this long to produce output
+        self.cancelled += 1
+        if self.latency is None:
+            self.latency = elapsed
+        elif elapsed > self.latency:
+            self.latency = (1 - _ALPHA) * self.latency + _ALPHA * elapsed
+
+    def score(self, default: float) -> float:
+        """Lower is better; ``default`` stands in for an unknown latency."""
+        if self.latency is None and not self.errors:
+            return 0.0
+        latency = self.latency if self.latency is not None else default
+        return latency * (1 + self.in_flight) / max(0.05, 1 - self.error_rate)
+
+    def percentile(self, kind: str, q: float) -> Optional[float]:
+        samples = self.samples[kind]
+        if len(samples) < _MIN_HEDGE_SAMPLES:
+            return None
+        ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, math.ceil(q * len(ordered)) - 1)]
+
+    def to_dict(self) -> dict:
+        def ms(value: Optional[float]) -> Optional[float]:
+            return round(value * 1000, 1) if value is not None else None
+
+        stream = sorted(self.samples["stream"])
+        return {
+            "endpoint": self.name,
+            "requests": self.requests,
+            "errors": self.errors,
+            "error_rate": round(self.error_rate, 3),
+            "cancelled": self.cancelled,
+            "in_flight": self.in_flight,
+            "latency_ms": ms(self.latency),
+            "first_token_p50_ms": ms(stream[len(stream) // 2]) if stream else None,
+            "first_token_p95_ms": (
+                ms(stream[min(len(stream) - 1, int(0.95 * len(stream)))])
+                if stream
+                else None
+            ),
+            "hedges": self.hedges,
+            "hedges_won": self.hedges_won,
+            "cooling_down": self.cooldown_until > time.monotonic(),
+        }
+
+
+class LLMPool(BaseChatModel):
+    """Chat model routing each request to one of several equivalent endpoints."""
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    endpoints: list[BaseChatModel]
+    names: list[str] = Field(default_factory=list)
+    hedge: bool = False
+    """Send a duplicate of slow async requests to a second endpoint."""
+    hedge_percentile: float = 0.9
+    hedge_delay: float = 2.0
+    """Hedge delay until an endpoint has enough latency samples."""
+    hedge_min_delay: float = 0.2
+    failure_threshold: int = 3
+    failure_cooldown: float = 30.0
+
+    _stats: list[EndpointStats] = PrivateAttr()
+    _lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+
+    def model_post_init(self, __context: Any) -> None:
+        if not self.endpoints:
+            raise ValueError("An LLM pool needs at least one endpoint")
+        names = self.names or [f"endpoint-{i}" for i in range(len(self.endpoints))]
+        self._stats = [EndpointStats(name) for name in names]
+
+    @property
+    def _llm_type(self) -> str:
+        return "pool"
+
+    @property
+    def _identifying_params(self) -> dict[str, Any]:
+        return {"endpoints": [stats.name for stats in self._stats]}
+
+    @property
+    def stats(self) -> list[dict]:
+        return [stats.to_dict() for stats in self._stats]
+
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any):
+        # Endpoints share a client class; let the first one format the tools
+        return self.bind(**self.endpoints[0].bind_tools(tools, **kwargs).kwargs)
+
+    def with_structured_output(
+        self, schema: Any, *, method: str = "function_calling", **kwargs: Any
+    ):
+        if method != "json_mode":
+            return super().with_structured_output(schema, **kwargs)
+        llm = self.bind(response_format={"type": "json_object"})
+        if isinstance(schema, type) and issubclass(schema, BaseModel):
+            return llm | PydanticOutputParser(pydantic_object=schema)
+        return llm | JsonOutputParser()
+
+    # Routing
+
+    def _order(self) -> list[int]:
+        """Endpoint indices, best first; cooling down ones last."""
+        now = time.monotonic()
+        with self._lock:
+            known = [s.latency for s in self._stats if s.latency is not None]
+            default = max(known, default=self.hedge_delay)
+            return sorted(
+                range(len(self._stats)),
+                key=lambda i: (
+                    self._stats[i].cooldown_until > now,
+                    self._stats[i].score(default),
+                    self._stats[i].in_flight,
+                ),
+            )
+
+    def _begin(self, i: int) -> float:
+        with self._lock:
+            self._stats[i].requests += 1
+            self._stats[i].in_flight += 1
+        return time.perf_counter()
+
+    def _end(self, i: int):
+        with self._lock:
+            self._stats[i].in_flight -= 1
+
+    def _success(self, i: int, kind: str, start: float):
+        with self._lock:
+            self._stats[i].success(kind, time.perf_counter() - start)
+
+    def _failure(self, i: int, error: BaseException):
+        logger.warning(f"LLM endpoint {self._stats[i].name} failed: {error!r}")
+        with self._lock:
+            self._stats[i].failure(self.failure_threshold, self.failure_cooldown)
+
+    def _cancelled(self, i: int, start: float):
+        with self._lock:
+            self._stats[i].cancelled_after(time.perf_counter() - start)
+        LLM_ENDPOINT_REQUESTS.inc(endpoint=self._stats[i].name, outcome="cancelled")
+
+    def _hedge_delay(self, i: int, kind: str) -> float:
+        percentile = self._stats[i].percentile(kind, self.hedge_percentile)
+        delay = self.hedge_delay if percentile is None else percentile
+        return max(self.hedge_min_delay, delay)
+
+    async def _race(
+        self,
+        start: Callable[[int], Awaitable[Any]],
+        kind: str,
+        release: Optional[Callable[[int, Any], Awaitable[None]]] = None,
+    ) -> tuple[int, Any]:
+        """
+        Run ``start`` on the best endpoint, hedged on the next one if it is
+        slow, and fail over to the next ones on errors. Returns the index of
+        the endpoint that answered first and its result.
+
+        Every other attempt is cancelled and awaited before returning; the
+        results of attempts that succeeded too are passed to ``release``.
+        """
+        order = self._order()
+        tasks: dict[asyncio.Future, int] = {}
+        # Every attempt started, including finished ones
+        attempts: dict[asyncio.Future, int] = {}
+        winner: Optional[asyncio.Future] = None
+        error: Optional[BaseException] = None
+
+        def launch(i: int):
+            task = asyncio.ensure_future(start(i))
+            tasks[task] = attempts[task] = i
+
+        primary = order.pop(0)
+        launch(primary)
+        hedged = False
+        try:
+            while tasks:
+                timeout = None
+                if self.hedge and not hedged and order:
+                    timeout = self._hedge_delay(primary, kind)
+                done, _ = await asyncio.wait(
+                    tasks, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    hedged = True
+                    backup = order.pop(0)
+                    with self._lock:
+                        self._stats[backup].hedges += 1
+                    launch(backup)
+                    continue
+                for task in done:
+                    i = tasks.pop(task)
+                    if task.exception() is None:
+                        if hedged:
+                            won = i != primary
+                            if won:
+                                with self._lock:
+                                    self._stats[i].hedges_won += 1
+                            LLM_HEDGES.inc(outcome="won" if won else "lost")
+                        winner = task
+                        return i, task.result()
+                    error = task.exception()
+                if not tasks and order:
+                    # Fail over to the next endpoint
+                    launch(order.pop(0))
+            raise error
+        finally:
+            losers = [task for task in attempts if task is not winner]
+            for task in losers:
+                task.cancel()
+            # Attempts finishing along with the winner, or before their
+            # cancellation took effect, hold an open stream and a request slot
+            results = await asyncio.gather(*losers, return_exceptions=True)
+            for task, result in zip(losers, results):
+                if release is not None and not isinstance(result, BaseException):
+                    await release(attempts[task], result)
+
+    # Asynchronous API
+
+    async def _agenerate(
+        self,
+        messages: list[BaseMessage],
+        stop: Optional[list[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        async def start(i: int) -> ChatResult:
+            started = self._begin(i)
+            try:
+                result = await self.endpoints[i]._agenerate(
+                    messages, stop=stop, **kwargs
+                )
+            except asyncio.CancelledError:
+                self._cancelled(i, started)
+                raise
+            except Exception as e:
+                self._failure(i, e)
+                raise
+            finally:
+                self._end(i)
+            self._success(i, "generate", started)
+            return result
+
+        _, result = await self._race(start, "generate")
+        return result
+
+    async def _astream(
+        self,
+        messages: list[BaseMessage],
+        stop: Optional[list[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        async def start(i: int):
+            """Open a stream and wait for its first chunk."""
+            started = self._begin(i)
+            stream = self.endpoints[i]._astream(messages, stop=stop, **kwargs)
+            try:
+                first = await stream.__anext__()
+            except StopAsyncIteration:
+                first = None
+            except BaseException as e:
+                self._end(i)
+                if isinstance(e, asyncio.CancelledError):
+                    self._cancelled(i, started)
+                else:
+                    self._failure(i, e)
+                await stream.aclose()
+                raise
+            self._success(i, "stream", started)
+            return stream, first
+
+        async def release(i: int, result: tuple):
+            self._end(i)
+            await result[0].aclose()
+
+        i, (stream, first) = await self._race(start, "stream", release)
+        try:
+            chunk = first
+            while chunk is not None:
+                if run_manager:
+                    await run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+                yield chunk
+                chunk = await anext(stream, None)
+        except Exception as e:
+            self._failure(i, e)
+            raise
+        finally:
+            self._end(i)
+            await stream.aclose()
+
+    # Synchronous API: routing and fail-over, no hedging
+
+    def _generate(
+        self,
+        messages: list[BaseMessage],
+        stop: Optional[list[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        error: Optional[Exception] = None
+        for i in self._order():
+            started = self._begin(i)
+            try:
+                result = self.endpoints[i]._generate(messages, stop=stop, **kwargs)
+            except Exception as e:
+                self._failure(i, e)
+                error = e
+                continue
+            finally:
+                self._end(i)
+            self._success(i, "generate", started)
+            return result
+        raise error
+
+    def _stream(
+        self,
+        messages: list[BaseMessage],
+        stop: Optional[list[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        error: Optional[Exception] = None
+        for i in self._order():
+            started = self._begin(i)
+            yielded = False
+            try:
+                for chunk in self.endpoints[i]._stream(messages, stop=stop, **kwargs):
+                    if not yielded:
+                        yielded = True
+                        self._success(i, "stream", started)
+                    if run_manager:
+                        run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+                    yield chunk
+            except Exception as e:
+                self._failure(i, e)
+                if yielded:
+                    raise
+                error = e
+                continue
+            finally:
+                self._end(i)
+            if not yielded:
+                self._success(i, "stream", started)
+            return
+        raise error
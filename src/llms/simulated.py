@@ -0,0 +1,362 @@
+# Copyright (c) 2025 Peter Liu
+# SPDX-License-Identifier: MIT
+
+"""
+Scripted chat model with a latency model, for offline end-to-end runs.
+
+Responses come from fixtures: an ordered list of rules, each with a
+``when`` condition and a ``response`` (content and/or tool calls). The first
+rule whose condition matches the request is used. Conditions can check
+
+- ``tool``: name of a tool bound to the model (``*`` matches any tool)
+- ``json_mode``: whether JSON output was requested (``with_structured_output``)
+- ``after_tool``: whether the last message is a tool result
+- ``pattern``: a regular expression searched in the message contents
+
+Every response is delayed by ``ttft`` seconds before the first token and
+then streamed at ``tokens_per_second``.
+"""
+
+import asyncio
+import json
+import logging
+import re
+import time
+import uuid
+from pathlib import Path
+from typing import Any, AsyncIterator, Iterator, Optional, Sequence
+
+import yaml
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForLLMRun,
+    CallbackManagerForLLMRun,
+)
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import (
+    AIMessage,
+    AIMessageChunk,
+    BaseMessage,
+    ToolMessage,
+)
+from langchain_core.output_parsers import JsonOutputParser, PydanticOutputParser
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+from pydantic import BaseModel, Field
+
+logger = logging.getLogger(__name__)
+
+_TOKEN = re.compile(r"\S+\s*|\s+")
+
+# A default script for the outreach workflow: the coordinator hands off, the
+# planner returns a two-step plan, the strategizer calls one of its (offline)
+# tools, other agents answer directly and the reporter writes the report.
+DEFAULT_FIXTURES: list[dict] = [
+    {
+        "when": {"tool": "handoff_to_planner"},
+        "response": {
+            "tool_calls": [
+                {
+                    "name": "handoff_to_planner",
+                    "args": {
+                        "research_topic": "Personalized outreach to the recipient",
+                        "locale": "en-US",
+                    },
+                }
+            ]
+        },
+    },
+    {
+        "when": {"json_mode": True},
+        "response": {
+            "content": json.dumps(
+                {
+                    "locale": "en-US",
+                    "has_enough_context": False,
+                    "thought": "Research the recipient, then plan the approach.",
+                    "title": "Personalized Outreach Plan",
+                    "steps": [
+                        {
+                            "need_search": True,
+                            "title": "Recipient background",
+                            "description": "Collect role, recent activity and interests.",
+                            "step_type": "persona_research",
+                        },
+                        {
+                            "need_search": False,
+                            "title": "Outreach strategy",
+                            "description": "Choose channel, tone and value proposition.",
+                            "step_type": "strategy_formulation",
+                        },
+                    ],
+                }
+            )
+        },
+    },
+    {
+        "when": {"tool": "company_insights_tool", "after_tool": False},
+        "response": {
+            "tool_calls": [
+                {"name": "company_insights_tool", "args": {"company_name": "TechCorp"}}
+            ]
+        },
+    },
+    {
+        "when": {"tool": "*"},
+        "response": {
+            "content": (
+                "## Findings\n\n"
+                "- The recipient recently spoke about developer productivity.\n"
+                "- Their company announced a platform migration last quarter.\n"
+                "- They prefer concise, data-backed messages.\n"
+            )
+            * 4
+        },
+    },
+    {
+        "when": {},
+        "response": {
+            "content": (
+                "## Outreach Summary\n\n- Shared interest in developer tooling\n\n"
+                "## Outreach Message\n\nHi Sarah, I enjoyed your talk on developer "
+                "productivity and would love to share how we cut build times by 40%. "
+                "Would a 15-minute call next week work?\n\n## Sources\n\n"
+                "- [Conference talk](https://example.com/talk)\n"
+            )
+        },
+    },
+]
+
+
+def load_fixtures(path: str) -> list[dict]:
+    """Load fixture rules from a JSON or YAML file."""
+    with open(path, "r", encoding="utf-8") as f:
+        if Path(path).suffix in (".yaml", ".yml"):
+            fixtures = yaml.safe_load(f)
+        else:
+            fixtures = json.load(f)
+    if not isinstance(fixtures, list):
+        raise ValueError(f"Fixtures in {path} must be a list of rules")
+    return fixtures
+
+
+def _message_text(message: BaseMessage) -> str:
+    content = message.content
+    if isinstance(content, list):
+        return " ".join(
+            part.get("text", "") if isinstance(part, dict) else str(part)
+            for part in content
+        )
+    return str(content)
+
+
+class SimulatedChatModel(BaseChatModel):
+    """Chat model that answers from scripted fixtures with simulated latency."""
+
+    model: str = "simulated"
+    fixtures: list[dict] = Field(default_factory=lambda: list(DEFAULT_FIXTURES))
+    ttft: float = 0.5
+    """Seconds before the first token."""
+    tokens_per_second: float = 50.0
+    """Streaming speed after the first token; 0 disables the per-token delay."""
+
+    @property
+    def _llm_type(self) -> str:
+        return "simulated"
+
+    @property
+    def _identifying_params(self) -> dict[str, Any]:
+        return {
+            "model": self.model,
+            "ttft": self.ttft,
+            "tokens_per_second": self.tokens_per_second,
+        }
+
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any):
+        formatted_tools = [convert_to_openai_tool(tool) for tool in tools]
+        return self.bind(tools=formatted_tools, **kwargs)
+
+    def with_structured_output(
+        self, schema: Any, *, method: str = "json_mode", **kwargs: Any
+    ):
+        llm = self.bind(response_format={"type": "json_object"})
+        if isinstance(schema, type) and issubclass(schema, BaseModel):
+            return llm | PydanticOutputParser(pydantic_object=schema)
+        return llm | JsonOutputParser()
+
+    # Fixture selection
+
+    def _select(self, messages: list[BaseMessage], **kwargs: Any) -> dict:
+        tool_names = {
+            tool.get("function", {}).get("name") for tool in kwargs.get("tools") or []
+        }
+        response_format = kwargs.get("response_format") or {}
+        json_mode = response_format.get("type") in ("json_object", "json_schema")
+        after_tool = bool(messages) and isinstance(messages[-1], ToolMessage)
+        text = None
+
+        for rule in self.fixtures:
+            when = rule.get("when", {})
+            if "tool" in when:
+                if when["tool"] == "*" and not tool_names:
+                    continue
+                if when["tool"] != "*" and when["tool"] not in tool_names:
+                    continue
+            if "json_mode" in when and when["json_mode"] != json_mode:
+                continue
+            if "after_tool" in when and when["after_tool"] != after_tool:
+                continue
+            if "pattern" in when:
+                if text is None:
+                    text = "\n".join(_message_text(m) for m in messages)
+                if not re.search(when["pattern"], text):
+                    continue
+            return rule.get("response", {})
+
+        logger.warning("No simulated fixture matched, returning an empty response")
+        return {}
+
+    @staticmethod
+    def _tool_calls(response: dict) -> list[dict]:
+        return [
+            {
+                "name": call["name"],
+                "args": call.get("args", {}),
+                "id": call.get("id") or f"call_{uuid.uuid4().hex[:12]}",
+                "type": "tool_call",
+            }
+            for call in response.get("tool_calls", [])
+        ]
+
+    def _tokens(self, response: dict, tool_calls: list[dict]) -> list[str]:
+        tokens = _TOKEN.findall(response.get("content", ""))
+        for call in tool_calls:
+            tokens += _TOKEN.findall(json.dumps(call["args"]))
+        return tokens
+
+    def _token_delay(self) -> float:
+        return 1.0 / self.tokens_per_second if self.tokens_per_second > 0 else 0.0
+
+    def _usage(self, messages: list[BaseMessage], tokens: list[str]) -> dict:
+        input_tokens = sum(len(_TOKEN.findall(_message_text(m))) for m in messages)
+        return {
+            "input_tokens": input_tokens,
+            "output_tokens": len(tokens),
+            "total_tokens": input_tokens + len(tokens),
+        }
+
+    def _result(self, messages: list[BaseMessage], **kwargs: Any):
+        response = self._select(messages, **kwargs)
+        tool_calls = self._tool_calls(response)
+        tokens = self._tokens(response, tool_calls)
+        return response, tool_calls, tokens
+
+    def _chat_result(
+        self, messages: list[BaseMessage], response: dict, tool_calls, tokens
+    ) -> ChatResult:
+        message = AIMessage(
+            content=response.get("content", ""),
+            tool_calls=tool_calls,
+            usage_metadata=self._usage(messages, tokens),
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _chunks(self, messages, response: dict, tool_calls, tokens):
+        """Content chunks, then one chunk per tool call, then usage."""
+        for token in _TOKEN.findall(response.get("content", "")):
+            yield AIMessageChunk(content=token)
+        for index, call in enumerate(tool_calls):
+            yield AIMessageChunk(
+                content="",
+                tool_call_chunks=[
+                    {
+                        "name": call["name"],
+                        "args": json.dumps(call["args"]),
+                        "id": call["id"],
+                        "index": index,
+                        "type": "tool_call_chunk",
+                    }
+                ],
+            )
+        yield AIMessageChunk(content="", usage_metadata=self._usage(messages, tokens))
+
+    # Synchronous API
+
+    def _generate(
+        self,
+        messages: list[BaseMessage],
+        stop: Optional[list[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        response, tool_calls, tokens = self._result(messages, **kwargs)
+        time.sleep(self.ttft + len(tokens) * self._token_delay())
+        return self._chat_result(messages, response, tool_calls, tokens)
+
+    def _stream(
+        self,
+        messages: list[BaseMessage],
+        stop: Optional[list[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        response, tool_calls, tokens = self._result(messages, **kwargs)
+        time.sleep(self.ttft)
+        delay = self._token_delay()
+        for message in self._chunks(messages, response, tool_calls, tokens):
+            chunk = ChatGenerationChunk(message=message)
+            if run_manager:
+                run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+            if delay and message.content:
+                time.sleep(delay)
+
+    # Asynchronous API
+
+    async def _agenerate(
+        self,
+        messages: list[BaseMessage],
+        stop: Optional[list[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        response, tool_calls, tokens = self._result(messages, **kwargs)
+        await asyncio.sleep(self.ttft + len(tokens) * self._token_delay())
+        return self._chat_result(messages, response, tool_calls, tokens)
+
+    async def _astream(
+        self,
+        messages: list[BaseMessage],
+        stop: Optional[list[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        response, tool_calls, tokens = self._result(messages, **kwargs)
+        await asyncio.sleep(self.ttft)
+        delay = self._token_delay()
+        for message in self._chunks(messages, response, tool_calls, tokens):
+            chunk = ChatGenerationChunk(message=message)
+            if run_manager:
+                await run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+            if delay and message.content:
+                await asyncio.sleep(delay)
+
+
+def create_simulated_llm(conf: dict[str, Any]) -> SimulatedChatModel:
+    """
+    Create a simulated model from a ``SIMULATED_MODEL`` configuration.
+
+    Supported keys are ``fixtures`` (path to a JSON or YAML file), ``ttft``
+    and ``tokens_per_second``; values from environment variables arrive as
+    strings and are converted here.
+    """
+    kwargs: dict[str, Any] = {}
+    if conf.get("model"):
+        kwargs["model"] = conf["model"]
+    if conf.get("fixtures"):
+        kwargs["fixtures"] = load_fixtures(conf["fixtures"])
+    if conf.get("ttft") is not None:
+        kwargs["ttft"] = float(conf["ttft"])
+    if conf.get("tokens_per_second") is not None:
+        kwargs["tokens_per_second"] = float(conf["tokens_per_second"])
+    return SimulatedChatModel(**kwargs)
@@ -1,8 +1,30 @@
 # Copyright (c) 2025 Peter Liu
 # SPDX-License-Identifier: MIT
 
+import importlib
+
 from .retriever import Retriever, Document, Resource, Chunk
-from .ragflow import RAGFlowProvider
-from .builder import build_retriever
 
-__all__ = [Retriever, Document, Resource, RAGFlowProvider, Chunk, build_retriever]
+# Providers pull in their client libraries, so they are imported on first use
+_LAZY = {
+    "RAGFlowProvider": ".ragflow",
+    "LocalProvider": ".local",
+    "build_retriever": ".builder",
+}
+
+
+def __getattr__(name: str):
+    if name in _LAZY:
+        return getattr(importlib.import_module(_LAZY[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+__all__ = [
+    "Retriever",
+    "Document",
+    "Resource",
+    "RAGFlowProvider",
+    "LocalProvider",
+    "Chunk",
+    "build_retriever",
+]
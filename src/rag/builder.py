@@ -1,14 +1,57 @@
 # Copyright (c) 2025 Peter Liu
 # SPDX-License-Identifier: MIT
 
-from src.config.tools import SELECTED_RAG_PROVIDER, RAGProvider
+import threading
+
+from src.config.settings import get_settings, on_settings_change
+from src.config.tools import RAGProvider
+from src.rag.local import LocalProvider
 from src.rag.ragflow import RAGFlowProvider
 from src.rag.retriever import Retriever
 
+_providers: dict[str, Retriever] = {}
+_providers_lock = threading.Lock()
+
+
+def _shared_provider(provider: str) -> Retriever:
+    # One instance per process, so connection pools, caches and the local
+    # index are shared by all requests and tools
+    with _providers_lock:
+        if provider not in _providers:
+            if provider == RAGProvider.RAGFLOW.value:
+                _providers[provider] = RAGFlowProvider()
+            else:
+                _providers[provider] = LocalProvider()
+        return _providers[provider]
+
+
+def _drop_providers() -> list[Retriever]:
+    with _providers_lock:
+        providers = list(_providers.values())
+        _providers.clear()
+    return providers
+
+
+def _close_providers(settings):
+    # Providers read their settings when created, so a reload creates new
+    # ones; close the old ones so their pooled connections are released
+    for provider in _drop_providers():
+        provider.close()
+
+
+on_settings_change(_close_providers)
+
+
+async def aclose_providers():
+    """Close the shared providers, e.g. on server shutdown."""
+    for provider in _drop_providers():
+        await provider.aclose()
+
 
 def build_retriever() -> Retriever | None:
-    if SELECTED_RAG_PROVIDER == RAGProvider.RAGFLOW.value:
-        return RAGFlowProvider()
-    elif SELECTED_RAG_PROVIDER:
-        raise ValueError(f"Unsupported RAG provider: {SELECTED_RAG_PROVIDER}")
+    provider = get_settings().rag_provider
+    if provider in (RAGProvider.RAGFLOW.value, RAGProvider.LOCAL.value):
+        return _shared_provider(provider)
+    elif provider:
+        raise ValueError(f"Unsupported RAG provider: {provider}")
     return None
@@ -0,0 +1,121 @@
+# Copyright (c) 2025 Peter Liu
+# SPDX-License-Identifier: MIT
+
+"""
+Text embedders for the local RAG provider.
+
+``LOCAL_RAG_EMBEDDER`` selects one: ``hashing`` (the default, no model or
+network needed) or ``module:factory``, a callable returning an ``Embedder``.
+"""
+
+import abc
+import hashlib
+import importlib
+import os
+import threading
+
+import numpy as np
+
+from src.utils.text import tokenize
+
+# Multiplier mixing two token hashes into the hash of the pair
+_PAIR_MIX = np.uint64(0x9E3779B97F4A7C15)
+
+
+class Embedder(abc.ABC):
+    """Turns texts into fixed-size vectors for cosine search."""
+
+    name: str
+    dim: int
+
+    @abc.abstractmethod
+    def embed(self, texts: list[str]) -> np.ndarray:
+        """
+        Embed texts as the rows of a float32 ``(len(texts), dim)`` matrix,
+        L2-normalized so that dot products are cosine similarities.
+        """
+        pass
+
+
+class HashingEmbedder(Embedder):
+    """
+    Feature-hashing embedder: every word and word pair of a text adds +1 or
+    -1 to one of ``dim`` dimensions chosen by its hash.
+
+    It captures lexical overlap only, but needs no model, is deterministic
+    across processes and embeds tens of thousands of chunks per second.
+    """
+
+    name = "hashing"
+
+    def __init__(self, dim: int = 256, max_vocabulary: int = 1_000_000):
+        self.dim = dim
+        self.max_vocabulary = max_vocabulary
+        self._vocabulary: dict[str, int] = {}
+        self._hashes = np.zeros(0, dtype=np.uint64)
+        self._lock = threading.Lock()
+
+    def _token_ids(self, tokens: list[str]) -> np.ndarray:
+        with self._lock:
+            if len(self._vocabulary) > self.max_vocabulary:
+                self._vocabulary.clear()
+                self._hashes = np.zeros(0, dtype=np.uint64)
+            new = [t for t in set(tokens) if t not in self._vocabulary]
+            if new:
+                start = len(self._vocabulary)
+                hashes = [
+                    int.from_bytes(
+                        hashlib.blake2b(t.encode(), digest_size=8).digest(), "big"
+                    )
+                    for t in new
+                ]
+                for offset, token in enumerate(new):
+                    self._vocabulary[token] = start + offset
+                self._hashes = np.concatenate(
+                    [self._hashes, np.array(hashes, dtype=np.uint64)]
+                )
+            ids = np.fromiter(
+                (self._vocabulary[t] for t in tokens), dtype=np.int64, count=len(tokens)
+            )
+            return self._hashes[ids]
+
+    def embed(self, texts: list[str]) -> np.ndarray:
+        token_lists = [tokenize(text) for text in texts]
+        lengths = np.array([len(tokens) for tokens in token_lists], dtype=np.int64)
+        hashes = self._token_ids([t for tokens in token_lists for t in tokens])
+        rows = np.repeat(np.arange(len(texts)), lengths)
+
+        # Pairs of consecutive words within the same text
+        same_text = rows[1:] == rows[:-1]
+        with np.errstate(over="ignore"):
+            pairs = (hashes[:-1] * _PAIR_MIX) ^ hashes[1:]
+        features = np.concatenate([hashes, pairs[same_text]])
+        feature_rows = np.concatenate([rows, rows[1:][same_text]])
+
+        columns = (features % np.uint64(self.dim)).astype(np.int64)
+        signs = np.where(features >> np.uint64(63), 1.0, -1.0)
+        matrix = np.bincount(
+            feature_rows * self.dim + columns,
+            weights=signs,
+            minlength=len(texts) * self.dim,
+        ).reshape(len(texts), self.dim)
+        # Sublinear weights, so that frequent words don't dominate a text
+        matrix = np.sign(matrix) * np.sqrt(np.abs(matrix))
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return (matrix / norms).astype(np.float32)
+
+
+def get_embedder() -> Embedder:
+    """The embedder configured by ``LOCAL_RAG_EMBEDDER``."""
+    spec = os.getenv("LOCAL_RAG_EMBEDDER", "hashing")
+    if spec == "hashing":
+        return HashingEmbedder(int(os.getenv("LOCAL_RAG_EMBEDDING_DIM", "256")))
+    module_name, _, attribute = spec.partition(":")
+    if not attribute:
+        raise ValueError(
+            f"Unsupported LOCAL_RAG_EMBEDDER: {spec} "
+            "(use 'hashing' or 'module:factory')"
+        )
+    factory = getattr(importlib.import_module(module_name), attribute)
+    return factory()
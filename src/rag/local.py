@@ -0,0 +1,464 @@
+# Copyright (c) 2025 Peter Liu
+# SPDX-License-Identifier: MIT
+
+"""
+In-process RAG provider over a directory of markdown, text and PDF files.
+
+Files under ``LOCAL_RAG_SOURCE_DIR`` are split into chunks and embedded into
+an index under ``LOCAL_RAG_INDEX_DIR``:
+
+- ``embeddings.npy``: one L2-normalized float32 row per chunk, memory-mapped
+- ``chunks.bin`` / ``offsets.npy``: the UTF-8 chunk texts and their offsets
+- ``bm25.npz``: term postings for keyword scoring
+- ``manifest.json``: the documents, their chunk rows and the embedder
+
+Queries take the top-k chunks by cosine similarity, blended with normalized
+BM25 scores when ``LOCAL_RAG_HYBRID_WEIGHT`` is above 0. Files added or
+changed since the last ingestion are picked up when resources are listed;
+the rows of unchanged files are reused without embedding them again.
+"""
+
+import json
+import logging
+import mmap
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Iterable, Optional
+from urllib.parse import quote, unquote
+
+import numpy as np
+
+from src.rag.embedder import Embedder, get_embedder, tokenize
+from src.rag.retriever import Chunk, Document, Resource, Retriever
+from src.utils.text import split_text
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_SUFFIXES = {".md", ".markdown", ".txt", ".pdf"}
+URI_PREFIX = "rag://local/"
+_HEADING = re.compile(r"^#{1,6}\s")
+_BATCH_SIZE = 512
+
+
+def read_document(path: Path) -> str:
+    """The text of a markdown, text or PDF file."""
+    if path.suffix.lower() == ".pdf":
+        try:
+            from pypdf import PdfReader
+        except ImportError as e:
+            raise ImportError("Reading PDF files requires 'pypdf'") from e
+        return "\n\n".join(page.extract_text() or "" for page in PdfReader(path).pages)
+    return path.read_text(encoding="utf-8", errors="replace")
+
+
+class BM25:
+    """Okapi BM25 over term postings stored as NumPy arrays."""
+
+    def __init__(
+        self,
+        terms: dict[str, int],
+        indptr: np.ndarray,
+        rows: np.ndarray,
+        frequencies: np.ndarray,
+        lengths: np.ndarray,
+        k1: float = 1.2,
+        b: float = 0.75,
+    ):
+        self.terms = terms
+        self.indptr = indptr
+        self.rows = rows
+        self.frequencies = frequencies
+        self.lengths = lengths
+        self.k1 = k1
+        self.b = b
+        self._average_length = float(lengths.mean()) if len(lengths) else 0.0
+
+    @classmethod
+    def build(cls, texts: Iterable[str]) -> "BM25":
+        vocabulary: dict[str, int] = {}
+        term_ids: list[np.ndarray] = []
+        lengths = []
+        for text in texts:
+            tokens = tokenize(text)
+            lengths.append(len(tokens))
+            term_ids.append(
+                np.fromiter(
+                    (vocabulary.setdefault(t, len(vocabulary)) for t in tokens),
+                    dtype=np.int64,
+                    count=len(tokens),
+                )
+            )
+        lengths = np.array(lengths, dtype=np.int32)
+        all_terms = np.concatenate(term_ids) if term_ids else np.zeros(0, np.int64)
+        all_rows = np.repeat(np.arange(len(lengths), dtype=np.int64), lengths)
+        # One posting per (term, row) with the number of occurrences
+        keys, frequencies = np.unique(
+            all_terms * len(lengths) + all_rows, return_counts=True
+        )
+        posting_terms = keys // max(len(lengths), 1)
+        indptr = np.zeros(len(vocabulary) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(posting_terms, minlength=len(vocabulary)), out=indptr[1:])
+        return cls(
+            vocabulary,
+            indptr,
+            (keys % max(len(lengths), 1)).astype(np.int32),
+            frequencies.astype(np.int32),
+            lengths,
+        )
+
+    def scores(self, query: str) -> np.ndarray:
+        """The BM25 score of every row for a query."""
+        scores = np.zeros(len(self.lengths), dtype=np.float32)
+        count = len(self.lengths)
+        for term in set(tokenize(query)):
+            term_id = self.terms.get(term)
+            if term_id is None:
+                continue
+            start, end = self.indptr[term_id], self.indptr[term_id + 1]
+            rows = self.rows[start:end]
+            frequencies = self.frequencies[start:end]
+            idf = np.log(1 + (count - len(rows) + 0.5) / (len(rows) + 0.5))
+            norm = self.k1 * (
+                1 - self.b + self.b * self.lengths[rows] / self._average_length
+            )
+            scores[rows] += idf * frequencies * (self.k1 + 1) / (frequencies + norm)
+        return scores
+
+    def save(self, path: Path):
+        terms = np.array(sorted(self.terms, key=self.terms.get), dtype=str)
+        with open(path, "wb") as f:
+            np.savez(
+                f,
+                terms=terms,
+                indptr=self.indptr,
+                rows=self.rows,
+                frequencies=self.frequencies,
+                lengths=self.lengths,
+            )
+
+    @classmethod
+    def load(cls, path: Path) -> "BM25":
+        with np.load(path) as data:
+            terms = {term: i for i, term in enumerate(data["terms"].tolist())}
+            return cls(
+                terms,
+                data["indptr"],
+                data["rows"],
+                data["frequencies"],
+                data["lengths"],
+            )
+
+
+class LocalIndex:
+    """The chunks, embeddings and BM25 postings of ingested documents."""
+
+    def __init__(self, path: Path, embedder: Embedder):
+        self.path = Path(path)
+        self.embedder = embedder
+        self.documents: list[dict] = []
+        self.embeddings = np.zeros((0, embedder.dim), dtype=np.float32)
+        self.offsets = np.zeros(1, dtype=np.int64)
+        self.bm25: Optional[BM25] = None
+        self._text: bytes | mmap.mmap = b""
+        self.load()
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def load(self):
+        """Open the index on disk, if there is a compatible one."""
+        manifest_path = self.path / "manifest.json"
+        if not manifest_path.exists():
+            return
+        manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+        if manifest.get("embedder") != [self.embedder.name, self.embedder.dim]:
+            logger.info(f"Local RAG index at {self.path} uses another embedder")
+            return
+        self.documents = manifest["documents"]
+        self.offsets = np.load(self.path / "offsets.npy")
+        if len(self) == 0:
+            return
+        self.embeddings = np.load(self.path / "embeddings.npy", mmap_mode="r")
+        with open(self.path / "chunks.bin", "rb") as f:
+            self._text = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        bm25_path = self.path / "bm25.npz"
+        self.bm25 = BM25.load(bm25_path) if bm25_path.exists() else None
+
+    def chunk(self, row: int) -> str:
+        start, end = self.offsets[row], self.offsets[row + 1]
+        return self._text[start:end].decode("utf-8")
+
+    def document_chunks(self, document: dict) -> list[str]:
+        return [self.chunk(row) for row in range(document["start"], document["end"])]
+
+    def write(
+        self,
+        documents: list[dict],
+        chunks: list[list[str]],
+        reuse: Optional[list[Optional[int]]] = None,
+    ):
+        """
+        Replace the index with these documents and their chunks.
+
+        ``reuse[i]``, if given, is the first row of document ``i`` in the
+        current index, whose embeddings are copied instead of recomputed.
+        """
+        self.path.mkdir(parents=True, exist_ok=True)
+        reuse = reuse or [None] * len(documents)
+        total = sum(len(c) for c in chunks)
+        tmp = {
+            name: self.path / f"{name}.tmp"
+            for name in ("embeddings.npy", "chunks.bin", "offsets.npy", "bm25.npz")
+        }
+
+        embeddings = np.lib.format.open_memmap(
+            tmp["embeddings.npy"],
+            mode="w+",
+            dtype=np.float32,
+            shape=(total, self.embedder.dim),
+        )
+        offsets = np.zeros(total + 1, dtype=np.int64)
+        row = 0
+        with open(tmp["chunks.bin"], "wb") as text_file:
+            for document, document_chunks, old_start in zip(documents, chunks, reuse):
+                document["start"] = row
+                for batch_start in range(0, len(document_chunks), _BATCH_SIZE):
+                    batch = document_chunks[batch_start : batch_start + _BATCH_SIZE]
+                    first = row + batch_start
+                    if old_start is not None:
+                        old_first = old_start + batch_start
+                        embeddings[first : first + len(batch)] = self.embeddings[
+                            old_first : old_first + len(batch)
+                        ]
+                    elif batch:
+                        embeddings[first : first + len(batch)] = self.embedder.embed(
+                            batch
+                        )
+                    for i, text in enumerate(batch):
+                        encoded = text.encode("utf-8")
+                        text_file.write(encoded)
+                        offsets[first + i + 1] = offsets[first + i] + len(encoded)
+                row += len(document_chunks)
+                document["end"] = row
+        embeddings.flush()
+        del embeddings
+        with open(tmp["offsets.npy"], "wb") as f:
+            np.save(f, offsets)
+        BM25.build(text for texts in chunks for text in texts).save(tmp["bm25.npz"])
+
+        for name, path in tmp.items():
+            os.replace(path, self.path / name)
+        manifest = {
+            "embedder": [self.embedder.name, self.embedder.dim],
+            "documents": documents,
+        }
+        manifest_tmp = self.path / "manifest.json.tmp"
+        manifest_tmp.write_text(json.dumps(manifest, ensure_ascii=False), "utf-8")
+        os.replace(manifest_tmp, self.path / "manifest.json")
+        self.load()
+
+    def search(
+        self,
+        query: str,
+        document_ids: Optional[set[str]] = None,
+        top_k: int = 10,
+        hybrid_weight: float = 0.0,
+    ) -> list[tuple[int, float]]:
+        """
+        The ``top_k`` (row, score) pairs for a query, best first, optionally
+        restricted to some documents.
+        """
+        if len(self) == 0:
+            return []
+        rows = None
+        if document_ids is not None:
+            ranges = [
+                np.arange(d["start"], d["end"])
+                for d in self.documents
+                if d["id"] in document_ids
+            ]
+            if not ranges:
+                return []
+            rows = np.concatenate(ranges)
+            if len(rows) == 0:
+                return []
+
+        vector = self.embedder.embed([query])[0]
+        if rows is None:
+            scores = self.embeddings @ vector
+        else:
+            scores = self.embeddings[rows] @ vector
+        if hybrid_weight > 0 and self.bm25 is not None:
+            keyword_scores = self.bm25.scores(query)
+            if rows is not None:
+                keyword_scores = keyword_scores[rows]
+            best = keyword_scores.max()
+            if best > 0:
+                scores = (1 - hybrid_weight) * scores + hybrid_weight * (
+                    keyword_scores / best
+                )
+
+        k = min(top_k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        found = top if rows is None else rows[top]
+        return [(int(row), float(scores[i])) for row, i in zip(found, top)]
+
+
+class LocalProvider(Retriever):
+    """
+    LocalProvider retrieves documents from files on disk, without a server.
+    """
+
+    top_k: int = 10
+    hybrid_weight: float = 0.3
+    min_score: float = 0.0
+    chunk_chars: int = 1200
+    chunk_overlap: int = 150
+
+    def __init__(self, embedder: Optional[Embedder] = None):
+        source_dir = os.getenv("LOCAL_RAG_SOURCE_DIR")
+        if not source_dir:
+            raise ValueError("LOCAL_RAG_SOURCE_DIR is not set")
+        self.source_dir = Path(source_dir)
+
+        top_k = os.getenv("LOCAL_RAG_TOP_K")
+        if top_k:
+            self.top_k = int(top_k)
+        hybrid_weight = os.getenv("LOCAL_RAG_HYBRID_WEIGHT")
+        if hybrid_weight:
+            self.hybrid_weight = float(hybrid_weight)
+        min_score = os.getenv("LOCAL_RAG_MIN_SCORE")
+        if min_score:
+            self.min_score = float(min_score)
+        chunk_chars = os.getenv("LOCAL_RAG_CHUNK_CHARS")
+        if chunk_chars:
+            self.chunk_chars = int(chunk_chars)
+        chunk_overlap = os.getenv("LOCAL_RAG_CHUNK_OVERLAP")
+        if chunk_overlap:
+            self.chunk_overlap = int(chunk_overlap)
+
+        self.index = LocalIndex(
+            Path(os.getenv("LOCAL_RAG_INDEX_DIR", ".cache/local_rag")),
+            embedder or get_embedder(),
+        )
+        self._lock = threading.Lock()
+        self.sync()
+
+    def _source_files(self) -> list[Path]:
+        return sorted(
+            path
+            for path in self.source_dir.rglob("*")
+            if path.is_file() and path.suffix.lower() in SUPPORTED_SUFFIXES
+        )
+
+    def sync(self):
+        """Ingest files added or changed since the last sync; drop deleted ones."""
+        with self._lock:
+            indexed = {d["id"]: d for d in self.index.documents}
+            documents, chunks, reuse = [], [], []
+            changed = False
+            for path in self._source_files():
+                document_id = path.relative_to(self.source_dir).as_posix()
+                stat = path.stat()
+                old = indexed.pop(document_id, None)
+                if (
+                    old
+                    and old["mtime"] == stat.st_mtime
+                    and old["size"] == stat.st_size
+                ):
+                    documents.append(old)
+                    chunks.append(self.index.document_chunks(old))
+                    reuse.append(old["start"])
+                    continue
+                try:
+                    text = read_document(path)
+                except Exception as e:
+                    logger.warning(f"Skipping {path}: {e}")
+                    continue
+                documents.append(
+                    {
+                        "id": document_id,
+                        "title": _title(text, path),
+                        "mtime": stat.st_mtime,
+                        "size": stat.st_size,
+                    }
+                )
+                chunks.append(split_text(text, self.chunk_chars, self.chunk_overlap))
+                reuse.append(None)
+                changed = True
+            if not changed and not indexed:
+                return
+            logger.info(
+                f"Ingesting {sum(r is None for r in reuse)} changed file(s) from "
+                f"{self.source_dir}, removing {len(indexed)}"
+            )
+            self.index.write(documents, chunks, reuse)
+
+    def list_resources(self, query: str | None = None) -> list[Resource]:
+        self.sync()
+        resources = []
+        for document in self.index.documents:
+            if query and not any(
+                query.casefold() in field.casefold()
+                for field in (document["title"], document["id"])
+            ):
+                continue
+            resources.append(
+                Resource(
+                    uri=URI_PREFIX + quote(document["id"]),
+                    title=document["title"],
+                    description=f"{document['end'] - document['start']} chunks",
+                )
+            )
+        return resources
+
+    def query_relevant_documents(
+        self, query: str, resources: list[Resource] = []
+    ) -> list[Document]:
+        document_ids = {
+            unquote(resource.uri[len(URI_PREFIX) :])
+            for resource in resources
+            if resource.uri.startswith(URI_PREFIX)
+        }
+        if resources and not document_ids:
+            # None of the resources belong to this provider
+            return []
+        hits = self.index.search(
+            query,
+            document_ids or None,
+            top_k=self.top_k,
+            hybrid_weight=self.hybrid_weight,
+        )
+
+        docs: dict[str, Document] = {}
+        by_row = _documents_by_row(self.index.documents)
+        for row, score in hits:
+            if score <= self.min_score:
+                break
+            document = by_row(row)
+            doc = docs.get(document["id"])
+            if doc is None:
+                doc = docs[document["id"]] = Document(
+                    id=document["id"], title=document["title"], chunks=[]
+                )
+            doc.chunks.append(Chunk(content=self.index.chunk(row), similarity=score))
+        return list(docs.values())
+
+
+def _title(text: str, path: Path) -> str:
+    for line in text.splitlines()[:20]:
+        if _HEADING.match(line):
+            return line.lstrip("#").strip()
+    return path.stem
+
+
+def _documents_by_row(documents: list[dict]):
+    starts = np.array([d["start"] for d in documents], dtype=np.int64)
+
+    def find(row: int) -> dict:
+        return documents[int(np.searchsorted(starts, row, side="right")) - 1]
+
+    return find
@@ -1,20 +1,69 @@
 # Copyright (c) 2025 Peter Liu
 # SPDX-License-Identifier: MIT
 
+import asyncio
+import logging
 import os
+from urllib.parse import urlparse
+
+import aiohttp
 import requests
+from requests.adapters import HTTPAdapter
+
 from src.rag.retriever import Chunk, Document, Resource, Retriever
-from urllib.parse import urlparse
+from src.utils.http_cassette import async_http_request, http_request
+from src.utils.ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# Keeps close tasks alive until they finish
+_closing: set[asyncio.Task] = set()
+
+
+async def _close_session(session: aiohttp.ClientSession):
+    try:
+        await session.close()
+    except Exception as e:
+        # The loop the session was created in may already be closed; its
+        # connector is marked closed regardless
+        logger.debug(f"Error closing RAGFlow session: {e}")
+
+
+def _discard_session(
+    session: aiohttp.ClientSession | None, loop: asyncio.AbstractEventLoop | None
+):
+    """Close a session that is no longer used, from any thread."""
+    if session is None or session.closed:
+        return
+    if loop is not None and loop.is_running():
+        asyncio.run_coroutine_threadsafe(_close_session(session), loop)
+        return
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        asyncio.run(_close_session(session))
+        return
+    task = running.create_task(_close_session(session))
+    _closing.add(task)
+    task.add_done_callback(_closing.discard)
 
 
 class RAGFlowProvider(Retriever):
     """
     RAGFlowProvider is a provider that uses RAGFlow to retrieve documents.
+
+    Requests reuse pooled connections (a ``requests`` session for the sync
+    methods, an ``aiohttp`` session per event loop for the async ones).
+    Dataset listings are cached for ``RAGFLOW_RESOURCES_TTL`` seconds and
+    retrieval results per (query, datasets, documents) for
+    ``RAGFLOW_QUERY_CACHE_TTL`` seconds; set either to 0 to disable it.
     """
 
     api_url: str
     api_key: str
     page_size: int = 10
+    timeout: float = 30
+    pool_size: int = 10
 
     def __init__(self):
         api_url = os.getenv("RAGFLOW_API_URL")
@@ -30,15 +79,71 @@ class RAGFlowProvider(Retriever):
         page_size = os.getenv("RAGFLOW_PAGE_SIZE")
         if page_size:
             self.page_size = int(page_size)
+        timeout = os.getenv("RAGFLOW_TIMEOUT")
+        if timeout:
+            self.timeout = float(timeout)
+        pool_size = os.getenv("RAGFLOW_POOL_SIZE")
+        if pool_size:
+            self.pool_size = int(pool_size)
 
-    def query_relevant_documents(
-        self, query: str, resources: list[Resource] = []
-    ) -> list[Document]:
-        headers = {
+        self.resources_cache = TTLCache(
+            float(os.getenv("RAGFLOW_RESOURCES_TTL", "60")), max_size=64
+        )
+        self.query_cache = TTLCache(
+            float(os.getenv("RAGFLOW_QUERY_CACHE_TTL", "30")),
+            max_size=int(os.getenv("RAGFLOW_QUERY_CACHE_SIZE", "256")),
+        )
+
+        self._session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=self.pool_size, pool_maxsize=self.pool_size
+        )
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+        self._async_session: aiohttp.ClientSession | None = None
+        self._async_session_loop: asyncio.AbstractEventLoop | None = None
+
+    @property
+    def headers(self) -> dict:
+        return {
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json",
         }
 
+    def _get_async_session(self) -> aiohttp.ClientSession:
+        # aiohttp sessions are bound to the event loop they were created in
+        loop = asyncio.get_running_loop()
+        if (
+            self._async_session is None
+            or self._async_session.closed
+            or self._async_session_loop is not loop
+        ):
+            _discard_session(self._async_session, self._async_session_loop)
+            self._async_session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.pool_size)
+            )
+            self._async_session_loop = loop
+        return self._async_session
+
+    def close(self):
+        """Close the pooled sessions from synchronous code."""
+        self._session.close()
+        session, loop = self._async_session, self._async_session_loop
+        self._async_session = self._async_session_loop = None
+        _discard_session(session, loop)
+
+    async def aclose(self):
+        """Close the pooled sessions, e.g. on shutdown."""
+        self._session.close()
+        session, loop = self._async_session, self._async_session_loop
+        self._async_session = self._async_session_loop = None
+        if loop is asyncio.get_running_loop():
+            if session is not None and not session.closed:
+                await session.close()
+        else:
+            _discard_session(session, loop)
+
+    def _retrieval_payload(self, query: str, resources: list[Resource]) -> dict:
         dataset_ids: list[str] = []
         document_ids: list[str] = []
 
@@ -48,75 +153,161 @@ class RAGFlowProvider(Retriever):
             if document_id:
                 document_ids.append(document_id)
 
-        payload = {
+        return {
             "question": query,
             "dataset_ids": dataset_ids,
             "document_ids": document_ids,
             "page_size": self.page_size,
         }
 
-        response = requests.post(
-            f"{self.api_url}/api/v1/retrieval", headers=headers, json=payload
+    @staticmethod
+    def _query_key(payload: dict) -> tuple:
+        return (
+            payload["question"],
+            tuple(sorted(payload["dataset_ids"])),
+            tuple(sorted(payload["document_ids"])),
+        )
+
+    def query_relevant_documents(
+        self, query: str, resources: list[Resource] = []
+    ) -> list[Document]:
+        payload = self._retrieval_payload(query, resources)
+        key = self._query_key(payload)
+        documents = self.query_cache.get(key)
+        if documents is not None:
+            return documents
+
+        response = http_request(
+            "POST",
+            f"{self.api_url}/api/v1/retrieval",
+            session=self._session,
+            headers=self.headers,
+            json=payload,
+            timeout=self.timeout,
         )
 
         if response.status_code != 200:
             raise Exception(f"Failed to query documents: {response.text}")
 
-        result = response.json()
-        data = result.get("data", {})
-        doc_aggs = data.get("doc_aggs", [])
-        docs: dict[str, Document] = {
-            doc.get("doc_id"): Document(
-                id=doc.get("doc_id"),
-                title=doc.get("doc_name"),
-                chunks=[],
-            )
-            for doc in doc_aggs
-        }
+        documents = parse_documents(response.json())
+        self.query_cache.set(key, documents)
+        return documents
 
-        for chunk in data.get("chunks", []):
-            doc = docs.get(chunk.get("document_id"))
-            if doc:
-                doc.chunks.append(
-                    Chunk(
-                        content=chunk.get("content"),
-                        similarity=chunk.get("similarity"),
-                    )
-                )
+    async def aquery_relevant_documents(
+        self, query: str, resources: list[Resource] = []
+    ) -> list[Document]:
+        payload = self._retrieval_payload(query, resources)
+        key = self._query_key(payload)
+        documents = self.query_cache.get(key)
+        if documents is not None:
+            return documents
+
+        response = await async_http_request(
+            "POST",
+            f"{self.api_url}/api/v1/retrieval",
+            headers=self.headers,
+            json_body=payload,
+            timeout=self.timeout,
+            session=self._get_async_session(),
+        )
 
-        return list(docs.values())
+        if response.status != 200:
+            raise Exception(f"Failed to query documents: {response.text}")
+
+        documents = parse_documents(response.json())
+        self.query_cache.set(key, documents)
+        return documents
 
     def list_resources(self, query: str | None = None) -> list[Resource]:
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json",
-        }
+        resources = self.resources_cache.get(query or "")
+        if resources is not None:
+            return resources
 
         params = {}
         if query:
             params["name"] = query
 
-        response = requests.get(
-            f"{self.api_url}/api/v1/datasets", headers=headers, params=params
+        response = http_request(
+            "GET",
+            f"{self.api_url}/api/v1/datasets",
+            session=self._session,
+            headers=self.headers,
+            params=params,
+            timeout=self.timeout,
         )
 
         if response.status_code != 200:
             raise Exception(f"Failed to list resources: {response.text}")
 
-        result = response.json()
-        resources = []
+        resources = parse_resources(response.json())
+        self.resources_cache.set(query or "", resources)
+        return resources
+
+    async def alist_resources(self, query: str | None = None) -> list[Resource]:
+        resources = self.resources_cache.get(query or "")
+        if resources is not None:
+            return resources
 
-        for item in result.get("data", []):
-            item = Resource(
-                uri=f"rag://dataset/{item.get('id')}",
-                title=item.get("name", ""),
-                description=item.get("description", ""),
-            )
-            resources.append(item)
+        params = {}
+        if query:
+            params["name"] = query
 
+        response = await async_http_request(
+            "GET",
+            f"{self.api_url}/api/v1/datasets",
+            headers=self.headers,
+            params=params,
+            timeout=self.timeout,
+            session=self._get_async_session(),
+        )
+
+        if response.status != 200:
+            raise Exception(f"Failed to list resources: {response.text}")
+
+        resources = parse_resources(response.json())
+        self.resources_cache.set(query or "", resources)
         return resources
 
 
+def parse_documents(result: dict) -> list[Document]:
+    data = result.get("data", {})
+    doc_aggs = data.get("doc_aggs", [])
+    docs: dict[str, Document] = {
+        doc.get("doc_id"): Document(
+            id=doc.get("doc_id"),
+            title=doc.get("doc_name"),
+            chunks=[],
+        )
+        for doc in doc_aggs
+    }
+
+    for chunk in data.get("chunks", []):
+        doc = docs.get(chunk.get("document_id"))
+        if doc:
+            doc.chunks.append(
+                Chunk(
+                    content=chunk.get("content"),
+                    similarity=chunk.get("similarity"),
+                )
+            )
+
+    return list(docs.values())
+
+
+def parse_resources(result: dict) -> list[Resource]:
+    resources = []
+
+    for item in result.get("data", []):
+        item = Resource(
+            uri=f"rag://dataset/{item.get('id')}",
+            title=item.get("name", ""),
+            description=item.get("description", ""),
+        )
+        resources.append(item)
+
+    return resources
+
+
 def parse_uri(uri: str) -> tuple[str, str]:
     parsed = urlparse(uri)
     if parsed.scheme != "rag":
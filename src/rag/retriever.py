@@ -2,6 +2,8 @@
 # SPDX-License-Identifier: MIT
 
 import abc
+import asyncio
+
 from pydantic import BaseModel, Field
 
 
@@ -78,3 +80,43 @@ class Retriever(abc.ABC):
         Query relevant documents from the resources.
         """
         pass
+
+    async def alist_resources(self, query: str | None = None) -> list[Resource]:
+        """
+        List resources without blocking the event loop. Providers with a
+        native async client override this; the default runs in a thread.
+        """
+        return await asyncio.to_thread(self.list_resources, query)
+
+    async def aquery_relevant_documents(
+        self, query: str, resources: list[Resource] = []
+    ) -> list[Document]:
+        """
+        Query relevant documents without blocking the event loop. Providers
+        with a native async client override this; the default runs in a thread.
+        """
+        return await asyncio.to_thread(self.query_relevant_documents, query, resources)
+
+    async def abatch_query_relevant_documents(
+        self, queries: list[str], resources: list[Resource] = []
+    ) -> list[list[Document]]:
+        """
+        Run several queries concurrently; returns their documents in order.
+        """
+        return list(
+            await asyncio.gather(
+                *(self.aquery_relevant_documents(q, resources) for q in queries)
+            )
+        )
+
+    def close(self):
+        """
+        Release pooled connections held by the provider. The default holds none.
+        """
+        pass
+
+    async def aclose(self):
+        """
+        Release pooled connections from async code, e.g. on shutdown.
+        """
+        self.close()
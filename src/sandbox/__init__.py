@@ -0,0 +1,6 @@
+# Copyright (c) 2025 Peter Liu
+# SPDX-License-Identifier: MIT
+
+from .pool import ExecutionResult, SandboxPool, get_sandbox_pool, sandbox_enabled
+
+__all__ = ["ExecutionResult", "SandboxPool", "get_sandbox_pool", "sandbox_enabled"]
@@ -0,0 +1,231 @@
+# Copyright (c) 2025 Peter Liu
+# SPDX-License-Identifier: MIT
+
+"""
+A pool of worker processes that execute the coder agent's Python code.
+
+Code runs outside the API process, so it neither holds the server's GIL
+nor shares globals between requests. Each session (a graph thread) is
+pinned to one worker, which keeps a namespace per session across
+executions. Every execution is limited in CPU time (``RLIMIT_CPU``), every
+worker in address space (``RLIMIT_AS``), and a worker that does not answer
+within the wall-clock timeout is killed and replaced by a fresh one.
+"""
+
+import atexit
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+from .worker import worker_main
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PRELOAD = ("numpy", "pandas")
+
+
+@dataclass
+class ExecutionResult:
+    output: str
+    error: Optional[str] = None
+    duration: float = 0.0
+    timed_out: bool = False
+
+
+class _Worker:
+    def __init__(self, context, memory_mb: int, preload: tuple[str, ...]):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(
+            target=worker_main,
+            args=(child_conn, memory_mb, preload),
+            daemon=True,
+        )
+        self.process.start()
+        child_conn.close()
+        self.lock = threading.Lock()
+        self.sessions = 0
+        self.pending_resets: list[str] = []
+
+    def kill(self):
+        self.conn.close()
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join(timeout=5)
+
+
+class SandboxPool:
+    """
+    Runs code in ``size`` pre-warmed worker processes.
+
+    Workers are started, and import the ``preload`` modules, when the pool
+    is created. Sessions are assigned to the worker with the fewest
+    sessions; at most ``max_sessions`` namespaces are kept, the least
+    recently used ones are dropped first.
+    """
+
+    def __init__(
+        self,
+        size: int = 2,
+        timeout: float = 60.0,
+        cpu_seconds: Optional[float] = None,
+        memory_mb: int = 2048,
+        preload: tuple[str, ...] = DEFAULT_PRELOAD,
+        max_sessions: int = 256,
+        max_output: int = 20000,
+    ):
+        self.size = max(1, size)
+        self.timeout = timeout
+        self.cpu_seconds = cpu_seconds if cpu_seconds is not None else timeout
+        self.memory_mb = memory_mb
+        self.preload = tuple(preload)
+        self.max_sessions = max_sessions
+        self.max_output = max_output
+        self.executions = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.restarts = 0
+        # fork is unsafe in the multi-threaded server
+        self._context = multiprocessing.get_context("spawn")
+        self._workers = [self._start_worker() for _ in range(self.size)]
+        self._sessions: "OrderedDict[str, _Worker]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def _start_worker(self) -> _Worker:
+        return _Worker(self._context, self.memory_mb, self.preload)
+
+    def _worker_for(self, session: str) -> _Worker:
+        with self._lock:
+            worker = self._sessions.get(session)
+            if worker is None:
+                worker = min(self._workers, key=lambda w: w.sessions)
+                worker.sessions += 1
+                self._sessions[session] = worker
+                while len(self._sessions) > self.max_sessions:
+                    evicted, owner = self._sessions.popitem(last=False)
+                    owner.sessions -= 1
+                    owner.pending_resets.append(evicted)
+            self._sessions.move_to_end(session)
+            return worker
+
+    def _replace(self, worker: _Worker) -> _Worker:
+        """Kill a worker and start a fresh one taking over its sessions."""
+        worker.kill()
+        replacement = self._start_worker()
+        with self._lock:
+            self.restarts += 1
+            replacement.sessions = worker.sessions
+            self._workers[self._workers.index(worker)] = replacement
+            for session, owner in self._sessions.items():
+                if owner is worker:
+                    self._sessions[session] = replacement
+        return replacement
+
+    def run(self, code: str, session: str = "default") -> ExecutionResult:
+        """Execute code in a session's namespace and return its output."""
+        if self._closed:
+            raise RuntimeError("The sandbox pool is closed")
+        while True:
+            worker = self._worker_for(session)
+            with worker.lock:
+                # The worker may have been replaced while we waited for it
+                if worker not in self._workers:
+                    continue
+                return self._execute(worker, session, code)
+
+    def _execute(self, worker: _Worker, session: str, code: str) -> ExecutionResult:
+        start = time.perf_counter()
+        self.executions += 1
+        try:
+            while worker.pending_resets:
+                worker.conn.send(("reset", worker.pending_resets.pop()))
+            worker.conn.send(("exec", session, code, self.cpu_seconds, self.max_output))
+            if worker.conn.poll(self.timeout):
+                output, error = worker.conn.recv()
+                if error:
+                    self.errors += 1
+                return ExecutionResult(output, error, time.perf_counter() - start)
+        except (EOFError, OSError) as e:
+            # The worker died, e.g. killed by the OS for its memory use
+            self.errors += 1
+            logger.warning(f"Sandbox worker crashed, restarting it: {e!r}")
+            self._replace(worker)
+            return ExecutionResult(
+                "",
+                "The sandbox process crashed; variables defined earlier in this "
+                "session are lost.",
+                time.perf_counter() - start,
+            )
+
+        self.timeouts += 1
+        logger.warning(f"Sandbox execution timed out after {self.timeout:g}s")
+        self._replace(worker)
+        return ExecutionResult(
+            "",
+            f"TimeoutError: the code ran for more than {self.timeout:g}s and was "
+            "killed; variables defined earlier in this session are lost.",
+            time.perf_counter() - start,
+            timed_out=True,
+        )
+
+    def reset(self, session: str):
+        """Drop the namespace of a session."""
+        with self._lock:
+            worker = self._sessions.pop(session, None)
+            if worker is not None:
+                worker.sessions -= 1
+                worker.pending_resets.append(session)
+
+    def close(self):
+        self._closed = True
+        for worker in self._workers:
+            worker.kill()
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "workers": self.size,
+            "alive": sum(w.process.is_alive() for w in self._workers),
+            "sessions": len(self._sessions),
+            "executions": self.executions,
+            "errors": self.errors,
+            "timeouts": self.timeouts,
+            "restarts": self.restarts,
+        }
+
+
+_pool: Optional[SandboxPool] = None
+_pool_lock = threading.Lock()
+
+
+def sandbox_enabled() -> bool:
+    return os.getenv("PYTHON_REPL_SANDBOX", "true").lower() not in ("false", "0", "no")
+
+
+def get_sandbox_pool() -> SandboxPool:
+    """The process-wide sandbox pool, started on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            cpu_seconds = os.getenv("PYTHON_SANDBOX_CPU_SECONDS")
+            preload = os.getenv("PYTHON_SANDBOX_PRELOAD", ",".join(DEFAULT_PRELOAD))
+            _pool = SandboxPool(
+                size=int(
+                    os.getenv(
+                        "PYTHON_SANDBOX_WORKERS", str(min(4, os.cpu_count() or 1))
+                    )
+                ),
+                timeout=float(os.getenv("PYTHON_SANDBOX_TIMEOUT", "60")),
+                cpu_seconds=float(cpu_seconds) if cpu_seconds else None,
+                memory_mb=int(os.getenv("PYTHON_SANDBOX_MEMORY_MB", "2048")),
+                preload=tuple(m.strip() for m in preload.split(",") if m.strip()),
+                max_sessions=int(os.getenv("PYTHON_SANDBOX_MAX_SESSIONS", "256")),
+            )
+            atexit.register(_pool.close)
+            logger.info(f"Started {_pool.size} python sandbox workers")
+        return _pool
@@ -0,0 +1,115 @@
+# Copyright (c) 2025 Peter Liu
+# SPDX-License-Identifier: MIT
+
+"""
+Entry point of a sandbox worker process.
+
+A worker imports the preloaded modules once, then executes code sent over
+its pipe, one message at a time, in a namespace per session. This module
+only imports the standard library, so that spawning a worker does not load
+the agent's own dependencies.
+"""
+
+import builtins
+import importlib
+import io
+import math
+import os
+import signal
+import traceback
+from contextlib import redirect_stderr, redirect_stdout
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - not available on Windows
+    resource = None
+
+FILENAME = "<python_repl>"
+
+
+class CPUTimeExceeded(BaseException):
+    """Raised in a worker when an execution uses up its CPU time."""
+
+
+def _on_cpu_limit(signum, frame):
+    raise CPUTimeExceeded()
+
+
+def _set_cpu_limit(seconds: float | None):
+    if resource is None:
+        return
+    _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    if seconds is None:
+        soft = hard
+    else:
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        soft = math.ceil(usage.ru_utime + usage.ru_stime + seconds)
+        if hard != resource.RLIM_INFINITY:
+            soft = min(soft, hard)
+    resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+
+
+def _format_error(error: BaseException) -> str:
+    # Only the frames of the executed code are of interest
+    frames = [
+        frame
+        for frame in traceback.extract_tb(error.__traceback__)
+        if frame.filename == FILENAME
+    ]
+    lines = traceback.format_list(frames) if frames else []
+    lines += traceback.format_exception_only(type(error), error)
+    return "Traceback (most recent call last):\n" * bool(frames) + "".join(lines)
+
+
+def execute(namespace: dict, code: str, cpu_seconds: float | None, max_output: int):
+    """Run code in a namespace; returns its output and error, if any."""
+    output = io.StringIO()
+    error = None
+    _set_cpu_limit(cpu_seconds)
+    try:
+        with redirect_stdout(output), redirect_stderr(output):
+            exec(compile(code, FILENAME, "exec"), namespace)
+    except CPUTimeExceeded:
+        error = f"CPUTimeExceeded: the code used more than {cpu_seconds:g}s of CPU time"
+    except MemoryError:
+        error = "MemoryError: the code exceeded the sandbox memory limit"
+    except BaseException as e:
+        error = _format_error(e)
+    finally:
+        _set_cpu_limit(None)
+    text = output.getvalue()
+    if len(text) > max_output:
+        text = text[:max_output] + f"\n... [{len(text) - max_output} chars truncated]"
+    return text, error
+
+
+def worker_main(conn, memory_mb: int, preload: tuple[str, ...]):
+    # Keep native thread pools from multiplying memory and CPU use per worker
+    for name in ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS"):
+        os.environ.setdefault(name, "1")
+    if resource is not None:
+        signal.signal(signal.SIGXCPU, _on_cpu_limit)
+        if memory_mb > 0:
+            limit = memory_mb * 1024 * 1024
+            resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    for name in preload:
+        try:
+            importlib.import_module(name)
+        except Exception:
+            pass
+
+    namespaces: dict[str, dict] = {}
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, KeyboardInterrupt):
+            return
+        op, session = message[0], message[1]
+        if op == "reset":
+            namespaces.pop(session, None)
+        elif op == "exec":
+            code, cpu_seconds, max_output = message[2:]
+            namespace = namespaces.setdefault(
+                session, {"__name__": "__main__", "__builtins__": builtins}
+            )
+            conn.send(execute(namespace, code, cpu_seconds, max_output))
@@ -1,10 +1,13 @@
 # Copyright (c) 2025 Peter Liu
 # SPDX-License-Identifier: MIT
 
+import asyncio
 import base64
 import json
 import logging
 import os
+import threading
+from contextlib import asynccontextmanager
 from typing import Annotated, List, Optional, cast
 from uuid import uuid4
 
@@ -12,16 +15,10 @@ from fastapi import FastAPI, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import Response, StreamingResponse
 from langchain_core.messages import AIMessageChunk, ToolMessage, BaseMessage
-from langgraph.types import Command
 
+from src.config.configuration import Configuration
 from src.config.report_style import ReportStyle
-from src.config.tools import SELECTED_RAG_PROVIDER
-from src.graph.builder import build_graph_with_memory
-from src.podcast.graph.builder import build_graph as build_podcast_graph
-from src.ppt.graph.builder import build_graph as build_ppt_graph
-from src.prose.graph.builder import build_graph as build_prose_graph
-from src.prompt_enhancer.graph.builder import build_graph as build_prompt_enhancer_graph
-from src.rag.builder import build_retriever
+from src.config.settings import get_settings
 from src.rag.retriever import Resource
 from src.server.chat_request import (
     ChatRequest,
@@ -32,25 +29,59 @@ from src.server.chat_request import (
     TTSRequest,
 )
 from src.server.mcp_request import MCPServerMetadataRequest, MCPServerMetadataResponse
-from src.server.mcp_utils import load_mcp_tools
 from src.server.rag_request import (
     RAGConfigResponse,
     RAGResourceRequest,
     RAGResourcesResponse,
 )
 from src.server.config_request import ConfigResponse
-from src.llms.llm import get_configured_llm_models
-from src.tools import VolcengineTTS
-from src.utils.template_loader import TemplateLoader
+from src.utils.metrics import MetricsCallbackHandler, RunTimeline, metrics
+from src.utils.near_duplicates import index_stats, reset_index
+
+# Subsystems (the workflow graph and its tools, podcast, ppt, prose, prompt
+# enhancer, MCP, RAG providers, LLM clients, TTS) are imported on first use
+# of their endpoint, so that the server starts quickly. Check with
+# benchmark/startup_profile.py before adding module-level imports here.
 
 logger = logging.getLogger(__name__)
 
 INTERNAL_SERVER_ERROR_DETAIL = "Internal Server Error"
 
+_graph = None
+_graph_lock = threading.Lock()
+
+
+def get_graph():
+    """The research workflow graph, compiled on first use."""
+    global _graph
+    with _graph_lock:
+        if _graph is None:
+            from src.graph.builder import build_graph_with_memory
+
+            _graph = build_graph_with_memory()
+        return _graph
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Compile the graph in the background, so that the server accepts
+    # requests (and health checks) before it is ready
+    warmup = None
+    if os.getenv("SERVER_WARMUP", "true").lower() in ("true", "1", "yes"):
+        warmup = asyncio.create_task(asyncio.to_thread(get_graph))
+    yield
+    if warmup is not None and not warmup.done():
+        warmup.cancel()
+    from src.rag.builder import aclose_providers
+
+    await aclose_providers()
+
+
 app = FastAPI(
     title="Unghost Agent API",
     description="API for Unghost Agent",
     version="0.1.0",
+    lifespan=lifespan,
 )
 
 # Add CORS middleware
@@ -62,9 +93,6 @@ app.add_middleware(
     allow_headers=["*"],  # Allows all headers
 )
 
-graph = build_graph_with_memory()
-
-
 @app.post("/api/chat/stream")
 async def chat_stream(request: ChatRequest):
     # Validate and clean user_background parameter
@@ -97,6 +125,7 @@ async def chat_stream(request: ChatRequest):
             request.enable_deep_thinking,
             request.user_background,
             request.selected_template_id,
+            request.enable_timing_event,
         ),
         media_type="text/event-stream",
     )
@@ -117,6 +146,7 @@ async def _astream_workflow_generator(
     enable_deep_thinking: bool,
     user_background: Optional[str],
     selected_template_id: Optional[str],
+    enable_timing_event: bool = False,
 ):
     input_ = {
         "messages": messages,
@@ -129,15 +159,25 @@ async def _astream_workflow_generator(
         "research_topic": messages[-1]["content"] if messages else "",
     }
     if not auto_accepted_plan and interrupt_feedback:
+        from langgraph.types import Command
+
         resume_msg = f"[{interrupt_feedback}]"
         # add the last message to the resume message
         if messages:
             resume_msg += f" {messages[-1]['content']}"
         input_ = Command(resume=resume_msg)
-    async for agent, _, event_data in graph.astream(
-        input_,
-        config={
-            "thread_id": thread_id,
+    else:
+        # A new run: earlier results of the thread are no longer in context
+        from src.tools.research_memory import reset_memory
+
+        reset_index(thread_id)
+        reset_memory(thread_id)
+    timeline = RunTimeline(thread_id)
+    graph = await asyncio.to_thread(get_graph)
+    # Resolve the configuration once per run; nodes read this snapshot
+    configuration = Configuration.from_settings(
+        get_settings(),
+        {
             "resources": resources,
             "max_plan_iterations": max_plan_iterations,
             "max_step_num": max_step_num,
@@ -148,9 +188,30 @@ async def _astream_workflow_generator(
             "user_background": user_background,
             "selected_template_id": selected_template_id,
         },
-        stream_mode=["messages", "updates"],
+    )
+    async for agent, mode, event_data in graph.astream(
+        input_,
+        config={
+            "thread_id": thread_id,
+            "configuration": configuration,
+            "callbacks": [MetricsCallbackHandler(timeline)],
+        },
+        stream_mode=["messages", "updates", "custom"],
         subgraphs=True,
     ):
+        if mode == "custom":
+            if "plan_step" in event_data:
+                # A plan step parsed while the planner is still streaming
+                yield _make_event(
+                    "plan_step",
+                    {
+                        "thread_id": thread_id,
+                        "agent": "planner",
+                        "role": "assistant",
+                        **event_data["plan_step"],
+                    },
+                )
+            continue
         if isinstance(event_data, dict):
             if "__interrupt__" in event_data:
                 yield _make_event(
@@ -173,7 +234,8 @@ async def _astream_workflow_generator(
         )
         event_stream_message: dict[str, any] = {
             "thread_id": thread_id,
-            "agent": agent[0].split(":")[0],
+            # Steps started early by the planner stream from inside its node
+            "agent": message_metadata.get("agent") or agent[0].split(":")[0],
             "id": message_chunk.id,
             "role": "assistant",
             "content": message_chunk.content,
@@ -209,6 +271,14 @@ async def _astream_workflow_generator(
                 # AI Message - Raw message tokens
                 yield _make_event("message_chunk", event_stream_message)
 
+    if enable_timing_event:
+        from src.tools.research_memory import memory_stats
+
+        summary = timeline.summary()
+        summary["near_duplicates"] = index_stats(thread_id)
+        summary["research_memory"] = memory_stats(thread_id)
+        yield _make_event("timing", summary)
+
 
 def _make_event(event_type: str, data: dict[str, any]):
     if data.get("content") == "":
@@ -216,6 +286,31 @@ def _make_event(event_type: str, data: dict[str, any]):
     return f"event: {event_type}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
 
 
+@app.get("/api/metrics")
+async def prometheus_metrics():
+    """Expose node, tool and LLM metrics in the Prometheus text format."""
+    return Response(content=metrics.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/api/crawl/cache/stats")
+async def crawl_cache_statistics():
+    """Size, hit rate and bytes saved of the persistent crawl cache."""
+    from src.crawler.cache import crawl_cache_stats
+
+    stats = crawl_cache_stats()
+    if stats is None:
+        return {"enabled": False}
+    return {"enabled": True, **stats}
+
+
+@app.get("/api/llm/endpoints")
+async def llm_endpoint_statistics():
+    """Latency, error and hedging statistics of pooled LLM endpoints."""
+    from src.llms.llm import get_llm_pool_stats
+
+    return get_llm_pool_stats()
+
+
 @app.post("/api/tts")
 async def text_to_speech(request: TTSRequest):
     """Convert text to speech using volcengine TTS API."""
@@ -229,6 +324,8 @@ async def text_to_speech(request: TTSRequest):
         )
 
     try:
+        from src.tools.tts import VolcengineTTS
+
         cluster = os.getenv("VOLCENGINE_TTS_CLUSTER", "volcano_tts")
         voice_type = os.getenv("VOLCENGINE_TTS_VOICE_TYPE", "BV700_V2_streaming")
 
@@ -277,6 +374,8 @@ async def generate_podcast(request: GeneratePodcastRequest):
     try:
         report_content = request.content
         print(report_content)
+        from src.podcast.graph.builder import build_graph as build_podcast_graph
+
         workflow = build_podcast_graph()
         final_state = workflow.invoke({"input": report_content})
         audio_bytes = final_state["output"]
@@ -291,6 +390,8 @@ async def generate_ppt(request: GeneratePPTRequest):
     try:
         report_content = request.content
         print(report_content)
+        from src.ppt.graph.builder import build_graph as build_ppt_graph
+
         workflow = build_ppt_graph()
         final_state = workflow.invoke({"input": report_content})
         generated_file_path = final_state["generated_file_path"]
@@ -310,6 +411,8 @@ async def generate_prose(request: GenerateProseRequest):
     try:
         sanitized_prompt = request.prompt.replace("\r\n", "").replace("\n", "")
         logger.info(f"Generating prose for prompt: {sanitized_prompt}")
+        from src.prose.graph.builder import build_graph as build_prose_graph
+
         workflow = build_prose_graph()
         events = workflow.astream(
             {
@@ -333,6 +436,8 @@ async def generate_prose(request: GenerateProseRequest):
 async def get_templates():
     """Get all available outreach templates."""
     try:
+        from src.utils.template_loader import TemplateLoader
+
         template_loader = TemplateLoader()
         templates = template_loader.get_all_templates()
         return {"templates": templates}
@@ -371,6 +476,10 @@ async def enhance_prompt(request: EnhancePromptRequest):
         else:
             report_style = ReportStyle.FRIENDLY
 
+        from src.prompt_enhancer.graph.builder import (
+            build_graph as build_prompt_enhancer_graph,
+        )
+
         workflow = build_prompt_enhancer_graph()
         final_state = workflow.invoke(
             {
@@ -397,6 +506,8 @@ async def mcp_server_metadata(request: MCPServerMetadataRequest):
             timeout = request.timeout_seconds
 
         # Load tools from the MCP server using the utility function
+        from src.server.mcp_utils import load_mcp_tools
+
         tools = await load_mcp_tools(
             server_type=request.transport,
             command=request.command,
@@ -425,22 +536,28 @@ async def mcp_server_metadata(request: MCPServerMetadataRequest):
 @app.get("/api/rag/config", response_model=RAGConfigResponse)
 async def rag_config():
     """Get the config of the RAG."""
-    return RAGConfigResponse(provider=SELECTED_RAG_PROVIDER)
+    return RAGConfigResponse(provider=get_settings().rag_provider)
 
 
 @app.get("/api/rag/resources", response_model=RAGResourcesResponse)
 async def rag_resources(request: Annotated[RAGResourceRequest, Query()]):
     """Get the resources of the RAG."""
+    from src.rag.builder import build_retriever
+
     retriever = build_retriever()
     if retriever:
-        return RAGResourcesResponse(resources=retriever.list_resources(request.query))
+        return RAGResourcesResponse(
+            resources=await retriever.alist_resources(request.query)
+        )
     return RAGResourcesResponse(resources=[])
 
 
 @app.get("/api/config", response_model=ConfigResponse)
 async def config():
     """Get the config of the server."""
+    from src.llms.llm import get_configured_llm_models
+
     return ConfigResponse(
-        rag=RAGConfigResponse(provider=SELECTED_RAG_PROVIDER),
+        rag=RAGConfigResponse(provider=get_settings().rag_provider),
         models=get_configured_llm_models(),
     )
@@ -74,6 +74,10 @@ class ChatRequest(BaseModel):
         None,
         description="Selected template ID for outreach message structure"
     )
+    enable_timing_event: Optional[bool] = Field(
+        False,
+        description="Whether to send a timing event with the run timeline at the end",
+    )
 
 
 class TTSRequest(BaseModel):
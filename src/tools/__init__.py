@@ -5,6 +5,8 @@ import os
 
 from .crawl import crawl_tool
 from .python_repl import python_repl_tool
+from .raw_content import fetch_full_text_tool
+from .research_memory import research_memory_search_tool
 from .retriever import get_retriever_tool
 from .search import (
     get_web_search_tool,
@@ -18,6 +20,8 @@ from .tts import VolcengineTTS
 __all__ = [
     "crawl_tool",
     "python_repl_tool",
+    "fetch_full_text_tool",
+    "research_memory_search_tool",
     "get_web_search_tool",
     "get_enhanced_outreach_search_tool",
     "get_linkedin_search_tool", 
@@ -0,0 +1,208 @@
+# Copyright (c) 2025 Peter Liu
+# SPDX-License-Identifier: MIT
+
+"""
+Multi-query background investigation.
+
+Before planning, the research topic is searched from a few angles at once:
+the request itself, the person, their company and their recent activity.
+The queries run concurrently within a time budget and their results are
+merged into one deduplicated, ranked markdown block for the planner.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import re
+from typing import Any, Optional
+from urllib.parse import urlsplit
+
+from src.tools.search import get_web_search_tool
+from src.utils import near_duplicates
+
+logger = logging.getLogger(__name__)
+
+# Capitalized phrases such as "Sarah Chen" or "TechCorp"
+_NAME = re.compile(r"\b[A-Z][A-Za-z&.'-]*(?:\s+[A-Z][A-Za-z&.'-]*)*")
+# A company introduced by "at", "of", "from" or "@"
+_COMPANY = re.compile(
+    r"(?:\bat|\bof|\bfrom|@)\s*([A-Z][A-Za-z0-9&.'-]*(?:\s+[A-Z][A-Za-z0-9&.'-]*)*)"
+)
+# Capitalized words that start a request rather than name someone
+_NOT_NAMES = {"Write", "Draft", "Help", "Please", "Create", "Compose", "Send", "I"}
+# Job titles are capitalized too, but are not what to search for
+_TITLES = {"CEO", "CTO", "CFO", "COO", "CMO", "CPO", "VP", "Head", "Director"}
+
+
+def _entities(topic: str) -> tuple[Optional[str], Optional[str]]:
+    """Guess the person and company a request is about, if it names them."""
+    company_match = _COMPANY.search(topic)
+    company = company_match.group(1) if company_match else None
+    person = None
+    for match in _NAME.finditer(topic):
+        words = [w for w in match.group(0).split() if w not in _NOT_NAMES | _TITLES]
+        candidate = " ".join(words)
+        if candidate and candidate != company and len(words) >= 2:
+            person = candidate
+            break
+    return person, company
+
+
+def background_queries(topic: str, max_queries: int = 4) -> list[str]:
+    """Search queries covering the request, person, company and recent news."""
+    queries = [topic]
+    person, company = _entities(topic)
+    if person:
+        queries.append(
+            " ".join(filter(None, [person, company, "professional background"]))
+        )
+    if company:
+        queries.append(f"{company} company news")
+    if person:
+        queries.append(f"{person} recent posts interviews talks")
+    elif not company:
+        queries.append(f"{topic} recent news")
+
+    unique = []
+    for query in queries:
+        if query.casefold() not in (q.casefold() for q in unique):
+            unique.append(query)
+    return unique[:max_queries]
+
+
+def _parse(searched_content: Any) -> Any:
+    # The Tavily tools return their result list as a JSON string
+    if isinstance(searched_content, str):
+        try:
+            return json.loads(searched_content)
+        except ValueError:
+            return searched_content
+    return searched_content
+
+
+def _url_key(url: str) -> str:
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower().removeprefix("www.")
+    return f"{host}{parts.path.rstrip('/')}"
+
+
+def merge_results(results: list[Any], max_results: int = 10) -> str:
+    """
+    Merge the results of several queries into one markdown block.
+
+    Pages are deduplicated by URL and content and ranked by the number of
+    queries that found them, then by their best position in a result list.
+    Images follow the pages; plain-text results (from engines that return
+    text) are appended once each.
+    """
+    pages: dict[str, dict] = {}
+    seen_content: dict[str, str] = {}
+    images: dict[str, dict] = {}
+    texts: list[str] = []
+
+    for query_index, searched_content in enumerate(results):
+        searched_content = _parse(searched_content)
+        if isinstance(searched_content, str):
+            if searched_content.strip() and searched_content not in texts:
+                texts.append(searched_content)
+            continue
+        if not isinstance(searched_content, list):
+            logger.error(
+                f"Search tool returned unexpected response type: "
+                f"{type(searched_content)}, content: {searched_content}"
+            )
+            texts.append(json.dumps(searched_content, ensure_ascii=False))
+            continue
+
+        for position, elem in enumerate(searched_content):
+            if not isinstance(elem, dict):
+                continue
+            if elem.get("type") == "image":
+                images.setdefault(elem.get("image_url", ""), elem)
+                continue
+            # Pages, including the legacy format without a 'type' field
+            if "title" not in elem or "content" not in elem:
+                continue
+            content = (elem.get("content") or "").strip()
+            key = _url_key(elem.get("url") or "") or content
+            if content:
+                key = seen_content.get(content, key)
+            page = pages.get(key)
+            if page is None:
+                pages[key] = {
+                    "elem": elem,
+                    "queries": {query_index},
+                    "position": position,
+                }
+                if content:
+                    seen_content.setdefault(content, key)
+            else:
+                page["queries"].add(query_index)
+                page["position"] = min(page["position"], position)
+
+    ranked = sorted(pages.values(), key=lambda p: (-len(p["queries"]), p["position"]))[
+        :max_results
+    ]
+    blocks = [f"## {p['elem']['title']}\n\n{p['elem']['content']}" for p in ranked]
+    blocks += [
+        f"![{elem.get('image_description', '')}]({url})"
+        for url, elem in images.items()
+        if url
+    ]
+    blocks += texts
+    return "\n\n".join(blocks)
+
+
+async def investigate(topic: str, max_search_results: int = 3) -> str:
+    """
+    Search the topic from several angles concurrently and merge the results.
+
+    ``BACKGROUND_INVESTIGATION_QUERIES`` caps the number of queries (default
+    4), ``BACKGROUND_INVESTIGATION_TIMEOUT`` the seconds to wait for them
+    (default 15); queries still running then are cancelled and whatever has
+    arrived is used. ``BACKGROUND_INVESTIGATION_MAX_RESULTS`` caps the merged
+    pages (default 10).
+    """
+    queries = background_queries(
+        topic, int(os.getenv("BACKGROUND_INVESTIGATION_QUERIES", "4"))
+    )
+    timeout = float(os.getenv("BACKGROUND_INVESTIGATION_TIMEOUT", "15"))
+    search_tool = get_web_search_tool(max_search_results)
+    logger.info(f"Background investigation queries: {queries}")
+
+    # The planner reads these results, not the agents; they must not make the
+    # agents' own searches look like repeats
+    with near_duplicates.suspended():
+        tasks = [
+            asyncio.create_task(search_tool.ainvoke({"query": query}))
+            for query in queries
+        ]
+    try:
+        done, pending = await asyncio.wait(tasks, timeout=timeout)
+    finally:
+        # Also when the investigation itself is cancelled
+        for task in tasks:
+            task.cancel()
+    if pending:
+        logger.warning(
+            f"{len(pending)} of {len(tasks)} background queries did not finish "
+            f"within {timeout:g}s"
+        )
+
+    results, errors = [], []
+    for query, task in zip(queries, tasks):
+        if task not in done:
+            continue
+        if task.exception() is not None:
+            logger.error(f"Background query '{query}' failed: {task.exception()}")
+            errors.append(str(task.exception()))
+            continue
+        results.append(task.result())
+
+    if not results:
+        reason = "; ".join(errors) or f"no results within {timeout:g}s"
+        return f"Error occurred during background investigation: {reason}"
+    return merge_results(
+        results, int(os.getenv("BACKGROUND_INVESTIGATION_MAX_RESULTS", "10"))
+    )
@@ -2,26 +2,129 @@
 # SPDX-License-Identifier: MIT
 
 import logging
-from typing import Annotated
+import os
+from typing import Annotated, Optional
 
 from langchain_core.tools import tool
 from .decorators import log_io
 
 from src.crawler import Crawler
+from src.tools.raw_content import get_raw_content, make_result_id, store_raw_content
+from src.tools.research_memory import current_memory
+from src.utils.bm25 import bm25_scores
+from src.utils.context_assembler import count_tokens, truncate_to_tokens
+from src.utils.near_duplicates import canonicalize_url, filter_results
+from src.utils.run_context import current_step_query
+from src.utils.text import split_text
 
 logger = logging.getLogger(__name__)
 
 
+def select_sections(
+    markdown: str, query: Optional[str], page: int, token_budget: int
+) -> dict:
+    """
+    Split a crawled page into sections, rank them against the query with
+    BM25 (document order without a query) and return page ``page`` of the
+    ranking: the sections that fit the token budget, in document order.
+    """
+    sections = split_text(
+        markdown, int(os.getenv("CRAWL_SECTION_CHARS", "1200")), overlap=0
+    )
+    if not sections:
+        return {"crawled_content": "", "page": 1, "pages": 0}
+
+    order = list(range(len(sections)))
+    if query:
+        scores = bm25_scores(query, sections)
+        order.sort(key=lambda i: (-scores[i], i))
+
+    pages: list[list[int]] = []
+    current: list[int] = []
+    used = 0
+    for i in order:
+        tokens = count_tokens(sections[i])
+        if current and used + tokens > token_budget:
+            pages.append(current)
+            current, used = [], 0
+        current.append(i)
+        used += tokens
+    pages.append(current)
+
+    page = max(1, page)
+    if page > len(pages):
+        return {
+            "crawled_content": "",
+            "page": page,
+            "pages": len(pages),
+            "note": f"The page has only {len(pages)} page(s) of sections.",
+        }
+    shown = sorted(pages[page - 1])
+    content = "\n\n".join(
+        f"[Section {i + 1} of {len(sections)}]\n"
+        f"{truncate_to_tokens(sections[i], token_budget)}"
+        for i in shown
+    )
+    selection = {"crawled_content": content, "page": page, "pages": len(pages)}
+    if page < len(pages):
+        selection["next_page"] = page + 1
+    return selection
+
+
 @tool
 @log_io
 def crawl_tool(
     url: Annotated[str, "The url to crawl."],
-) -> str:
-    """Use this to crawl a url and get a readable content in markdown format."""
+    query: Annotated[
+        Optional[str],
+        "What you are looking for on the page; the most relevant sections come "
+        "first. Defaults to the current research step.",
+    ] = None,
+    page: Annotated[
+        int,
+        "Which page of sections to return. Pass next_page from a previous call "
+        "to read more of the same url without fetching it again.",
+    ] = 1,
+):
+    """Use this to crawl a url and get its most relevant content in markdown format."""
     try:
-        crawler = Crawler()
-        article = crawler.crawl(url)
-        return {"url": url, "crawled_content": article.to_markdown()[:1000]}
+        # Pages are kept per thread, so that further pages of sections or
+        # another query on the same url don't fetch it again
+        page_id = make_result_id(f"crawl:{canonicalize_url(url)}")
+        cached = get_raw_content(page_id)
+        if cached is not None:
+            title, markdown = cached["title"], cached["text"]
+        else:
+            crawler = Crawler()
+            article = crawler.crawl(url)
+            title, markdown = article.title, article.to_markdown()
+            # The same page under another URL, or a syndicated copy of it;
+            # the URL itself may have been crawled before, but its text has
+            # been evicted from the raw content store since
+            if not filter_results(
+                [{"url": url, "crawled_content": markdown}],
+                source="crawl",
+                text_key="crawled_content",
+                kind="crawl",
+                refetch=True,
+            ):
+                return {
+                    "url": url,
+                    "crawled_content": "",
+                    "note": "This page repeats a page already crawled in this run.",
+                }
+            store_raw_content(url, title or "", markdown, rid=page_id)
+            memory = current_memory()
+            if memory is not None:
+                memory.add(url, title or "", markdown, "crawl_tool")
+
+        selection = select_sections(
+            markdown,
+            query or current_step_query(),
+            page,
+            int(os.getenv("CRAWL_TOKEN_BUDGET", "1500")),
+        )
+        return {"url": url, "title": title, "id": page_id, **selection}
     except BaseException as e:
         error_msg = f"Failed to crawl. Error: {repr(e)}"
         logger.error(error_msg)
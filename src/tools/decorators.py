@@ -5,6 +5,8 @@ import logging
 import functools
 from typing import Any, Callable, Type, TypeVar
 
+from src.utils.log_pipeline import capped, format_call
+
 logger = logging.getLogger(__name__)
 
 T = TypeVar("T")
@@ -23,18 +25,18 @@ def log_io(func: Callable) -> Callable:
 
     @functools.wraps(func)
     def wrapper(*args: Any, **kwargs: Any) -> Any:
-        # Log input parameters
+        # Log input parameters; rendering and size capping happen only when
+        # the record is formatted
         func_name = func.__name__
-        params = ", ".join(
-            [*(str(arg) for arg in args), *(f"{k}={v}" for k, v in kwargs.items())]
+        logger.info(
+            "Tool %s called with parameters: %s", func_name, format_call(args, kwargs)
         )
-        logger.info(f"Tool {func_name} called with parameters: {params}")
 
         # Execute the function
         result = func(*args, **kwargs)
 
         # Log the output
-        logger.info(f"Tool {func_name} returned: {result}")
+        logger.info("Tool %s returned: %s", func_name, capped(result))
 
         return result
 
@@ -47,17 +49,21 @@ class LoggedToolMixin:
     def _log_operation(self, method_name: str, *args: Any, **kwargs: Any) -> None:
         """Helper method to log tool operations."""
         tool_name = self.__class__.__name__.replace("Logged", "")
-        params = ", ".join(
-            [*(str(arg) for arg in args), *(f"{k}={v}" for k, v in kwargs.items())]
+        logger.debug(
+            "Tool %s.%s called with parameters: %s",
+            tool_name,
+            method_name,
+            format_call(args, kwargs),
         )
-        logger.debug(f"Tool {tool_name}.{method_name} called with parameters: {params}")
 
     def _run(self, *args: Any, **kwargs: Any) -> Any:
         """Override _run method to add logging."""
         self._log_operation("_run", *args, **kwargs)
         result = super()._run(*args, **kwargs)
         logger.debug(
-            f"Tool {self.__class__.__name__.replace('Logged', '')} returned: {result}"
+            "Tool %s returned: %s",
+            self.__class__.__name__.replace("Logged", ""),
+            capped(result),
         )
         return result
 
@@ -66,7 +72,9 @@ class LoggedToolMixin:
         self._log_operation("_arun", *args, **kwargs)
         result = await super()._arun(*args, **kwargs)
         logger.debug(
-            f"Tool {self.__class__.__name__.replace('Logged', '')} returned: {result}"
+            "Tool %s returned: %s",
+            self.__class__.__name__.replace("Logged", ""),
+            capped(result),
         )
         return result
 
@@ -7,7 +7,11 @@ from langchain_core.tools import tool
 from langchain_experimental.utilities import PythonREPL
 from .decorators import log_io
 
-# Initialize REPL and logger
+from src.sandbox import get_sandbox_pool, sandbox_enabled
+from src.utils.run_context import current_thread_id
+
+# Initialize REPL and logger; the in-process REPL is only used when the
+# sandbox is disabled with PYTHON_REPL_SANDBOX=false
 repl = PythonREPL()
 logger = logging.getLogger(__name__)
 
@@ -27,6 +31,24 @@ def python_repl_tool(
         return f"Error executing code:\n```python\n{code}\n```\nError: {error_msg}"
 
     logger.info("Executing Python code")
+    if sandbox_enabled():
+        # Each graph thread has its own namespace in a worker process
+        execution = get_sandbox_pool().run(
+            code, session=current_thread_id() or "default"
+        )
+        if execution.error:
+            logger.error(execution.error)
+            output = f"Stdout: {execution.output}\n" if execution.output else ""
+            return (
+                f"Error executing code:\n```python\n{code}\n```\n"
+                f"{output}Error: {execution.error}"
+            )
+        logger.info(f"Code execution successful in {execution.duration:.2f}s")
+        return (
+            f"Successfully executed:\n```python\n{code}\n```\n"
+            f"Stdout: {execution.output}"
+        )
+
     try:
         result = repl.run(code)
         # Check if the result is an error message by looking for typical error patterns
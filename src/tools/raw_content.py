@@ -0,0 +1,133 @@
+# Copyright (c) 2025 Peter Liu
+# SPDX-License-Identifier: MIT
+
+"""
+Out-of-band storage of the full text of search results.
+
+In lean payload mode (``TAVILY_PAYLOAD_MODE=lean``, the default) search
+tools return only the snippet of each result plus an ``id``; the full page
+text Tavily returns is kept here, per thread, and the agent reads it with
+``fetch_full_text_tool`` when a snippet is not enough.
+"""
+
+import hashlib
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Annotated, Optional
+
+from langchain_core.tools import tool
+
+from src.utils.run_context import current_thread_id
+
+from .decorators import log_io
+
+logger = logging.getLogger(__name__)
+
+
+def lean_payload_enabled() -> bool:
+    """Whether search tools return lean results (``TAVILY_PAYLOAD_MODE``)."""
+    return os.getenv("TAVILY_PAYLOAD_MODE", "lean").lower() != "full"
+
+
+def make_result_id(url: str) -> str:
+    """A short stable id for a search result."""
+    return "r" + hashlib.sha1(url.encode("utf-8")).hexdigest()[:10]
+
+
+class RawContentStore:
+    """Full texts of one thread's search results, evicting the oldest first."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries: "OrderedDict[str, dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, url: str, title: str, text: str, rid: Optional[str] = None) -> str:
+        rid = rid or make_result_id(url)
+        size = len(text.encode("utf-8"))
+        with self._lock:
+            previous = self._entries.pop(rid, None)
+            if previous:
+                self.size -= previous["size"]
+            self._entries[rid] = {
+                "url": url,
+                "title": title,
+                "text": text,
+                "size": size,
+            }
+            self.size += size
+            while self.size > self.max_bytes and len(self._entries) > 1:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= evicted["size"]
+        return rid
+
+    def get(self, rid: str) -> Optional[dict]:
+        with self._lock:
+            return self._entries.get(rid)
+
+
+_stores: "OrderedDict[str, RawContentStore]" = OrderedDict()
+_stores_lock = threading.Lock()
+
+
+def _current_store() -> RawContentStore:
+    # Outside a graph run (scripts, benchmarks) results share one store
+    thread_id = current_thread_id() or ""
+    max_threads = int(os.getenv("RAW_CONTENT_MAX_THREADS", "64"))
+    with _stores_lock:
+        store = _stores.get(thread_id)
+        if store is None:
+            store = _stores[thread_id] = RawContentStore(
+                int(os.getenv("RAW_CONTENT_MAX_BYTES", str(8 * 1024 * 1024)))
+            )
+        _stores.move_to_end(thread_id)
+        while len(_stores) > max_threads:
+            _stores.popitem(last=False)
+        return store
+
+
+def store_raw_content(
+    url: str, title: str, text: str, rid: Optional[str] = None
+) -> str:
+    """
+    Keep the full text of a result for the current thread; returns its id,
+    ``rid`` if given, else one derived from the URL.
+    """
+    return _current_store().put(url, title, text, rid)
+
+
+def get_raw_content(rid: str) -> Optional[dict]:
+    """The stored result with this id in the current thread, if any."""
+    return _current_store().get(rid)
+
+
+@tool
+@log_io
+def fetch_full_text_tool(
+    result_id: Annotated[str, "The id of a search result, e.g. 'r1a2b3c4d5e'."],
+    offset: Annotated[int, "Character offset to continue reading from."] = 0,
+    max_chars: Annotated[int, "Maximum number of characters to return."] = 4000,
+):
+    """Read the full page text of a search result by its id, when its snippet is not enough."""
+    entry = get_raw_content(result_id)
+    if entry is None:
+        return (
+            f"No stored text for result id '{result_id}'. "
+            "Use crawl_tool with the result's URL instead."
+        )
+    text = entry["text"]
+    offset = max(0, offset)
+    end = min(len(text), offset + max(1, max_chars))
+    page = {
+        "id": result_id,
+        "url": entry["url"],
+        "title": entry["title"],
+        "text": text[offset:end],
+        "total_chars": len(text),
+    }
+    if end < len(text):
+        page["next_offset"] = end
+    return page
@@ -0,0 +1,317 @@
+# Copyright (c) 2025 Peter Liu
+# SPDX-License-Identifier: MIT
+
+"""
+Per-thread memory of everything the agents' tools have retrieved.
+
+After each agent step, the results of its tool calls (search snippets,
+crawled pages, full texts, knowledge base documents) are split into chunks
+and added to the thread's ``ResearchMemory``, keyed by URL and chunk. Later
+steps search it with ``research_memory_search`` instead of repeating web
+searches. Scoring is BM25, blended with hashing-embedder cosine similarity
+when ``RESEARCH_MEMORY_VECTORS`` is enabled. Set ``RESEARCH_MEMORY=false``
+to disable it.
+"""
+
+import hashlib
+import json
+import logging
+import math
+import os
+import threading
+from collections import Counter, OrderedDict
+from typing import Annotated, Any, Iterable, Optional
+
+import numpy as np
+from langchain_core.tools import tool
+
+from src.rag.embedder import HashingEmbedder, tokenize
+from src.utils.near_duplicates import canonicalize_url
+from src.utils.run_context import current_thread_id
+from src.utils.text import split_text
+
+from .decorators import log_io
+
+logger = logging.getLogger(__name__)
+
+TOOL_NAME = "research_memory_search"
+# Tool outputs shorter than this are messages ("No results found"), not evidence
+_MIN_TEXT_CHARS = 80
+# Keys holding the text of a result, fullest first
+_TEXT_KEYS = ("raw_content", "crawled_content", "text", "content")
+
+
+def memory_enabled() -> bool:
+    return os.getenv("RESEARCH_MEMORY", "true").lower() not in ("false", "0", "no")
+
+
+class ResearchMemory:
+    """
+    BM25 index over the chunks of the pages a thread has retrieved.
+
+    A page is indexed once per URL; a longer text of the same URL (the
+    crawled page after its search snippet) replaces the shorter one. The
+    oldest pages are evicted beyond ``max_chunks`` chunks.
+    """
+
+    def __init__(
+        self,
+        max_chunks: int = 5000,
+        chunk_chars: int = 800,
+        vectors: bool = False,
+        hybrid_weight: float = 0.5,
+        k1: float = 1.2,
+        b: float = 0.75,
+    ):
+        self.max_chunks = max_chunks
+        self.chunk_chars = chunk_chars
+        self.embedder = HashingEmbedder() if vectors else None
+        self.hybrid_weight = hybrid_weight
+        self.k1 = k1
+        self.b = b
+        self._pages: "OrderedDict[str, dict]" = OrderedDict()
+        self._chunks: dict[int, dict] = {}
+        self._postings: dict[str, dict[int, int]] = {}
+        self._total_length = 0
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self.searches = 0
+
+    def __len__(self) -> int:
+        return len(self._chunks)
+
+    def add(self, url: Optional[str], title: str, text: str, source: str) -> int:
+        """Index a page; returns the number of chunks added (0 if known)."""
+        text = (text or "").strip()
+        if len(text) < _MIN_TEXT_CHARS:
+            return 0
+        key = (
+            canonicalize_url(url)
+            if url
+            else f"{source}:{hashlib.sha1(text.encode()).hexdigest()[:12]}"
+        )
+        chunks = split_text(text, self.chunk_chars, overlap=100)
+        vectors = self.embedder.embed(chunks) if self.embedder and chunks else None
+
+        with self._lock:
+            page = self._pages.get(key)
+            if page is not None:
+                if page["length"] >= len(text):
+                    self._pages.move_to_end(key)
+                    return 0
+                self._remove(key)
+            ids = []
+            for i, chunk in enumerate(chunks):
+                chunk_id = self._next_id
+                self._next_id += 1
+                frequencies = Counter(tokenize(chunk))
+                length = sum(frequencies.values())
+                self._chunks[chunk_id] = {
+                    "page": key,
+                    "text": chunk,
+                    "length": length,
+                    "terms": frequencies,
+                    "vector": vectors[i] if vectors is not None else None,
+                }
+                for term, count in frequencies.items():
+                    self._postings.setdefault(term, {})[chunk_id] = count
+                self._total_length += length
+                ids.append(chunk_id)
+            self._pages[key] = {
+                "url": url,
+                "title": title or "",
+                "source": source,
+                "length": len(text),
+                "chunks": ids,
+            }
+            while len(self._chunks) > self.max_chunks and len(self._pages) > 1:
+                self._remove(next(iter(self._pages)))
+        return len(ids)
+
+    def _remove(self, key: str):
+        page = self._pages.pop(key)
+        for chunk_id in page["chunks"]:
+            chunk = self._chunks.pop(chunk_id)
+            self._total_length -= chunk["length"]
+            for term in chunk["terms"]:
+                postings = self._postings[term]
+                del postings[chunk_id]
+                if not postings:
+                    del self._postings[term]
+
+    def search(self, query: str, max_results: int = 5) -> list[dict]:
+        """The chunks best matching a query, best first."""
+        query_vector = (
+            self.embedder.embed([query])[0] if self.embedder is not None else None
+        )
+        with self._lock:
+            self.searches += 1
+            if not self._chunks:
+                return []
+            count = len(self._chunks)
+            average_length = self._total_length / count
+            scores: dict[int, float] = {}
+            for term in set(tokenize(query)):
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(
+                    1 + (count - len(postings) + 0.5) / (len(postings) + 0.5)
+                )
+                for chunk_id, frequency in postings.items():
+                    length = self._chunks[chunk_id]["length"]
+                    norm = self.k1 * (1 - self.b + self.b * length / average_length)
+                    weight = frequency * (self.k1 + 1) / (frequency + norm)
+                    scores[chunk_id] = scores.get(chunk_id, 0.0) + idf * weight
+
+            if query_vector is not None:
+                ids = list(self._chunks)
+                matrix = np.stack([self._chunks[i]["vector"] for i in ids])
+                similarities = matrix @ query_vector
+                best = max(scores.values(), default=0.0) or 1.0
+                w = self.hybrid_weight
+                scores = {
+                    chunk_id: (1 - w) * scores.get(chunk_id, 0.0) / best
+                    + w * float(similarity)
+                    for chunk_id, similarity in zip(ids, similarities)
+                }
+
+            ranked = sorted(
+                (item for item in scores.items() if item[1] > 0),
+                key=lambda item: item[1],
+                reverse=True,
+            )[:max_results]
+            results = []
+            for chunk_id, score in ranked:
+                chunk = self._chunks[chunk_id]
+                page = self._pages[chunk["page"]]
+                result = {
+                    "title": page["title"],
+                    "source": page["source"],
+                    "content": chunk["text"],
+                    "score": round(score, 3),
+                }
+                if page["url"]:
+                    result["url"] = page["url"]
+                results.append(result)
+            return results
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "pages": len(self._pages),
+            "chunks": len(self._chunks),
+            "searches": self.searches,
+        }
+
+
+def _parse(content: Any) -> Any:
+    if isinstance(content, str):
+        stripped = content.strip()
+        if stripped[:1] in ("[", "{"):
+            try:
+                return json.loads(stripped)
+            except ValueError:
+                pass
+    return content
+
+
+def extract_pages(content: Any) -> Iterable[tuple[Optional[str], str, str]]:
+    """The (url, title, text) of the pages in a tool result."""
+    content = _parse(content)
+    if isinstance(content, list):
+        # LangChain content blocks, or a list of results
+        for item in content:
+            if (
+                isinstance(item, dict)
+                and item.get("type") == "text"
+                and "url" not in item
+            ):
+                yield from extract_pages(item.get("text", ""))
+            else:
+                yield from extract_pages(item)
+    elif isinstance(content, dict):
+        if content.get("type") == "image":
+            return
+        text = next((content[k] for k in _TEXT_KEYS if content.get(k)), "")
+        if isinstance(text, str):
+            yield content.get("url"), content.get("title") or "", text
+    elif isinstance(content, str) and not content.startswith("Error"):
+        yield None, "", content
+
+
+_memories: "OrderedDict[str, ResearchMemory]" = OrderedDict()
+_memories_lock = threading.Lock()
+
+
+def get_memory(thread_id: str) -> ResearchMemory:
+    """The memory of a thread; the least recently used ones are evicted."""
+    max_threads = int(os.getenv("RESEARCH_MEMORY_MAX_THREADS", "64"))
+    with _memories_lock:
+        memory = _memories.get(thread_id)
+        if memory is None:
+            memory = _memories[thread_id] = ResearchMemory(
+                max_chunks=int(os.getenv("RESEARCH_MEMORY_MAX_CHUNKS", "5000")),
+                vectors=os.getenv("RESEARCH_MEMORY_VECTORS", "false").lower()
+                in ("true", "1", "yes"),
+            )
+        _memories.move_to_end(thread_id)
+        while len(_memories) > max_threads:
+            _memories.popitem(last=False)
+        return memory
+
+
+def reset_memory(thread_id: str) -> None:
+    """Forget what a thread retrieved, e.g. when a new run starts."""
+    with _memories_lock:
+        _memories.pop(thread_id, None)
+
+
+def memory_stats(thread_id: str) -> Optional[dict]:
+    with _memories_lock:
+        memory = _memories.get(thread_id)
+    return memory.stats if memory else None
+
+
+def current_memory() -> Optional[ResearchMemory]:
+    """The memory of the thread the caller runs in, if any."""
+    if not memory_enabled():
+        return None
+    thread_id = current_thread_id()
+    return get_memory(thread_id) if thread_id else None
+
+
+def record_tool_messages(messages: Iterable[Any]) -> int:
+    """
+    Add the results of the tool calls among an agent's messages to the
+    current thread's memory; returns the number of chunks added.
+    """
+    memory = current_memory()
+    if memory is None:
+        return 0
+    added = 0
+    for message in messages:
+        if getattr(message, "type", None) != "tool":
+            continue
+        source = getattr(message, "name", None) or "tool"
+        if source == TOOL_NAME:
+            continue
+        for url, title, text in extract_pages(message.content):
+            added += memory.add(url, title, text, source)
+    if added:
+        logger.info(f"Research memory: +{added} chunks, {memory.stats}")
+    return added
+
+
+@tool(TOOL_NAME)
+@log_io
+def research_memory_search_tool(
+    query: Annotated[str, "What to look for, as keywords or a question."],
+    max_results: Annotated[int, "Maximum number of passages to return."] = 5,
+):
+    """Search the pages, snippets and documents already retrieved in this research run. Use it before a new web search for facts that earlier steps may have found; it answers in milliseconds."""
+    memory = current_memory()
+    results = memory.search(query, max(1, max_results)) if memory else []
+    if not results:
+        return "Nothing retrieved earlier in this run matches; search the web instead."
+    return results
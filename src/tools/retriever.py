@@ -10,7 +10,7 @@ from langchain_core.callbacks import (
 )
 from pydantic import BaseModel, Field
 
-from src.config.tools import SELECTED_RAG_PROVIDER
+from src.config.settings import get_settings
 from src.rag import Document, Retriever, Resource, build_retriever
 
 logger = logging.getLogger(__name__)
@@ -18,6 +18,26 @@ logger = logging.getLogger(__name__)
 
 class RetrieverInput(BaseModel):
     keywords: str = Field(description="search keywords to look up")
+    more_keywords: list[str] = Field(
+        default_factory=list,
+        description="other keyword searches to run at the same time, if any",
+    )
+
+
+def merge_documents(results: list[list[Document]]) -> list[Document]:
+    """Merge the documents of several queries, without repeating chunks."""
+    merged: dict[str, Document] = {}
+    for documents in results:
+        for doc in documents:
+            existing = merged.get(doc.id)
+            if existing is None:
+                merged[doc.id] = Document(
+                    id=doc.id, url=doc.url, title=doc.title, chunks=list(doc.chunks)
+                )
+                continue
+            seen = {chunk.content for chunk in existing.chunks}
+            existing.chunks.extend(c for c in doc.chunks if c.content not in seen)
+    return list(merged.values())
 
 
 class RetrieverTool(BaseTool):
@@ -33,12 +53,19 @@ class RetrieverTool(BaseTool):
     def _run(
         self,
         keywords: str,
+        more_keywords: Optional[list[str]] = None,
         run_manager: Optional[CallbackManagerForToolRun] = None,
     ) -> list[Document]:
+        queries = [keywords, *(more_keywords or [])]
         logger.info(
-            f"Retriever tool query: {keywords}", extra={"resources": self.resources}
+            f"Retriever tool query: {queries}", extra={"resources": self.resources}
+        )
+        documents = merge_documents(
+            [
+                self.retriever.query_relevant_documents(query, self.resources)
+                for query in queries
+            ]
         )
-        documents = self.retriever.query_relevant_documents(keywords, self.resources)
         if not documents:
             return "No results found from the local knowledge base."
         return [doc.to_dict() for doc in documents]
@@ -46,15 +73,27 @@ class RetrieverTool(BaseTool):
     async def _arun(
         self,
         keywords: str,
+        more_keywords: Optional[list[str]] = None,
         run_manager: Optional[AsyncCallbackManagerForToolRun] = None,
     ) -> list[Document]:
-        return self._run(keywords, run_manager.get_sync())
+        queries = [keywords, *(more_keywords or [])]
+        logger.info(
+            f"Retriever tool query: {queries}", extra={"resources": self.resources}
+        )
+        documents = merge_documents(
+            await self.retriever.abatch_query_relevant_documents(
+                queries, self.resources
+            )
+        )
+        if not documents:
+            return "No results found from the local knowledge base."
+        return [doc.to_dict() for doc in documents]
 
 
 def get_retriever_tool(resources: List[Resource]) -> RetrieverTool | None:
     if not resources:
         return None
-    logger.info(f"create retriever tool: {SELECTED_RAG_PROVIDER}")
+    logger.info(f"create retriever tool: {get_settings().rag_provider}")
     retriever = build_retriever()
 
     if not retriever:
@@ -9,7 +9,8 @@ from langchain_community.tools import BraveSearch, DuckDuckGoSearchResults
 from langchain_community.tools.arxiv import ArxivQueryRun
 from langchain_community.utilities import ArxivAPIWrapper, BraveSearchWrapper
 
-from src.config import SearchEngine, SELECTED_SEARCH_ENGINE
+from src.config import SearchEngine
+from src.config.settings import get_settings
 from src.tools.tavily_search.tavily_search_results_with_images import (
     TavilySearchResultsWithImages,
 )
@@ -38,16 +39,18 @@ LoggedGeneralOutreachSearch = create_logged_tool(GeneralOutreachSearchTool)
 # Get the selected search tool
 def get_web_search_tool(max_search_results: int):
     """Get the primary web search tool based on configuration."""
-    if SELECTED_SEARCH_ENGINE == SearchEngine.TAVILY.value:
+    # Read per call, so that a changed SEARCH_API applies after a reload
+    search_engine = get_settings().search_engine
+    if search_engine == SearchEngine.TAVILY.value:
         return LoggedGeneralOutreachSearch(
             name="web_search",
         )
-    elif SELECTED_SEARCH_ENGINE == SearchEngine.DUCKDUCKGO.value:
+    elif search_engine == SearchEngine.DUCKDUCKGO.value:
         return LoggedDuckDuckGoSearch(
             name="web_search",
             num_results=max_search_results,
         )
-    elif SELECTED_SEARCH_ENGINE == SearchEngine.BRAVE_SEARCH.value:
+    elif search_engine == SearchEngine.BRAVE_SEARCH.value:
         return LoggedBraveSearch(
             name="web_search",
             search_wrapper=BraveSearchWrapper(
@@ -55,7 +58,7 @@ def get_web_search_tool(max_search_results: int):
                 search_kwargs={"count": max_search_results},
             ),
         )
-    elif SELECTED_SEARCH_ENGINE == SearchEngine.ARXIV.value:
+    elif search_engine == SearchEngine.ARXIV.value:
         return LoggedArxivSearch(
             name="web_search",
             api_wrapper=ArxivAPIWrapper(
@@ -65,7 +68,7 @@ def get_web_search_tool(max_search_results: int):
             ),
         )
     else:
-        raise ValueError(f"Unsupported search engine: {SELECTED_SEARCH_ENGINE}")
+        raise ValueError(f"Unsupported search engine: {search_engine}")
 
 
 def get_enhanced_outreach_search_tool():
@@ -1,13 +1,10 @@
 # Copyright (c) 2025 Peter Liu
 # SPDX-License-Identifier: MIT
 
-import aiohttp
-import os
 import json
 import re
 import logging
 from datetime import datetime
-from pathlib import Path
 from typing import Dict, List, Optional, Union, Tuple
 
 from langchain.callbacks.manager import (
@@ -17,25 +14,20 @@ from langchain.callbacks.manager import (
 from langchain_core.tools import BaseTool
 from pydantic import BaseModel, Field
 
+from src.config.settings import get_settings
+from src.tools.raw_content import lean_payload_enabled, store_raw_content
+from src.utils.http_cassette import async_http_request
+from src.utils.log_pipeline import capped
+from src.utils.near_duplicates import filter_results
+
 logger = logging.getLogger(__name__)
 
 # Load API key from conf.yaml or environment
 def get_tavily_api_key():
     """Get Tavily API key from configuration or environment variables."""
-    # Try to load from conf.yaml first
-    try:
-        from src.config import load_yaml_config
-        config_path = str((Path(__file__).parent.parent.parent.parent / "conf.yaml").resolve())
-        config = load_yaml_config(config_path)
-        if "TOOLS" in config and "search" in config["TOOLS"] and "tavily_api_key" in config["TOOLS"]["search"]:
-            return config["TOOLS"]["search"]["tavily_api_key"]
-    except Exception as e:
-        logger.warning(f"Could not load Tavily API key from conf.yaml: {e}")
-    
-    # Fallback to environment variable
-    return os.getenv("TAVILY_API_KEY")
-
-TAVILY_API_KEY = get_tavily_api_key() or ""
+    # conf.yaml first, then TAVILY_API_KEY; read per call so that a rotated
+    # key applies once conf.yaml is saved
+    return get_settings().tavily_api_key
 
 PLATFORM_EMOJIS = {
     "twitter.com": "🐦",
@@ -79,96 +71,127 @@ def dedup_results(results):
         deduped.append(r)
     return deduped
 
+def format_results_markdown(results: List[Dict], domain: Optional[str] = None) -> str:
+    """Render Tavily results as markdown blocks with social media metadata."""
+    md_blocks = []
+    for r in results:
+        title = escape_md(r.get("title", ""))
+        url_ = r.get("url", "")
+        content = escape_md(r.get("content", ""))
+        image_url = r.get("image_url") or r.get("image")
+        username = escape_md(r.get("author") or r.get("username") or "")
+        timestamp = normalize_date(r.get("timestamp") or r.get("published_time") or "")
+        
+        # Extract platform from URL
+        platform = domain if domain else (url_.split("/")[2] if url_ else "")
+        platform = str(platform)
+        badge = PLATFORM_EMOJIS.get(platform, "🌐")
+        
+        # Truncate long content with read more link
+        if len(content) > 400:
+            content = content[:400] + f"... [Read more]({url_})"
+        
+        # Build metadata block
+        meta_top = []
+        if username:
+            meta_top.append(f"👤 **User:** {username}")
+        if timestamp:
+            meta_top.append(f"🕒 **Time:** {timestamp}")
+        meta_top_str = "  ".join(meta_top)
+        
+        image_block = f"\n![Preview]({image_url})\n" if image_url else ""
+        
+        # Format result as markdown
+        md = f"{badge} **[{title}]({url_})**\n"
+        if meta_top_str:
+            md += f"{meta_top_str}\n"
+        if image_block:
+            md += f"{image_block}"
+        md += f"\n{content}\n"
+        md += f"\n🔗 [Open in {platform}]({url_}) 🏷️ **Source:** {platform}"
+        
+        # Store raw metadata for potential future use
+        raw_meta = json.dumps(r, ensure_ascii=False)
+        md += f"\n<!-- RAW_METADATA: {raw_meta} -->\n"
+        
+        md_blocks.append(md)
+    
+    return "\n\n".join(md_blocks) if md_blocks else "No results found."
+
+def build_agent_results(results: List[Dict], lean: bool) -> List[Dict]:
+    """
+    Convert Tavily results to what the agent receives.
+
+    In lean mode each page carries an ``id`` instead of images, and its
+    full text goes to the raw content store, readable by id with
+    ``fetch_full_text_tool``.
+    """
+    json_results = []
+    for r in results:
+        page = {
+            "type": "page",
+            "title": r.get("title", ""),
+            "url": r.get("url", ""),
+            "content": r.get("content", ""),
+        }
+        if lean:
+            if r.get("raw_content") and page["url"]:
+                page["id"] = store_raw_content(
+                    page["url"], page["title"], r["raw_content"]
+                )
+            json_results.append(page)
+            continue
+        json_results.append(page)
+        if r.get("image_url") or r.get("image"):
+            json_results.append({
+                "type": "image",
+                "image_url": r.get("image_url") or r.get("image"),
+                "image_description": r.get("title", ""),
+            })
+    return json_results
+
 async def search_tavily(query: str, max_results: int = 5, domain: str = None) -> str:
     """Enhanced Tavily search with social media metadata extraction."""
-    if not TAVILY_API_KEY:
+    api_key = get_tavily_api_key()
+    if not api_key:
         return "Error: Tavily API key not found in conf.yaml or environment variables"
     
+    lean = lean_payload_enabled()
     url = "https://api.tavily.com/search"
-    headers = {"Authorization": f"Bearer {TAVILY_API_KEY}"}
+    headers = {"Authorization": f"Bearer {api_key}"}
     params = {
         "query": query,
         "max_results": max_results,
         "include_raw_content": True,
-        "include_images": True,
+        # Lean results carry no images, so don't ask for them
+        "include_images": not lean,
     }
     if domain:
         params["include_domains"] = [domain]
         
-    logger.info(f"[TAVILY] Query: {query}, Params: {params}")
+    logger.info("[TAVILY] Query: %s, Params: %s", query, params)
     
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.post(url, headers=headers, json=params) as resp:
-                data = await resp.json()
-                logger.info(f"[TAVILY] Raw response: {json.dumps(data, indent=2, ensure_ascii=False)}")
-                
-                results = data.get("results", [])
-                results = dedup_results(results)
-                
-                md_blocks = []
-                for r in results:
-                    title = escape_md(r.get("title", ""))
-                    url_ = r.get("url", "")
-                    content = escape_md(r.get("content", ""))
-                    image_url = r.get("image_url") or r.get("image")
-                    username = escape_md(r.get("author") or r.get("username") or "")
-                    timestamp = normalize_date(r.get("timestamp") or r.get("published_time") or "")
-                    
-                    # Extract platform from URL
-                    platform = domain if domain else (url_.split("/")[2] if url_ else "")
-                    platform = str(platform)
-                    badge = PLATFORM_EMOJIS.get(platform, "🌐")
-                    
-                    # Truncate long content with read more link
-                    if len(content) > 400:
-                        content = content[:400] + f"... [Read more]({url_})"
-                    
-                    # Build metadata block
-                    meta_top = []
-                    if username:
-                        meta_top.append(f"👤 **User:** {username}")
-                    if timestamp:
-                        meta_top.append(f"🕒 **Time:** {timestamp}")
-                    meta_top_str = "  ".join(meta_top)
-                    
-                    image_block = f"\n![Preview]({image_url})\n" if image_url else ""
-                    
-                    # Format result as markdown
-                    md = f"{badge} **[{title}]({url_})**\n"
-                    if meta_top_str:
-                        md += f"{meta_top_str}\n"
-                    if image_block:
-                        md += f"{image_block}"
-                    md += f"\n{content}\n"
-                    md += f"\n🔗 [Open in {platform}]({url_}) 🏷️ **Source:** {platform}"
-                    
-                    # Store raw metadata for potential future use
-                    raw_meta = json.dumps(r, ensure_ascii=False)
-                    md += f"\n<!-- RAW_METADATA: {raw_meta} -->\n"
-                    
-                    md_blocks.append(md)
-                
-                output = "\n\n".join(md_blocks) if md_blocks else "No results found."
-                logger.info(f"[TAVILY] Markdown output: {output[:500]}")  # Truncate for log
-                
-                # Convert results to a JSON structure for the frontend
-                json_results = []
-                for r in results:
-                    json_results.append({
-                        "type": "page",
-                        "title": r.get("title", ""),
-                        "url": r.get("url", ""),
-                        "content": r.get("content", ""),
-                    })
-                    if r.get("image_url") or r.get("image"):
-                        json_results.append({
-                            "type": "image",
-                            "image_url": r.get("image_url") or r.get("image"),
-                            "image_description": r.get("title", ""),
-                        })
-                
-                return json.dumps(json_results, ensure_ascii=False)
+        resp = await async_http_request("POST", url, headers=headers, json_body=params)
+        data = resp.json()
+        logger.debug("[TAVILY] Raw response: %s", capped(data))
+        
+        results = data.get("results", [])
+        results = dedup_results(results)
+        # Drop pages the other search tools already returned in this run
+        found = len(results)
+        results = filter_results(results, source=domain or "web")
+        if found and not results:
+            return "No new results: all pages were already retrieved in this run."
+        
+        # Convert results to a JSON structure for the frontend
+        json_results = build_agent_results(results, lean)
+        payload = json.dumps(json_results, ensure_ascii=False)
+        logger.info(
+            "[TAVILY] %d results, %d response bytes, %d payload bytes",
+            len(json_results), len(resp.content), len(payload.encode("utf-8")),
+        )
+        return payload
     except Exception as e:
         logger.error(f"Error in Tavily search: {e}")
         return f"Error occurred during search: {str(e)}"
@@ -5,13 +5,14 @@
 import json
 from typing import Dict, List, Optional
 
-import aiohttp
-import requests
 from langchain_community.utilities.tavily_search import TAVILY_API_URL
 from langchain_community.utilities.tavily_search import (
     TavilySearchAPIWrapper as OriginalTavilySearchAPIWrapper,
 )
 
+from src.tools.raw_content import lean_payload_enabled, store_raw_content
+from src.utils.http_cassette import async_http_request, http_request
+
 
 class EnhancedTavilySearchAPIWrapper(OriginalTavilySearchAPIWrapper):
     def raw_results(
@@ -38,8 +39,8 @@ class EnhancedTavilySearchAPIWrapper(OriginalTavilySearchAPIWrapper):
             "include_images": include_images,
             "include_image_descriptions": include_image_descriptions,
         }
-        response = requests.post(
-            # type: ignore
+        response = http_request(
+            "POST",
             f"{TAVILY_API_URL}/search",
             json=params,
         )
@@ -74,22 +75,28 @@ class EnhancedTavilySearchAPIWrapper(OriginalTavilySearchAPIWrapper):
                 "include_images": include_images,
                 "include_image_descriptions": include_image_descriptions,
             }
-            async with aiohttp.ClientSession(trust_env=True) as session:
-                async with session.post(f"{TAVILY_API_URL}/search", json=params) as res:
-                    if res.status == 200:
-                        data = await res.text()
-                        return data
-                    else:
-                        raise Exception(f"Error {res.status}: {res.reason}")
+            res = await async_http_request(
+                "POST", f"{TAVILY_API_URL}/search", json_body=params, trust_env=True
+            )
+            if res.status == 200:
+                return res.text
+            else:
+                raise Exception(f"Error {res.status}: {res.reason}")
 
         results_json_str = await fetch()
         return json.loads(results_json_str)
 
     def clean_results_with_images(
-        self, raw_results: Dict[str, List[Dict]]
+        self, raw_results: Dict[str, List[Dict]], lean: Optional[bool] = None
     ) -> List[Dict]:
+        """Clean results from Tavily Search API.
+
+        In lean mode (default: ``TAVILY_PAYLOAD_MODE``) the raw content of a
+        page is kept out of the result, which carries its store ``id``.
+        """
+        if lean is None:
+            lean = lean_payload_enabled()
         results = raw_results["results"]
-        """Clean results from Tavily Search API."""
         clean_results = []
         for result in results:
             clean_result = {
@@ -100,9 +107,14 @@ class EnhancedTavilySearchAPIWrapper(OriginalTavilySearchAPIWrapper):
                 "score": result["score"],
             }
             if raw_content := result.get("raw_content"):
-                clean_result["raw_content"] = raw_content
+                if lean:
+                    clean_result["id"] = store_raw_content(
+                        result["url"], result["title"], raw_content
+                    )
+                else:
+                    clean_result["raw_content"] = raw_content
             clean_results.append(clean_result)
-        images = raw_results["images"]
+        images = raw_results.get("images") or []
         for image in images:
             clean_result = {
                 "type": "image",
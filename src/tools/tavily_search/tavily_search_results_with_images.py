@@ -14,6 +14,7 @@ from pydantic import Field
 from src.tools.tavily_search.tavily_search_api_wrapper import (
     EnhancedTavilySearchAPIWrapper,
 )
+from src.utils.near_duplicates import filter_results
 
 
 class TavilySearchResultsWithImages(TavilySearchResults):  # type: ignore[override, override]
@@ -122,7 +123,9 @@ class TavilySearchResultsWithImages(TavilySearchResults):  # type: ignore[overri
             )
         except Exception as e:
             return repr(e)
-        cleaned_results = self.api_wrapper.clean_results_with_images(raw_results)
+        cleaned_results = filter_results(
+            self.api_wrapper.clean_results_with_images(raw_results), source="web"
+        )
         print("sync", json.dumps(cleaned_results, indent=2, ensure_ascii=False))
         # Return as JSON string instead of list to avoid LangChain compatibility issues
         return json.dumps(cleaned_results, ensure_ascii=False)
@@ -147,7 +150,9 @@ class TavilySearchResultsWithImages(TavilySearchResults):  # type: ignore[overri
             )
         except Exception as e:
             return repr(e)
-        cleaned_results = self.api_wrapper.clean_results_with_images(raw_results)
+        cleaned_results = filter_results(
+            self.api_wrapper.clean_results_with_images(raw_results), source="web"
+        )
         print("async", json.dumps(cleaned_results, indent=2, ensure_ascii=False))
         # Return as JSON string instead of list to avoid LangChain compatibility issues
         return json.dumps(cleaned_results, ensure_ascii=False)
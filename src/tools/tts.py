@@ -8,9 +8,10 @@ Text-to-Speech module using volcengine TTS API.
 import json
 import uuid
 import logging
-import requests
 from typing import Optional, Dict, Any
 
+from src.utils.http_cassette import http_request
+
 logger = logging.getLogger(__name__)
 
 
@@ -104,8 +105,8 @@ class VolcengineTTS:
         try:
             sanitized_text = text.replace("\r\n", "").replace("\n", "")
             logger.debug(f"Sending TTS request for text: {sanitized_text[:50]}...")
-            response = requests.post(
-                self.api_url, json.dumps(request_json), headers=self.header
+            response = http_request(
+                "POST", self.api_url, data=json.dumps(request_json), headers=self.header
             )
             response_json = response.json()
 
@@ -0,0 +1,34 @@
+# Copyright (c) 2025 Peter Liu
+# SPDX-License-Identifier: MIT
+
+"""
+Okapi BM25 scoring of a handful of texts, e.g. the chunks of one page.
+"""
+
+import math
+from collections import Counter
+
+from src.utils.text import tokenize
+
+
+def bm25_scores(
+    query: str, texts: list[str], k1: float = 1.2, b: float = 0.75
+) -> list[float]:
+    """The BM25 score of each text for a query (0 for texts sharing no term)."""
+    documents = [Counter(tokenize(text)) for text in texts]
+    lengths = [sum(document.values()) for document in documents]
+    if not documents or not any(lengths):
+        return [0.0] * len(texts)
+    average_length = sum(lengths) / len(lengths)
+    scores = [0.0] * len(texts)
+    for term in set(tokenize(query)):
+        containing = sum(1 for document in documents if term in document)
+        if not containing:
+            continue
+        idf = math.log(1 + (len(texts) - containing + 0.5) / (containing + 0.5))
+        for i, document in enumerate(documents):
+            frequency = document.get(term, 0)
+            if frequency:
+                norm = k1 * (1 - b + b * lengths[i] / average_length)
+                scores[i] += idf * frequency * (k1 + 1) / (frequency + norm)
+    return scores
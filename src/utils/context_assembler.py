@@ -0,0 +1,248 @@
+# Copyright (c) 2025 Peter Liu
+# SPDX-License-Identifier: MIT
+
+"""
+Token-budgeted assembly of "Existing Research Findings" for agent steps.
+
+Every completed step used to be pasted verbatim into the next step's prompt,
+which makes prompt size grow quadratically with the number of steps. The
+assembler keeps the most recent findings verbatim, reduces older ones to
+their most informative lines and strips raw tool noise, all within a token
+budget per agent.
+"""
+
+import logging
+import re
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Iterable
+
+logger = logging.getLogger(__name__)
+
+# Rough characters-per-token ratio used when tiktoken is unavailable.
+_CHARS_PER_TOKEN = 4
+
+# Raw tool output that carries no information for the next step.
+_NOISE_PATTERNS = [
+    re.compile(r"<!--\s*RAW_METADATA:.*?-->", re.DOTALL),
+    re.compile(r"!\[[^\]]*\]\([^)]*\)"),  # inline images
+    re.compile(r"data:[\w/+.-]+;base64,[A-Za-z0-9+/=]{64,}"),
+    re.compile(r"[A-Za-z0-9+/=]{200,}"),  # long opaque blobs (tokens, hashes)
+]
+_BLANK_LINES = re.compile(r"\n{3,}")
+_HEADING = re.compile(r"^\s{0,3}#{1,6}\s")
+_BULLET = re.compile(r"^\s*(?:[-*+]|\d+[.)])\s+")
+_HAS_FACT = re.compile(r"\d|https?://|@")
+
+_OMITTED = "[omitted to fit the context budget]"
+
+
+@lru_cache(maxsize=1)
+def _get_encoding():
+    try:
+        import tiktoken
+
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        # tiktoken downloads its BPE file on first use, which fails offline;
+        # fall back to the character heuristic when it is not available.
+        logger.debug(f"tiktoken unavailable, using heuristic token counts: {e}")
+        return None
+
+
+def count_tokens(text: str) -> int:
+    """Count the tokens of a text, approximately if no tokenizer is installed."""
+    if not text:
+        return 0
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return (len(text) + _CHARS_PER_TOKEN - 1) // _CHARS_PER_TOKEN
+
+
+def count_message_tokens(messages: Iterable[Any]) -> int:
+    """Count the tokens of a list of chat messages (dicts or LangChain messages)."""
+    total = 0
+    for message in messages:
+        content = (
+            message.get("content", "")
+            if isinstance(message, dict)
+            else getattr(message, "content", "")
+        )
+        if isinstance(content, list):
+            content = " ".join(
+                part.get("text", "") if isinstance(part, dict) else str(part)
+                for part in content
+            )
+        # A few tokens of per-message overhead for role and separators.
+        total += count_tokens(str(content)) + 4
+    return total
+
+
+def strip_tool_noise(text: str) -> str:
+    """Remove embedded raw metadata, images and opaque blobs from a finding."""
+    if not text:
+        return ""
+    for pattern in _NOISE_PATTERNS:
+        text = pattern.sub("", text)
+    return _BLANK_LINES.sub("\n\n", text).strip()
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Cut a text down to at most ``max_tokens`` tokens."""
+    if max_tokens <= 0:
+        return ""
+    if count_tokens(text) <= max_tokens:
+        return text
+    encoding = _get_encoding()
+    if encoding is not None:
+        tokens = encoding.encode(text, disallowed_special=())
+        return encoding.decode(tokens[:max_tokens])
+    return text[: max_tokens * _CHARS_PER_TOKEN]
+
+
+def extract_key_lines(text: str, max_tokens: int) -> str:
+    """
+    Reduce a finding to its most informative lines within ``max_tokens``.
+
+    Headings are kept first, then bullet points and lines carrying facts
+    (numbers, links, handles), then the remaining prose. The selected lines
+    are emitted in their original order.
+    """
+    if count_tokens(text) <= max_tokens:
+        return text
+
+    lines = [line for line in text.splitlines() if line.strip()]
+
+    def priority(line: str) -> int:
+        if _HEADING.match(line):
+            return 0
+        if _BULLET.match(line) and _HAS_FACT.search(line):
+            return 1
+        if _BULLET.match(line) or _HAS_FACT.search(line):
+            return 2
+        return 3
+
+    ranked = sorted(range(len(lines)), key=lambda i: (priority(lines[i]), i))
+    selected: set[int] = set()
+    used = 0
+    for i in ranked:
+        cost = count_tokens(lines[i]) + 1
+        if used + cost > max_tokens:
+            continue
+        selected.add(i)
+        used += cost
+
+    if not selected:
+        return truncate_to_tokens(text, max_tokens)
+    return "\n".join(lines[i] for i in sorted(selected))
+
+
+@dataclass
+class AssembledContext:
+    """The rendered findings block together with its accounting."""
+
+    text: str
+    budget: int
+    original_tokens: int
+    final_tokens: int
+    verbatim: int = 0
+    compressed: int = 0
+    dropped: int = 0
+    details: list[dict] = field(default_factory=list)
+
+    def summary(self) -> str:
+        return (
+            f"budget={self.budget} tokens, findings {self.original_tokens} -> "
+            f"{self.final_tokens} tokens (verbatim={self.verbatim}, "
+            f"compressed={self.compressed}, dropped={self.dropped})"
+        )
+
+
+def assemble_findings(
+    findings: list[tuple[str, str]],
+    budget: int,
+    keep_recent: int = 1,
+) -> AssembledContext:
+    """
+    Render completed step findings into an "Existing Research Findings" block.
+
+    Args:
+        findings: ``(title, execution_res)`` pairs in execution order
+        budget: Maximum number of tokens the block may use
+        keep_recent: Number of most recent findings to keep verbatim if they fit
+
+    Returns:
+        The assembled context with per-finding accounting
+    """
+    if not findings:
+        return AssembledContext(
+            text="", budget=budget, original_tokens=0, final_tokens=0
+        )
+
+    header = "# Existing Research Findings\n\n"
+    original_tokens = sum(count_tokens(res or "") for _, res in findings)
+    cleaned = [(title, strip_tool_noise(res or "")) for title, res in findings]
+
+    remaining = budget - count_tokens(header)
+    bodies: list[str | None] = [None] * len(cleaned)
+    modes: list[str] = ["dropped"] * len(cleaned)
+
+    # Reserve room for every title so that older steps are at least named.
+    remaining -= sum(
+        count_tokens(f"## Existing Finding {i + 1}: {title}\n\n")
+        for i, (title, _) in enumerate(cleaned)
+    )
+
+    # Newest findings first: keep them verbatim while they fit.
+    order = list(range(len(cleaned) - 1, -1, -1))
+    recent = order[:keep_recent]
+    older = order[keep_recent:]
+    for i in recent:
+        body = cleaned[i][1]
+        cost = count_tokens(body) + 4
+        if cost <= remaining:
+            bodies[i], modes[i] = body, "verbatim"
+            remaining -= cost
+        else:
+            older.insert(0, i)
+
+    # Share what is left among older findings, newest first.
+    for n, i in enumerate(older):
+        if remaining <= 16:
+            break
+        share = remaining // (len(older) - n)
+        body = extract_key_lines(cleaned[i][1], share - 4)
+        if not body:
+            continue
+        bodies[i] = body
+        modes[i] = "verbatim" if body == cleaned[i][1] else "compressed"
+        remaining -= count_tokens(body) + 4
+
+    parts = [header]
+    details = []
+    for i, (title, _) in enumerate(cleaned):
+        parts.append(f"## Existing Finding {i + 1}: {title}\n\n")
+        if bodies[i] is not None:
+            parts.append(f"<finding>\n{bodies[i]}\n</finding>\n\n")
+        else:
+            parts.append(f"<finding>\n{_OMITTED}\n</finding>\n\n")
+        details.append(
+            {
+                "title": title,
+                "mode": modes[i],
+                "tokens": count_tokens(bodies[i] or ""),
+            }
+        )
+
+    text = "".join(parts)
+    return AssembledContext(
+        text=text,
+        budget=budget,
+        original_tokens=original_tokens,
+        final_tokens=count_tokens(text),
+        verbatim=modes.count("verbatim"),
+        compressed=modes.count("compressed"),
+        dropped=modes.count("dropped"),
+        details=details,
+    )
@@ -0,0 +1,382 @@
+# Copyright (c) 2025 Peter Liu
+# SPDX-License-Identifier: MIT
+
+"""
+Record/replay of external HTTP traffic (Tavily, Jina reader, RAGFlow, TTS).
+
+All outbound tool HTTP calls go through ``http_request`` (requests) or
+``async_http_request`` (aiohttp). ``HTTP_CASSETTE_MODE`` selects what they do:
+
+- ``off`` (default): plain pass-through
+- ``record``: pass through and append every request/response pair to a
+  gzip-compressed JSON-lines cassette
+- ``replay``: serve responses from the cassette without touching the network,
+  either with the recorded latency or immediately
+
+Requests are matched on method, URL, query parameters and body. Volatile
+fields such as ``reqid`` and ``uid`` and credentials are ignored; credentials
+are also redacted before anything is written. Identical requests recorded
+several times are replayed in recorded order.
+"""
+
+import asyncio
+import base64
+import gzip
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import aiohttp
+import requests
+from requests.structures import CaseInsensitiveDict
+
+logger = logging.getLogger(__name__)
+
+# Fields that differ between otherwise identical requests.
+DEFAULT_VOLATILE_FIELDS = {"reqid", "uid", "request_id", "timestamp", "nonce"}
+# Fields that carry credentials; ignored for matching and never written.
+SECRET_FIELDS = {"api_key", "token", "access_token", "appid"}
+_REDACTED = "***"
+
+
+class CassetteMissError(LookupError):
+    """Raised in replay mode when no recorded response matches a request."""
+
+
+@dataclass
+class HTTPResponse:
+    """A fully read HTTP response, independent of the client library."""
+
+    status: int
+    reason: str = ""
+    headers: dict[str, str] = field(default_factory=dict)
+    content: bytes = b""
+
+    @property
+    def text(self) -> str:
+        return self.content.decode("utf-8", errors="replace")
+
+    def json(self) -> Any:
+        return json.loads(self.content)
+
+
+def _scrub(value: Any, ignored: set[str], replacement: Any = None) -> Any:
+    """Drop (or replace) ignored keys anywhere in a JSON-like value."""
+    if isinstance(value, dict):
+        result = {}
+        for key, item in value.items():
+            if key in ignored:
+                if replacement is not None:
+                    result[key] = replacement
+                continue
+            result[key] = _scrub(item, ignored, replacement)
+        return result
+    if isinstance(value, list):
+        return [_scrub(item, ignored, replacement) for item in value]
+    return value
+
+
+def _parse_body(json_body: Any = None, data: Any = None) -> Any:
+    if json_body is not None:
+        return json_body
+    if data is None:
+        return None
+    if isinstance(data, bytes):
+        data = data.decode("utf-8", errors="replace")
+    if isinstance(data, str):
+        try:
+            return json.loads(data)
+        except ValueError:
+            return data
+    return data
+
+
+def _strip_query(url: str, ignored: set[str]) -> str:
+    parts = urlsplit(url)
+    query = [(k, v) for k, v in parse_qsl(parts.query) if k not in ignored]
+    return urlunsplit(parts._replace(query=urlencode(sorted(query))))
+
+
+class Cassette:
+    """
+    A gzip-compressed JSON-lines file of recorded HTTP interactions.
+    """
+
+    def __init__(
+        self,
+        path: str | os.PathLike,
+        mode: str = "replay",
+        latency: str = "recorded",
+        volatile_fields: Optional[set[str]] = None,
+    ):
+        self.path = Path(path)
+        self.mode = mode
+        self.latency = latency
+        self.ignored = (volatile_fields or DEFAULT_VOLATILE_FIELDS) | SECRET_FIELDS
+        self._lock = threading.Lock()
+        self._interactions: dict[str, list[dict]] = defaultdict(list)
+        self._cursor: dict[str, int] = defaultdict(int)
+        if mode == "replay":
+            self._load()
+
+    def _load(self) -> None:
+        if not self.path.exists():
+            logger.warning(f"Cassette {self.path} does not exist, requests will miss")
+            return
+        count = 0
+        with gzip.open(self.path, "rt", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    interaction = json.loads(line)
+                    self._interactions[interaction["key"]].append(interaction)
+                    count += 1
+        logger.info(f"Loaded {count} recorded HTTP interactions from {self.path}")
+
+    def key(
+        self,
+        method: str,
+        url: str,
+        params: Optional[dict] = None,
+        json_body: Any = None,
+        data: Any = None,
+    ) -> str:
+        """Compute the matching key of a request."""
+        body = _scrub(_parse_body(json_body, data), self.ignored)
+        request = {
+            "method": method.upper(),
+            "url": _strip_query(url, self.ignored),
+            "params": sorted(
+                (k, str(v)) for k, v in (params or {}).items() if k not in self.ignored
+            ),
+            "body": body,
+        }
+        encoded = json.dumps(request, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(encoded.encode()).hexdigest()
+
+    def lookup(self, key: str, method: str, url: str) -> tuple[HTTPResponse, float]:
+        """Return the next recorded response for a key and its latency."""
+        with self._lock:
+            recorded = self._interactions.get(key)
+            if not recorded:
+                raise CassetteMissError(
+                    f"No recorded response for {method.upper()} {url} in {self.path}"
+                )
+            index = min(self._cursor[key], len(recorded) - 1)
+            self._cursor[key] += 1
+        interaction = recorded[index]["response"]
+        if interaction.get("encoding") == "base64":
+            content = base64.b64decode(interaction["body"])
+        else:
+            content = interaction["body"].encode("utf-8")
+        response = HTTPResponse(
+            status=interaction["status"],
+            reason=interaction.get("reason", ""),
+            headers=interaction.get("headers", {}),
+            content=content,
+        )
+        latency = interaction.get("latency", 0.0) if self.latency == "recorded" else 0.0
+        return response, latency
+
+    def record(
+        self,
+        key: str,
+        method: str,
+        url: str,
+        body: Any,
+        response: HTTPResponse,
+        latency: float,
+    ) -> None:
+        """Append an interaction; credentials in the request are redacted."""
+        try:
+            response_body, encoding = response.content.decode("utf-8"), "utf-8"
+        except UnicodeDecodeError:
+            response_body = base64.b64encode(response.content).decode("ascii")
+            encoding = "base64"
+        interaction = {
+            "key": key,
+            "request": {
+                "method": method.upper(),
+                "url": _strip_query(url, SECRET_FIELDS),
+                "body": _scrub(body, SECRET_FIELDS, _REDACTED),
+            },
+            "response": {
+                "status": response.status,
+                "reason": response.reason,
+                "headers": {
+                    k: v
+                    for k, v in response.headers.items()
+                    if k.lower() == "content-type"
+                },
+                "body": response_body,
+                "encoding": encoding,
+                "latency": round(latency, 4),
+            },
+        }
+        line = json.dumps(interaction, ensure_ascii=False, default=str) + "\n"
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            # Every append adds a gzip member; readers see one continuous stream.
+            with gzip.open(self.path, "at", encoding="utf-8") as f:
+                f.write(line)
+
+
+_cassette: Optional[Cassette] = None
+_cassette_lock = threading.Lock()
+
+
+def get_cassette() -> Optional[Cassette]:
+    """
+    Return the cassette selected by environment variables, or None when off.
+
+    ``HTTP_CASSETTE_MODE`` is ``off``, ``record`` or ``replay``;
+    ``HTTP_CASSETTE_PATH`` the cassette file (default
+    ``.cache/cassettes/default.jsonl.gz``); ``HTTP_CASSETTE_LATENCY`` is
+    ``recorded`` or ``zero``; ``HTTP_CASSETTE_IGNORE_FIELDS`` adds
+    comma-separated volatile fields.
+    """
+    global _cassette
+    mode = os.getenv("HTTP_CASSETTE_MODE", "off").lower()
+    if mode not in ("record", "replay"):
+        return None
+    with _cassette_lock:
+        if _cassette is None or _cassette.mode != mode:
+            extra = {
+                f.strip()
+                for f in os.getenv("HTTP_CASSETTE_IGNORE_FIELDS", "").split(",")
+                if f.strip()
+            }
+            _cassette = Cassette(
+                os.getenv("HTTP_CASSETTE_PATH", ".cache/cassettes/default.jsonl.gz"),
+                mode=mode,
+                latency=os.getenv("HTTP_CASSETTE_LATENCY", "recorded").lower(),
+                volatile_fields=DEFAULT_VOLATILE_FIELDS | extra,
+            )
+            logger.info(f"HTTP cassette in {mode} mode: {_cassette.path}")
+        return _cassette
+
+
+def _to_requests_response(response: HTTPResponse, url: str) -> requests.Response:
+    result = requests.Response()
+    result.status_code = response.status
+    result.reason = response.reason
+    result.headers = CaseInsensitiveDict(response.headers)
+    result._content = response.content
+    result.encoding = "utf-8"
+    result.url = url
+    return result
+
+
+def http_request(
+    method: str,
+    url: str,
+    session: Optional[requests.Session] = None,
+    **kwargs: Any,
+) -> requests.Response:
+    """
+    Send a request with ``requests``, recording or replaying it if enabled.
+
+    Accepts the keyword arguments of ``requests.request``; with a ``session``
+    its pooled connections are reused.
+    """
+    client = session or requests
+    cassette = get_cassette()
+    if cassette is None:
+        return client.request(method, url, **kwargs)
+
+    body = _parse_body(kwargs.get("json"), kwargs.get("data"))
+    key = cassette.key(
+        method, url, kwargs.get("params"), kwargs.get("json"), kwargs.get("data")
+    )
+    if cassette.mode == "replay":
+        response, latency = cassette.lookup(key, method, url)
+        if latency:
+            time.sleep(latency)
+        return _to_requests_response(response, url)
+
+    start = time.perf_counter()
+    result = client.request(method, url, **kwargs)
+    latency = time.perf_counter() - start
+    cassette.record(
+        key,
+        method,
+        url,
+        body,
+        HTTPResponse(
+            status=result.status_code,
+            reason=result.reason or "",
+            headers=dict(result.headers),
+            content=result.content,
+        ),
+        latency,
+    )
+    return result
+
+
+async def _read_response(
+    session: aiohttp.ClientSession, method: str, url: str, request_kwargs: dict
+) -> HTTPResponse:
+    async with session.request(method, url, **request_kwargs) as resp:
+        return HTTPResponse(
+            status=resp.status,
+            reason=resp.reason or "",
+            headers=dict(resp.headers),
+            content=await resp.read(),
+        )
+
+
+async def async_http_request(
+    method: str,
+    url: str,
+    *,
+    headers: Optional[dict] = None,
+    params: Optional[dict] = None,
+    json_body: Any = None,
+    data: Any = None,
+    timeout: Optional[float] = None,
+    trust_env: bool = False,
+    session: Optional[aiohttp.ClientSession] = None,
+) -> HTTPResponse:
+    """
+    Send a request with ``aiohttp`` and read it fully, recording or replaying
+    it if enabled. A ``session``, if given, is used (and left open) instead
+    of a new one, so that its pooled connections are reused.
+    """
+    cassette = get_cassette()
+    key = None
+    if cassette is not None:
+        key = cassette.key(method, url, params, json_body, data)
+        if cassette.mode == "replay":
+            response, latency = cassette.lookup(key, method, url)
+            if latency:
+                await asyncio.sleep(latency)
+            return response
+
+    request_kwargs: dict[str, Any] = {
+        "headers": headers,
+        "params": params,
+        "json": json_body,
+        "data": data,
+    }
+    if timeout:
+        request_kwargs["timeout"] = aiohttp.ClientTimeout(total=timeout)
+    start = time.perf_counter()
+    if session is not None:
+        response = await _read_response(session, method, url, request_kwargs)
+    else:
+        async with aiohttp.ClientSession(trust_env=trust_env) as new_session:
+            response = await _read_response(new_session, method, url, request_kwargs)
+    latency = time.perf_counter() - start
+
+    if cassette is not None:
+        cassette.record(
+            key, method, url, _parse_body(json_body, data), response, latency
+        )
+    return response
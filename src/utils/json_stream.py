@@ -0,0 +1,157 @@
+# Copyright (c) 2025 Peter Liu
+# SPDX-License-Identifier: MIT
+
+"""
+Incremental parsing of a JSON object that arrives in chunks, e.g. LLM tokens.
+"""
+
+import json
+import logging
+from typing import Any, Iterable, Optional
+
+import json_repair
+
+from src.utils.json_utils import repair_json_output
+
+logger = logging.getLogger(__name__)
+
+
+class IncrementalObjectParser:
+    """
+    Parse a streamed JSON object and report its parts as soon as they close.
+
+    ``feed`` returns events for everything completed by the new text:
+
+    - ``("field", key, value)`` for each top-level field
+    - ``("item", key, index, value)`` for each element of the top-level
+      arrays named in ``item_fields``, e.g. the steps of a plan
+
+    Text before the opening brace (such as a ```json fence) and after the
+    closing brace is ignored. Every character is scanned once, and chunks
+    are joined only when a completed part is sliced out of the text.
+    """
+
+    def __init__(self, item_fields: Iterable[str] = ()):
+        self.item_fields = set(item_fields)
+        self._chunks: list[str] = []
+        self._length = 0
+        self.fields: dict[str, Any] = {}
+        self.items: dict[str, list] = {key: [] for key in self.item_fields}
+        self.closed = False
+        self._pos = 0  # index of the character being scanned
+        self._root = -1  # index of the opening brace
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._string_start = -1
+        self._key: Optional[str] = None
+        self._expect_key = False
+        self._value_start = -1
+        self._item_start = -1
+
+    @property
+    def text(self) -> str:
+        """All text fed so far."""
+        if len(self._chunks) > 1:
+            self._chunks = ["".join(self._chunks)]
+        return self._chunks[0] if self._chunks else ""
+
+    def feed(self, chunk: str) -> list[tuple]:
+        """Add text and return the events it completes."""
+        if not chunk or self.closed:
+            return []
+        base = self._length
+        self._chunks.append(chunk)
+        self._length += len(chunk)
+        events: list[tuple] = []
+        for offset, char in enumerate(chunk):
+            if self.closed:
+                break
+            self._pos = base + offset
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    if self._depth == 1 and self._expect_key:
+                        self._key = self._loads(
+                            self.text[self._string_start : self._pos + 1]
+                        )
+                        self._expect_key = False
+            elif self._root < 0:
+                if char == "{":
+                    self._root = self._pos
+                    self._depth = 1
+                    self._expect_key = True
+            elif char == '"':
+                self._in_string = True
+                self._string_start = self._pos
+            elif char in "{[":
+                if char == "{" and self._depth == 2 and self._key in self.item_fields:
+                    self._item_start = self._pos
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+                if self._depth == 2 and self._item_start >= 0 and char == "}":
+                    self._emit_item(self.text[self._item_start : self._pos + 1], events)
+                    self._item_start = -1
+                elif self._depth == 0:
+                    self._emit_field(self.text[self._value_start : self._pos], events)
+                    self.closed = True
+            elif self._depth == 1:
+                if char == ":":
+                    self._value_start = self._pos + 1
+                elif char == ",":
+                    self._emit_field(self.text[self._value_start : self._pos], events)
+                    self._expect_key = True
+        return events
+
+    @staticmethod
+    def _loads(text: str) -> Any:
+        try:
+            return json.loads(text)
+        except ValueError:
+            return json_repair.loads(text)
+
+    def _emit_item(self, text: str, events: list):
+        try:
+            value = self._loads(text)
+        except Exception as e:
+            logger.warning(f"Could not parse streamed '{self._key}' item: {e}")
+            return
+        items = self.items[self._key]
+        items.append(value)
+        events.append(("item", self._key, len(items) - 1, value))
+
+    def _emit_field(self, text: str, events: list):
+        if self._key is None or self._value_start < 0 or not text.strip():
+            return
+        try:
+            value = self._loads(text)
+        except Exception as e:
+            logger.warning(f"Could not parse streamed field '{self._key}': {e}")
+            return
+        self.fields[self._key] = value
+        events.append(("field", self._key, value))
+        self._key = None
+        self._value_start = -1
+
+    def snapshot(self) -> dict:
+        """The fields and items parsed so far."""
+        return {**self.fields, **{k: list(v) for k, v in self.items.items() if v}}
+
+    def result(self) -> Optional[dict]:
+        """
+        The complete object, or the repaired text if the stream was cut off
+        or is not valid JSON; None if nothing could be recovered.
+        """
+        if self.closed and len(self.fields) > 0:
+            return dict(self.fields)
+        repaired = repair_json_output(self.text)
+        try:
+            value = json.loads(repaired)
+        except ValueError:
+            return None
+        return value if isinstance(value, dict) else None
@@ -0,0 +1,300 @@
+# Copyright (c) 2025 Peter Liu
+# SPDX-License-Identifier: MIT
+
+"""
+Non-blocking, bounded logging for tool and agent I/O.
+
+The calling thread renders the message of each record and puts it on a
+bounded in-process queue; a background listener thread formats and writes
+it, so request handlers never wait for log I/O. When the listener falls
+behind and the queue is full, records are dropped and counted instead of
+blocking or growing the queue. Large payloads are wrapped in ``capped()``,
+which renders nothing for records filtered out by level, caps the rendered
+size and logs the body of only a sample of oversized payloads.
+"""
+
+import atexit
+import copy
+import json
+import logging
+import os
+import queue
+import random
+import sys
+import threading
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Callable, Optional
+
+DEFAULT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+DEFAULT_MAX_FIELD_CHARS = 2000
+DEFAULT_MAX_MESSAGE_CHARS = 8000
+DEFAULT_QUEUE_SIZE = 10000
+
+# Attributes every LogRecord has; anything else was passed through ``extra``.
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+_listener: Optional[QueueListener] = None
+_queue_handler: Optional["_BoundedQueueHandler"] = None
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, default))
+    except ValueError:
+        return default
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except ValueError:
+        return default
+
+
+def truncate_text(text: str, limit: int) -> str:
+    """Cut a text to ``limit`` characters, noting how much was dropped."""
+    if limit <= 0 or len(text) <= limit:
+        return text
+    return f"{text[:limit]}... [{len(text) - limit} chars truncated]"
+
+
+def _to_text(value: Any) -> str:
+    if isinstance(value, str):
+        return value
+    if isinstance(value, (dict, list, tuple)):
+        try:
+            return json.dumps(value, ensure_ascii=False, default=str)
+        except (TypeError, ValueError):
+            pass
+    return str(value)
+
+
+class LazyText:
+    """
+    A log argument rendered only when the record is formatted.
+
+    Renderings longer than ``limit`` characters are capped and, unless the
+    payload is picked by ``sample_rate``, replaced by their size.
+    """
+
+    __slots__ = ("_render", "_limit", "_sample_rate")
+
+    def __init__(
+        self,
+        render: Callable[[], str],
+        limit: Optional[int] = None,
+        sample_rate: Optional[float] = None,
+    ):
+        self._render = render
+        self._limit = limit
+        self._sample_rate = sample_rate
+
+    def __str__(self) -> str:
+        try:
+            text = self._render()
+        except Exception as e:
+            return f"<unrenderable payload: {e}>"
+        limit = self._limit
+        if limit is None:
+            limit = _env_int("LOG_MAX_FIELD_CHARS", DEFAULT_MAX_FIELD_CHARS)
+        if limit <= 0 or len(text) <= limit:
+            return text
+        sample_rate = self._sample_rate
+        if sample_rate is None:
+            sample_rate = _env_float("LOG_PAYLOAD_SAMPLE_RATE", 1.0)
+        if sample_rate < 1.0 and random.random() >= sample_rate:
+            return f"<{len(text)} chars, not sampled>"
+        return truncate_text(text, limit)
+
+    __repr__ = __str__
+
+
+def capped(
+    value: Any, limit: Optional[int] = None, sample_rate: Optional[float] = None
+) -> LazyText:
+    """
+    Wrap a payload for logging with a size cap.
+
+    Strings are logged as is, containers as compact JSON and anything else
+    through ``str()``. Nothing is rendered if the record is filtered out.
+    """
+    return LazyText(lambda: _to_text(value), limit, sample_rate)
+
+
+def format_call(args: tuple, kwargs: dict, limit: Optional[int] = None) -> LazyText:
+    """Wrap the arguments of a call for logging as ``a, b, key=value``."""
+
+    def render() -> str:
+        return ", ".join(
+            [*(str(arg) for arg in args), *(f"{k}={v}" for k, v in kwargs.items())]
+        )
+
+    return LazyText(render, limit)
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Format records as single-line JSON objects.
+
+    Fields passed through ``extra`` are included, each capped to
+    ``max_field_chars``; the message is capped to ``max_message_chars``.
+    """
+
+    def __init__(
+        self,
+        max_field_chars: Optional[int] = None,
+        max_message_chars: Optional[int] = None,
+    ):
+        super().__init__()
+        self.max_field_chars = max_field_chars or _env_int(
+            "LOG_MAX_FIELD_CHARS", DEFAULT_MAX_FIELD_CHARS
+        )
+        self.max_message_chars = max_message_chars or _env_int(
+            "LOG_MAX_MESSAGE_CHARS", DEFAULT_MAX_MESSAGE_CHARS
+        )
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": truncate_text(record.getMessage(), self.max_message_chars),
+        }
+        for key, value in record.__dict__.items():
+            if key in _RECORD_ATTRS or key.startswith("_"):
+                continue
+            if not isinstance(value, (int, float, bool)) and value is not None:
+                value = truncate_text(_to_text(value), self.max_field_chars)
+            entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class _BoundedQueueHandler(QueueHandler):
+    """
+    Queue handler that drops records when the queue is full.
+
+    Like the stock ``prepare()``, the message is rendered in the calling
+    thread, so mutable arguments are logged as they were when the call was
+    made and queued records hold strings rather than the payloads; fields
+    passed through ``extra`` are rendered and capped as well. Formatting
+    into the output line is left to the listener.
+    """
+
+    def __init__(self, log_queue: queue.Queue, max_field_chars: int):
+        super().__init__(log_queue)
+        self.max_field_chars = max_field_chars
+        self.dropped = 0
+        self._reported = 0
+        self._lock = threading.Lock()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.message = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        for key, value in list(record.__dict__.items()):
+            if key in _RECORD_ATTRS or key.startswith("_"):
+                continue
+            if not isinstance(value, (int, float, bool, str)) and value is not None:
+                record.__dict__[key] = truncate_text(
+                    _to_text(value), self.max_field_chars
+                )
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            return
+        if self.dropped > self._reported:
+            with self._lock:
+                dropped, self._reported = self.dropped - self._reported, self.dropped
+            try:
+                self.queue.put_nowait(
+                    logging.makeLogRecord(
+                        {
+                            "name": __name__,
+                            "levelno": logging.WARNING,
+                            "levelname": "WARNING",
+                            "msg": f"Dropped {dropped} log records, "
+                            "the log queue was full",
+                        }
+                    )
+                )
+            except queue.Full:
+                pass
+
+
+def setup_logging(
+    level: int = logging.INFO,
+    stream=None,
+    json_format: Optional[bool] = None,
+    async_logging: Optional[bool] = None,
+) -> None:
+    """
+    Configure the root logger.
+
+    ``LOG_FORMAT`` selects ``text`` (default) or ``json`` output,
+    ``LOG_ASYNC=false`` writes records synchronously and ``LOG_QUEUE_SIZE``
+    bounds the records waiting for the listener. Calling this again
+    replaces the previous configuration.
+    """
+    global _listener, _queue_handler
+
+    if json_format is None:
+        json_format = os.getenv("LOG_FORMAT", "text").lower() == "json"
+    if async_logging is None:
+        async_logging = os.getenv("LOG_ASYNC", "true").lower() not in (
+            "0",
+            "false",
+            "no",
+        )
+
+    output = logging.StreamHandler(stream or sys.stderr)
+    output.setFormatter(
+        JsonFormatter() if json_format else logging.Formatter(DEFAULT_FORMAT)
+    )
+
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+    _queue_handler = None
+
+    if async_logging:
+        log_queue: queue.Queue = queue.Queue(
+            maxsize=max(1, _env_int("LOG_QUEUE_SIZE", DEFAULT_QUEUE_SIZE))
+        )
+        _listener = QueueListener(log_queue, output, respect_handler_level=True)
+        _listener.start()
+        _queue_handler = _BoundedQueueHandler(
+            log_queue, _env_int("LOG_MAX_FIELD_CHARS", DEFAULT_MAX_FIELD_CHARS)
+        )
+        handler: logging.Handler = _queue_handler
+    else:
+        handler = output
+
+    logging.basicConfig(level=level, handlers=[handler], force=True)
+
+
+def dropped_records() -> int:
+    """Records dropped because the log queue was full."""
+    return _queue_handler.dropped if _queue_handler is not None else 0
+
+
+def shutdown_logging() -> None:
+    """Flush queued records and stop the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(shutdown_logging)
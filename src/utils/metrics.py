@@ -0,0 +1,477 @@
+# Copyright (c) 2025 Peter Liu
+# SPDX-License-Identifier: MIT
+
+"""
+Latency, token and error metrics for graph nodes, tools and LLM calls.
+
+``MetricsCallbackHandler`` is a LangChain callback handler that is attached
+to every workflow run. It feeds the process-wide ``metrics`` registry, which
+renders the Prometheus text exposition format for ``/api/metrics``, and
+records a per-run ``RunTimeline`` that can be sent to the client at the end
+of a run.
+"""
+
+import bisect
+import threading
+import time
+from typing import Any, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+
+DEFAULT_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+    120.0,
+)
+
+
+class _Metric:
+    def __init__(self, name: str, description: str, label_names: tuple[str, ...]):
+        self.name = name
+        self.description = description
+        self.label_names = label_names
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict[str, str]) -> tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.label_names)
+
+    def _format_labels(self, key: tuple[str, ...], extra: str = "") -> str:
+        pairs = [
+            f'{name}="{_escape_label(value)}"'
+            for name, value in zip(self.label_names, key)
+        ]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter(_Metric):
+    """A monotonically increasing counter."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, description: str, label_names: tuple[str, ...] = ()):
+        super().__init__(name, description, label_names)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def render(self) -> list[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{self._format_labels(k)} {v:g}" for k, v in items]
+
+
+class Histogram(_Metric):
+    """A histogram with cumulative buckets, as in the Prometheus client."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        label_names: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, description, label_names)
+        self.buckets = tuple(sorted(buckets))
+        self._values: dict[tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._values.setdefault(
+                key, [[0] * (len(self.buckets) + 1), [0.0, 0]]
+            )
+            counts[index] += 1
+            total[0] += value
+            total[1] += 1
+
+    def render(self) -> list[str]:
+        lines = []
+        with self._lock:
+            items = sorted(
+                (k, (list(c), list(t))) for k, (c, t) in self._values.items()
+            )
+        for key, (counts, (total, count)) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                labels = self._format_labels(key, f'le="{bound:g}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = self._format_labels(key, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{labels} {count}")
+            lines.append(f"{self.name}_sum{self._format_labels(key)} {total:g}")
+            lines.append(f"{self.name}_count{self._format_labels(key)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Holds the process-wide metrics and renders them for Prometheus."""
+
+    def __init__(self):
+        self._metrics: dict[str, _Metric] = {}
+
+    def counter(self, name: str, description: str, label_names=()) -> Counter:
+        return self._register(Counter(name, description, tuple(label_names)))
+
+    def histogram(
+        self, name: str, description: str, label_names=(), buckets=DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self._register(
+            Histogram(name, description, tuple(label_names), tuple(buckets))
+        )
+
+    def _register(self, metric: _Metric):
+        existing = self._metrics.get(metric.name)
+        if existing is not None:
+            return existing
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        """Render all metrics in the Prometheus text exposition format."""
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.description}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+# Process-wide registry and the metrics recorded by the callback handler
+metrics = MetricsRegistry()
+
+RUN_DURATION = metrics.histogram(
+    "unghost_run_duration_seconds", "Duration of workflow runs", ("status",)
+)
+NODE_DURATION = metrics.histogram(
+    "unghost_node_duration_seconds",
+    "Duration of graph node executions",
+    ("node", "status"),
+)
+TOOL_DURATION = metrics.histogram(
+    "unghost_tool_duration_seconds", "Duration of tool calls", ("tool", "status")
+)
+LLM_DURATION = metrics.histogram(
+    "unghost_llm_duration_seconds", "Duration of LLM calls", ("node", "status")
+)
+LLM_TTFT = metrics.histogram(
+    "unghost_llm_time_to_first_token_seconds",
+    "Time from LLM call start to the first streamed token",
+    ("node",),
+)
+LLM_TOKENS = metrics.counter(
+    "unghost_llm_tokens_total", "LLM tokens by direction", ("node", "direction")
+)
+ERRORS = metrics.counter(
+    "unghost_errors_total",
+    "Errors raised by nodes, tools and LLM calls",
+    ("kind", "name"),
+)
+SPECULATIVE_INVESTIGATIONS = metrics.counter(
+    "unghost_speculative_investigations_total",
+    "Background investigations started alongside the coordinator, by outcome",
+    ("outcome",),
+)
+DUPLICATE_RESULTS = metrics.counter(
+    "unghost_duplicate_results_total",
+    "Search results and crawled pages dropped as near duplicates",
+    ("source",),
+)
+DUPLICATE_TOKENS_SAVED = metrics.counter(
+    "unghost_duplicate_tokens_saved_total",
+    "Estimated input tokens saved by dropping near-duplicate results",
+    ("source",),
+)
+SPECULATIVE_SAVED = metrics.histogram(
+    "unghost_speculative_investigation_saved_seconds",
+    "Time saved per request by searching while the coordinator runs",
+)
+LLM_ENDPOINT_REQUESTS = metrics.counter(
+    "unghost_llm_endpoint_requests_total",
+    "Requests to pooled LLM endpoints, by outcome",
+    ("endpoint", "outcome"),
+)
+LLM_HEDGES = metrics.counter(
+    "unghost_llm_hedges_total",
+    "Hedged LLM requests, by whether the hedge beat the first request",
+    ("outcome",),
+)
+
+
+class RunTimeline:
+    """Timestamped record of the nodes, tools and LLM calls of one run."""
+
+    def __init__(self, thread_id: str):
+        self.thread_id = thread_id
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+        self.events: list[dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    def offset(self) -> float:
+        return time.perf_counter() - self._start
+
+    def add(self, event: dict[str, Any]) -> None:
+        with self._lock:
+            self.events.append(event)
+
+    def summary(self) -> dict[str, Any]:
+        """Aggregate the timeline per node, tool and LLM call site."""
+        aggregates: dict[str, dict[str, dict[str, float]]] = {
+            "nodes": {},
+            "tools": {},
+            "llm": {},
+        }
+        for event in self.events:
+            group = aggregates[event["kind"]].setdefault(
+                event["name"], {"count": 0, "total_seconds": 0.0, "errors": 0}
+            )
+            group["count"] += 1
+            group["total_seconds"] = round(
+                group["total_seconds"] + event["duration"], 4
+            )
+            if event["status"] != "ok":
+                group["errors"] += 1
+            for key in ("input_tokens", "output_tokens"):
+                if key in event:
+                    group[key] = group.get(key, 0) + event[key]
+        return {
+            "thread_id": self.thread_id,
+            "total_seconds": round(self.offset(), 4),
+            **aggregates,
+            "events": sorted(self.events, key=lambda e: e["start"]),
+        }
+
+
+class MetricsCallbackHandler(BaseCallbackHandler):
+    """
+    Record node, tool and LLM latencies, tokens and errors for one run.
+
+    Graph nodes are recognised by the ``langgraph_node`` metadata LangGraph
+    attaches to the chain run of each node; LLM calls and tools are labelled
+    with the node they run in.
+    """
+
+    run_inline = True
+
+    def __init__(self, timeline: Optional[RunTimeline] = None):
+        self.timeline = timeline
+        self._runs: dict[UUID, dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    # Bookkeeping
+
+    def _start(self, run_id: UUID, kind: str, name: str, metadata: Optional[dict]):
+        node = _node_path(metadata)
+        with self._lock:
+            self._runs[run_id] = {
+                "kind": kind,
+                "name": name,
+                "node": node,
+                "start": time.perf_counter(),
+                "offset": self.timeline.offset() if self.timeline else 0.0,
+            }
+
+    def _finish(self, run_id: UUID, status: str, **extra: Any) -> Optional[dict]:
+        with self._lock:
+            run = self._runs.pop(run_id, None)
+        if run is None:
+            return None
+        run["duration"] = time.perf_counter() - run["start"]
+        if self.timeline:
+            event = {
+                "kind": run["kind"],
+                "name": run["name"],
+                "node": run["node"],
+                "start": round(run["offset"], 4),
+                "duration": round(run["duration"], 4),
+                "status": status,
+                **extra,
+            }
+            if "ttft" in run:
+                event["ttft"] = round(run["ttft"], 4)
+            self.timeline.add(event)
+        return run
+
+    # Graph nodes
+
+    def on_chain_start(
+        self,
+        serialized: dict[str, Any],
+        inputs: dict[str, Any],
+        *,
+        run_id: UUID,
+        metadata: Optional[dict[str, Any]] = None,
+        **kwargs: Any,
+    ) -> None:
+        node = (metadata or {}).get("langgraph_node")
+        if kwargs.get("parent_run_id") is None:
+            # The graph run itself
+            with self._lock:
+                self._runs[run_id] = {"kind": "run", "start": time.perf_counter()}
+        elif node and kwargs.get("name") == node:
+            # Only the chain run of the node itself, not the chains nested in it.
+            # Nodes of agent subgraphs are named by their path, e.g. researcher/tools.
+            self._start(run_id, "nodes", _node_path(metadata, full=True), metadata)
+
+    def on_chain_end(self, outputs: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self._finish_chain(run_id, "ok")
+
+    def on_chain_error(
+        self, error: BaseException, *, run_id: UUID, **kwargs: Any
+    ) -> None:
+        # LangGraph uses exceptions to interrupt a run for human feedback.
+        status = "interrupt" if type(error).__name__ == "GraphInterrupt" else "error"
+        self._finish_chain(run_id, status, error=repr(error)[:200])
+
+    def _finish_chain(self, run_id: UUID, status: str, **extra: Any) -> None:
+        with self._lock:
+            run = self._runs.get(run_id)
+            if run is not None and run["kind"] == "run":
+                del self._runs[run_id]
+        if run is not None and run["kind"] == "run":
+            RUN_DURATION.observe(time.perf_counter() - run["start"], status=status)
+            return
+        if status == "ok":
+            extra = {}
+        run = self._finish(run_id, status, **extra)
+        if run:
+            NODE_DURATION.observe(run["duration"], node=run["name"], status=status)
+            if status == "error":
+                ERRORS.inc(kind="node", name=run["name"])
+
+    # Tools
+
+    def on_tool_start(
+        self,
+        serialized: dict[str, Any],
+        input_str: str,
+        *,
+        run_id: UUID,
+        metadata: Optional[dict[str, Any]] = None,
+        **kwargs: Any,
+    ) -> None:
+        name = kwargs.get("name") or (serialized or {}).get("name", "tool")
+        self._start(run_id, "tools", name, metadata)
+
+    def on_tool_end(self, output: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        run = self._finish(run_id, "ok")
+        if run:
+            TOOL_DURATION.observe(run["duration"], tool=run["name"], status="ok")
+
+    def on_tool_error(
+        self, error: BaseException, *, run_id: UUID, **kwargs: Any
+    ) -> None:
+        run = self._finish(run_id, "error", error=repr(error)[:200])
+        if run:
+            TOOL_DURATION.observe(run["duration"], tool=run["name"], status="error")
+            ERRORS.inc(kind="tool", name=run["name"])
+
+    # LLM calls
+
+    def on_chat_model_start(
+        self,
+        serialized: dict[str, Any],
+        messages: list,
+        *,
+        run_id: UUID,
+        metadata: Optional[dict[str, Any]] = None,
+        **kwargs: Any,
+    ) -> None:
+        self._start(run_id, "llm", _node_path(metadata) or "llm", metadata)
+
+    def on_llm_start(
+        self,
+        serialized: dict[str, Any],
+        prompts: list[str],
+        *,
+        run_id: UUID,
+        metadata: Optional[dict[str, Any]] = None,
+        **kwargs: Any,
+    ) -> None:
+        self._start(run_id, "llm", _node_path(metadata) or "llm", metadata)
+
+    def on_llm_new_token(self, token: str, *, run_id: UUID, **kwargs: Any) -> None:
+        with self._lock:
+            run = self._runs.get(run_id)
+            if run is None or "ttft" in run:
+                return
+            run["ttft"] = time.perf_counter() - run["start"]
+        LLM_TTFT.observe(run["ttft"], node=run["name"])
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        input_tokens, output_tokens = _token_usage(response)
+        run = self._finish(
+            run_id, "ok", input_tokens=input_tokens, output_tokens=output_tokens
+        )
+        if run:
+            LLM_DURATION.observe(run["duration"], node=run["name"], status="ok")
+            LLM_TOKENS.inc(input_tokens, node=run["name"], direction="input")
+            LLM_TOKENS.inc(output_tokens, node=run["name"], direction="output")
+
+    def on_llm_error(
+        self, error: BaseException, *, run_id: UUID, **kwargs: Any
+    ) -> None:
+        run = self._finish(run_id, "error", error=repr(error)[:200])
+        if run:
+            LLM_DURATION.observe(run["duration"], node=run["name"], status="error")
+            ERRORS.inc(kind="llm", name=run["name"])
+
+
+def _node_path(metadata: Optional[dict], full: bool = False) -> str:
+    """
+    Name the graph node a run belongs to.
+
+    Returns the top-level node (e.g. ``researcher`` for an LLM call made by
+    the researcher agent) or, with ``full``, the path through subgraphs.
+    """
+    metadata = metadata or {}
+    namespace = metadata.get("langgraph_checkpoint_ns", "")
+    names = [part.split(":")[0] for part in namespace.split("|") if part]
+    if not names:
+        return metadata.get("langgraph_node", "")
+    return "/".join(names) if full else names[0]
+
+
+def _token_usage(response: LLMResult) -> tuple[int, int]:
+    """Extract (input, output) token counts from an LLM result."""
+    input_tokens = output_tokens = 0
+    for generations in response.generations:
+        for generation in generations:
+            message = getattr(generation, "message", None)
+            usage = getattr(message, "usage_metadata", None)
+            if usage:
+                input_tokens += usage.get("input_tokens", 0)
+                output_tokens += usage.get("output_tokens", 0)
+    if not (input_tokens or output_tokens) and response.llm_output:
+        usage = response.llm_output.get("token_usage") or {}
+        input_tokens = usage.get("prompt_tokens", 0)
+        output_tokens = usage.get("completion_tokens", 0)
+    return input_tokens, output_tokens
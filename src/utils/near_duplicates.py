@@ -0,0 +1,269 @@
+# Copyright (c) 2025 Peter Liu
+# SPDX-License-Identifier: MIT
+
+"""
+Near-duplicate filtering of search results and crawled pages within a run.
+
+The researcher queries several search tools whose results overlap heavily:
+the same snippet from the general and the LinkedIn search, syndicated
+copies of an article, one profile under several URLs. ``NearDuplicateIndex``
+remembers what a thread has already retrieved, by canonical URL and by a
+64-bit SimHash of word 1- and 2-shingles, and drops later copies before they
+reach the model.
+
+Indexes are kept per LangGraph thread; tools find theirs through the run
+config, so filtering needs no changes to tool signatures. Set
+``NEAR_DUPLICATE_FILTER=false`` to disable it.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+from src.utils.context_assembler import count_tokens
+from src.utils.metrics import DUPLICATE_RESULTS, DUPLICATE_TOKENS_SAVED
+from src.utils.run_context import current_thread_id
+
+logger = logging.getLogger(__name__)
+
+_WORD = re.compile(r"\w+")
+# Query parameters that track the visit rather than select the content
+_TRACKING_PARAMS = re.compile(
+    r"^(utm_\w+|fbclid|gclid|mc_cid|mc_eid|ref|ref_src|trk|trkInfo|"
+    r"originalSubdomain|igshid|si)$"
+)
+# Hosts that serve the same pages under several names
+_HOST_ALIASES = {
+    "twitter.com": "x.com",
+    "mobile.twitter.com": "x.com",
+    "mobile.x.com": "x.com",
+}
+
+
+def canonicalize_url(url: str) -> str:
+    """
+    Reduce a URL to the page it identifies: no scheme, ``www.``/``m.``
+    prefix, fragment, tracking parameters or trailing slash, with host
+    aliases such as twitter.com and country subdomains of LinkedIn unified.
+    """
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower().split("@")[-1].split(":")[0]
+    for prefix in ("www.", "m."):
+        host = host.removeprefix(prefix)
+    host = _HOST_ALIASES.get(host, host)
+    path = parts.path.rstrip("/")
+    if host.endswith(".linkedin.com"):
+        host = "linkedin.com"
+    if host == "linkedin.com":
+        # Profile and company slugs are case-insensitive
+        path = path.lower()
+    query = [
+        (k, v)
+        for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not _TRACKING_PARAMS.match(k)
+    ]
+    query_string = urlencode(sorted(query))
+    return f"{host}{path}?{query_string}" if query_string else f"{host}{path}"
+
+
+def simhash(text: str, min_words: int = 8) -> Optional[int]:
+    """
+    64-bit SimHash over the distinct words and word pairs of a text, or None
+    for texts shorter than ``min_words``, whose fingerprints are unreliable.
+
+    On search snippets, light edits of a text (a changed number, an added
+    "read more") stay within about 12 bits, while different texts about the
+    same person are around 25 bits apart.
+    """
+    words = _WORD.findall(text.casefold())
+    if len(words) < min_words:
+        return None
+    shingles = set(words)
+    shingles.update(" ".join(pair) for pair in zip(words, words[1:]))
+    weights = [0] * 64
+    for shingle in shingles:
+        digest = hashlib.blake2b(shingle.encode(), digest_size=8).digest()
+        value = int.from_bytes(digest, "big")
+        for bit in range(64):
+            weights[bit] += 1 if value >> bit & 1 else -1
+    return sum(1 << bit for bit, weight in enumerate(weights) if weight > 0)
+
+
+class NearDuplicateIndex:
+    """
+    The URLs and SimHash fingerprints retrieved so far in one thread.
+
+    Texts within ``max_distance`` differing bits of an earlier one are near
+    duplicates. A run retrieves at most a few hundred pages, so lookups scan
+    the fingerprints linearly.
+    """
+
+    def __init__(self, max_distance: int = 12):
+        self.max_distance = max_distance
+        self._urls: dict[str, dict[str, str]] = {}
+        self._fingerprints: list[tuple[int, str]] = []
+        self._lock = threading.Lock()
+        self.kept = 0
+        self.dropped = 0
+        self.tokens_saved = 0
+
+    def check(
+        self, url: str, text: str, kind: str = "search", refetch: bool = False
+    ) -> Optional[str]:
+        """
+        Return the URL of an earlier copy of this page, or register it and
+        return None. URLs are only compared within a kind (``search`` or
+        ``crawl``), since crawling a page found by search is not a repeat.
+        With ``refetch`` the page is being fetched again on purpose, e.g.
+        because its text was evicted, so its own earlier copy is no repeat.
+        """
+        canonical = canonicalize_url(url) if url else ""
+        fingerprint = simhash(text) if text else None
+        with self._lock:
+            urls = self._urls.setdefault(kind, {})
+            if canonical and canonical in urls and not refetch:
+                return urls[canonical]
+            if fingerprint is not None:
+                for other, other_url in self._fingerprints:
+                    if (fingerprint ^ other).bit_count() > self.max_distance:
+                        continue
+                    if refetch and canonicalize_url(other_url) == canonical:
+                        continue
+                    return other_url
+            if canonical:
+                urls[canonical] = url
+            if fingerprint is not None:
+                self._fingerprints.append((fingerprint, url))
+            return None
+
+    def filter(
+        self,
+        results: list[Any],
+        source: str,
+        text_key: str = "content",
+        kind: str = "search",
+        refetch: bool = False,
+    ) -> list[Any]:
+        """
+        Drop results that repeat earlier ones. Entries that are not pages
+        (images, plain strings) are kept as they are.
+        """
+        kept = []
+        dropped_tokens = 0
+        for result in results:
+            if not isinstance(result, dict) or not (
+                result.get("url") or result.get(text_key)
+            ):
+                kept.append(result)
+                continue
+            original = self.check(
+                result.get("url") or "", result.get(text_key) or "", kind, refetch
+            )
+            if original is None:
+                kept.append(result)
+                continue
+            tokens = count_tokens(json.dumps(result, ensure_ascii=False))
+            dropped_tokens += tokens
+            logger.debug(f"Dropped {result.get('url')}: near duplicate of {original}")
+        self.record(source, len(kept), len(results) - len(kept), dropped_tokens)
+        return kept
+
+    def record(self, source: str, kept: int, dropped: int, tokens: int):
+        with self._lock:
+            self.kept += kept
+            self.dropped += dropped
+            self.tokens_saved += tokens
+        if dropped:
+            DUPLICATE_RESULTS.inc(dropped, source=source)
+            DUPLICATE_TOKENS_SAVED.inc(tokens, source=source)
+            logger.info(
+                f"Dropped {dropped} near-duplicate {source} result(s), "
+                f"~{tokens} tokens saved"
+            )
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "kept": self.kept,
+            "dropped": self.dropped,
+            "tokens_saved": self.tokens_saved,
+        }
+
+
+_indexes: "OrderedDict[str, NearDuplicateIndex]" = OrderedDict()
+_indexes_lock = threading.Lock()
+
+
+def get_index(thread_id: str) -> NearDuplicateIndex:
+    """The index of a thread; the least recently used ones are evicted."""
+    max_threads = int(os.getenv("NEAR_DUPLICATE_MAX_THREADS", "256"))
+    with _indexes_lock:
+        index = _indexes.get(thread_id)
+        if index is None:
+            index = _indexes[thread_id] = NearDuplicateIndex(
+                max_distance=int(os.getenv("NEAR_DUPLICATE_MAX_DISTANCE", "12"))
+            )
+        _indexes.move_to_end(thread_id)
+        while len(_indexes) > max_threads:
+            _indexes.popitem(last=False)
+        return index
+
+
+def reset_index(thread_id: str) -> None:
+    """Forget what a thread retrieved, e.g. when a new run starts."""
+    with _indexes_lock:
+        _indexes.pop(thread_id, None)
+
+
+def index_stats(thread_id: str) -> Optional[dict]:
+    with _indexes_lock:
+        index = _indexes.get(thread_id)
+    return index.stats if index else None
+
+
+_suspended: ContextVar[bool] = ContextVar("near_duplicates_suspended", default=False)
+
+
+@contextmanager
+def suspended():
+    """
+    Neither filter nor record results in this context, for searches whose
+    results go somewhere other than the agents' context.
+    """
+    token = _suspended.set(True)
+    try:
+        yield
+    finally:
+        _suspended.reset(token)
+
+
+def current_index() -> Optional[NearDuplicateIndex]:
+    """The index of the thread the calling tool runs in, if any."""
+    if os.getenv("NEAR_DUPLICATE_FILTER", "true").lower() in ("false", "0", "no"):
+        return None
+    if _suspended.get():
+        return None
+    thread_id = current_thread_id()
+    return get_index(thread_id) if thread_id else None
+
+
+def filter_results(
+    results: list[Any],
+    source: str,
+    text_key: str = "content",
+    kind: str = "search",
+    refetch: bool = False,
+) -> list[Any]:
+    """Filter near duplicates with the current thread's index, if there is one."""
+    index = current_index()
+    if index is None:
+        return results
+    return index.filter(results, source, text_key=text_key, kind=kind, refetch=refetch)
@@ -0,0 +1,34 @@
+# Copyright (c) 2025 Peter Liu
+# SPDX-License-Identifier: MIT
+
+"""
+Access to the graph run a tool or helper is called from.
+"""
+
+from typing import Optional
+
+
+def current_thread_id() -> Optional[str]:
+    """The thread id of the current graph run, or None outside of one."""
+    try:
+        from langgraph.config import get_config
+
+        thread_id = get_config().get("configurable", {}).get("thread_id")
+    except (ImportError, RuntimeError):
+        # Called outside a graph run
+        return None
+    return str(thread_id) if thread_id else None
+
+
+def current_step_query() -> Optional[str]:
+    """
+    The title and description of the plan step being executed, if the caller
+    runs inside an agent step (see ``_execute_agent_step``).
+    """
+    try:
+        from langgraph.config import get_config
+
+        step = get_config().get("metadata", {}).get("research_step")
+    except (ImportError, RuntimeError):
+        return None
+    return step or None
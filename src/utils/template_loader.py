@@ -13,8 +13,14 @@ class TemplateLoader:
     """Utility class to load and manage outreach templates."""
     
     def __init__(self):
-        self.templates: List[Dict] = []
-        self._load_templates()
+        # Read on first use, so that creating the loader costs nothing
+        self._templates: Optional[List[Dict]] = None
+
+    @property
+    def templates(self) -> List[Dict]:
+        if self._templates is None:
+            self._load_templates()
+        return self._templates
     
     def _load_templates(self):
         """Load templates from the JSON file."""
@@ -24,14 +30,14 @@ class TemplateLoader:
             
             if template_path.exists():
                 with open(template_path, 'r', encoding='utf-8') as f:
-                    self.templates = json.load(f)
-                logger.info(f"Loaded {len(self.templates)} outreach templates")
+                    self._templates = json.load(f)
+                logger.info(f"Loaded {len(self._templates)} outreach templates")
             else:
                 logger.warning(f"Template file not found at {template_path}")
-                self.templates = []
+                self._templates = []
         except Exception as e:
             logger.error(f"Error loading templates: {e}")
-            self.templates = []
+            self._templates = []
     
     def get_all_templates(self) -> List[Dict]:
         """Get all available templates."""
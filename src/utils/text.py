@@ -0,0 +1,64 @@
+# Copyright (c) 2025 Peter Liu
+# SPDX-License-Identifier: MIT
+
+"""
+Tokenizing and chunking of plain text, shared by the RAG providers, the
+research memory and the crawl tool without importing any of them.
+"""
+
+import re
+
+_HEADING = re.compile(r"^#{1,6}\s")
+# CJK characters are words on their own; other words are runs of letters/digits
+_TOKEN = re.compile(r"[\u4e00-\u9fff]|[^\W_\u4e00-\u9fff]+")
+
+
+def tokenize(text: str) -> list[str]:
+    """The lowercased words of a text, as used for hashing and BM25."""
+    return _TOKEN.findall(text.casefold())
+
+
+def _split_long(paragraph: str, max_chars: int, overlap: int) -> list[str]:
+    parts = []
+    start = 0
+    while start < len(paragraph):
+        end = min(len(paragraph), start + max_chars)
+        if end < len(paragraph):
+            # Break at the last space of the window, if there is one
+            space = paragraph.rfind(" ", start + max_chars // 2, end)
+            end = space if space > 0 else end
+        parts.append(paragraph[start:end].strip())
+        if end == len(paragraph):
+            break
+        start = max(start + 1, end - overlap)
+    return parts
+
+
+def split_text(text: str, max_chars: int = 1200, overlap: int = 150) -> list[str]:
+    """
+    Split a text into chunks of up to ``max_chars`` characters.
+
+    Paragraphs are packed together and a markdown heading always starts a new
+    chunk; a paragraph longer than a chunk is cut at spaces, with ``overlap``
+    characters repeated between its parts.
+    """
+    chunks: list[str] = []
+    current: list[str] = []
+    size = 0
+    for paragraph in re.split(r"\n\s*\n", text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if current and (
+            _HEADING.match(paragraph) or size + len(paragraph) + 2 > max_chars
+        ):
+            chunks.append("\n\n".join(current))
+            current, size = [], 0
+        if len(paragraph) > max_chars:
+            chunks.extend(_split_long(paragraph, max_chars, overlap))
+            continue
+        current.append(paragraph)
+        size += len(paragraph) + 2
+    if current:
+        chunks.append("\n\n".join(current))
+    return chunks
@@ -4,12 +4,10 @@
 import asyncio
 import logging
 from src.graph import build_graph
+from src.utils.log_pipeline import setup_logging
 
 # Configure logging
-logging.basicConfig(
-    level=logging.INFO,  # Default level is INFO
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-)
+setup_logging(level=logging.INFO)  # Default level is INFO
 
 
 def enable_debug_logging():